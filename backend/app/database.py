@@ -1,11 +1,26 @@
 """
 Database configuration and session management
 """
-from sqlalchemy import create_engine
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+import redis
+from fastapi import Request
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession, AsyncEngine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from app.config import settings
+from app.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
 
+# Sync engine - used by init_db.py, the data pipeline and scripts
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
@@ -14,9 +29,215 @@ engine = create_engine(
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async engine - used by the API routers so a worker is not capped by the threadpool
+async_engine = create_async_engine(
+    settings.get_async_database_url(),
+    pool_pre_ping=True,
+    pool_size=settings.ASYNC_DB_POOL_SIZE,
+    max_overflow=settings.ASYNC_DB_MAX_OVERFLOW
+)
+
+# expire_on_commit=False: attributes stay readable after commit without a lazy refresh
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 Base = declarative_base()
 
 
+class Replica:
+    """A read replica engine and its last known health"""
+
+    def __init__(self, url: str):
+        self.engine: AsyncEngine = create_async_engine(
+            url,
+            pool_pre_ping=True,
+            pool_size=settings.ASYNC_DB_POOL_SIZE,
+            max_overflow=settings.ASYNC_DB_MAX_OVERFLOW
+        )
+        self.name = self.engine.url.render_as_string(hide_password=True)
+        self.healthy = True
+        self.reads = 0
+        self.failures = 0
+
+
+class ReplicaPool:
+    """Round-robin over healthy replicas with periodic health checks"""
+
+    def __init__(self, urls: List[str]):
+        self.replicas = [Replica(url) for url in urls]
+        self._next = 0
+        self._health_task: Optional[asyncio.Task] = None
+        self.primary_reads = 0
+        self.pinned_reads = 0
+
+    def choose(self) -> Optional[Replica]:
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[self._next % len(self.replicas)]
+            self._next += 1
+            if replica.healthy:
+                return replica
+        return None
+
+    def mark_unhealthy(self, replica: Replica, error: Exception) -> None:
+        if replica.healthy:
+            logger.warning(f"Read replica {replica.name} marked unhealthy: {error}")
+        replica.healthy = False
+        replica.failures += 1
+
+    async def check_health(self) -> None:
+        for replica in self.replicas:
+            try:
+                async with replica.engine.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+                if not replica.healthy:
+                    logger.info(f"Read replica {replica.name} is healthy again")
+                replica.healthy = True
+            except Exception as e:
+                self.mark_unhealthy(replica, e)
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.REPLICA_HEALTH_CHECK_SECONDS)
+            await self.check_health()
+
+    def start_health_checks(self) -> None:
+        if self.replicas and self._health_task is None:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def close(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "primary_reads": self.primary_reads,
+            "pinned_reads": self.pinned_reads,
+            "replicas": [
+                {
+                    "name": replica.name,
+                    "healthy": replica.healthy,
+                    "reads": replica.reads,
+                    "failures": replica.failures,
+                }
+                for replica in self.replicas
+            ],
+        }
+
+
+replica_pool = ReplicaPool(settings.get_replica_database_urls())
+
+
+class ReadYourWrites:
+    """Pins a client to the primary for a short window after it commits a write
+
+    Pins are kept locally and in Redis so a follow-up read served by another
+    worker is also routed to the primary. Redis calls run in a thread, never
+    on the event loop: a pin is published in the background, and a lookup
+    gives up after lookup_timeout (the read then goes to a replica). After
+    a Redis failure, lookups are skipped for a second.
+    """
+
+    def __init__(self, window_seconds: float, lookup_timeout: float):
+        self.window_seconds = window_seconds
+        self.lookup_timeout = lookup_timeout
+        self._pins: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._redis_down_until = 0.0
+
+    @staticmethod
+    def key_for(request: Request) -> Optional[str]:
+        authorization = request.headers.get("authorization")
+        if not authorization:
+            return None
+        return hashlib.sha256(authorization.encode("utf-8")).hexdigest()[:32]
+
+    def _redis_failed(self) -> None:
+        self._redis_down_until = time.monotonic() + 1.0
+
+    def _publish(self, key: str) -> None:
+        try:
+            get_redis().set(f"taskflow:rw-pin:{key}", 1, px=int(self.window_seconds * 1000))
+        except redis.RedisError as e:
+            self._redis_failed()
+            logger.warning(f"Failed to publish read-your-writes pin: {e}")
+
+    def _exists(self, key: str) -> bool:
+        try:
+            return bool(get_redis().exists(f"taskflow:rw-pin:{key}"))
+        except redis.RedisError:
+            self._redis_failed()
+            return False
+
+    def pin(self, key: str) -> None:
+        with self._lock:
+            self._pins[key] = time.monotonic() + self.window_seconds
+            if len(self._pins) > 10000:
+                now = time.monotonic()
+                self._pins = {k: v for k, v in self._pins.items() if v > now}
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Sync callers have no loop to protect
+            self._publish(key)
+            return
+        loop.run_in_executor(None, self._publish, key)
+
+    async def is_pinned(self, key: Optional[str]) -> bool:
+        if key is None:
+            return False
+        with self._lock:
+            expires_at = self._pins.get(key)
+        if expires_at is not None and expires_at > time.monotonic():
+            return True
+        if time.monotonic() < self._redis_down_until:
+            return False
+        try:
+            return await asyncio.wait_for(asyncio.to_thread(self._exists, key), timeout=self.lookup_timeout)
+        except asyncio.TimeoutError:
+            self._redis_failed()
+            return False
+
+
+read_your_writes = ReadYourWrites(
+    settings.READ_YOUR_WRITES_SECONDS, settings.READ_YOUR_WRITES_LOOKUP_TIMEOUT_SECONDS
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _pin_after_commit(session: Session) -> None:
+    """Pin the requesting client once its write transaction has committed
+
+    Only with replicas configured: without them every read is on the primary.
+    """
+    pin_key = session.info.get("pin_key")
+    if session.info.pop("has_writes", False) and pin_key and replica_pool.replicas:
+        read_your_writes.pin(pin_key)
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_writes(session: Session) -> None:
+    session.info.pop("has_writes", None)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_writes(session: Session, flush_context) -> None:
+    session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk_writes(orm_execute_state) -> None:
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        orm_execute_state.session.info["has_writes"] = True
+
+
 def get_db():
     """Dependency for getting database session"""
     db = SessionLocal()
@@ -25,3 +246,38 @@ def get_db():
     finally:
         db.close()
 
+
+async def get_async_db(request: Request):
+    """Dependency for getting an async database session on the primary"""
+    async with AsyncSessionLocal() as db:
+        db.info["pin_key"] = ReadYourWrites.key_for(request)
+        yield db
+
+
+async def get_read_db(request: Request):
+    """Dependency for read-only endpoints - routes to a healthy replica
+
+    Falls back to the primary when no replica is configured or healthy, and
+    while the client is pinned after one of its own writes.
+    """
+    replica = None
+    if replica_pool.replicas:
+        if await read_your_writes.is_pinned(ReadYourWrites.key_for(request)):
+            replica_pool.pinned_reads += 1
+        else:
+            replica = replica_pool.choose()
+    
+    if replica is None:
+        replica_pool.primary_reads += 1
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+    
+    replica.reads += 1
+    async with AsyncSessionLocal(bind=replica.engine) as db:
+        try:
+            yield db
+        except DBAPIError as e:
+            if e.connection_invalidated:
+                replica_pool.mark_unhealthy(replica, e)
+            raise
@@ -9,20 +9,35 @@ from fastapi.security import HTTPBearer
 from contextlib import asynccontextmanager
 import uvicorn
 
-from app.database import engine, Base, get_db
-from app.routers import auth, tasks, projects, analytics, subscription, websocket, google_auth
+from app.database import async_engine, replica_pool
+from app.routers import auth, tasks, projects, analytics, subscription, websocket, google_auth, export
 from app.config import settings
+from app.services.principal_cache import principal_cache, invalidation_listener
+from app.services.password_hashing import hashing_pool
+from app.services.layout_coalescer import layout_coalescer
+from app.services.activity_buffer import activity_buffer
+from app.services.etags import conditional_get_stats
+from app.utils.query_counter import QueryCountMiddleware
 
 security = HTTPBearer()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Create tables
-    Base.metadata.create_all(bind=engine)
+    # Startup: schema is managed by Alembic (run `alembic upgrade head` / init_db.py)
+    invalidation_listener.start()
+    replica_pool.start_health_checks()
+    layout_coalescer.start()
+    activity_buffer.start()
     yield
     # Shutdown: cleanup if needed
-    pass
+    invalidation_listener.stop()
+    await layout_coalescer.stop()
+    # Drain queued activity records before the engine goes away
+    await activity_buffer.stop()
+    hashing_pool.shutdown()
+    await replica_pool.close()
+    await async_engine.dispose()
 
 
 app = FastAPI(
@@ -39,8 +54,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-Query-Count"],
 )
 
+# Opt-in: X-Query-Count header and warnings for endpoints over budget
+if settings.QUERY_COUNT_MIDDLEWARE:
+    app.add_middleware(QueryCountMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
 app.include_router(google_auth.router, prefix="/api/v1/auth", tags=["Google OAuth"])
@@ -48,6 +68,7 @@ app.include_router(tasks.router, prefix="/api/v1/tasks", tags=["Tasks"])
 app.include_router(projects.router, prefix="/api/v1/projects", tags=["Projects"])
 app.include_router(analytics.router, prefix="/api/v1/analytics", tags=["Analytics"])
 app.include_router(subscription.router, prefix="/api/v1/subscription", tags=["Subscription"])
+app.include_router(export.router, prefix="/api/v1/export", tags=["Export"])
 app.include_router(websocket.router, prefix="/ws", tags=["WebSocket"])
 
 
@@ -66,6 +87,19 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """In-process performance counters for this worker"""
+    return {
+        "principal_cache": principal_cache.stats(),
+        "password_hashing": hashing_pool.stats(),
+        "read_routing": replica_pool.stats(),
+        "layout_writes": layout_coalescer.stats(),
+        "conditional_get": conditional_get_stats.stats(),
+        "activity_buffer": activity_buffer.stats(),
+    }
+
+
 if __name__ == "__main__":
     uvicorn.run(
         "app.main:app",
@@ -1,9 +1,10 @@
 """
 Database models for TaskFlow - Multi-tenant SaaS architecture
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Enum, Numeric, JSON
-from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, ForeignKey, Text, Enum, Numeric, JSON, Index, BigInteger, FetchedValue, Computed, Table
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.sql import func, text
 from datetime import datetime
 import enum
 from app.database import Base
@@ -44,6 +45,9 @@ class Organization(Base):
     max_users = Column(Integer, default=5)  # Free tier: 5 users
     max_projects = Column(Integer, default=3)  # Free tier: 3 projects
     max_tasks_per_project = Column(Integer, default=100)  # Free tier: 100 tasks
+    # Maintained by triggers on insert/delete of projects and users
+    project_count = Column(Integer, nullable=False, server_default="0")
+    user_count = Column(Integer, nullable=False, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -62,7 +66,7 @@ class User(Base):
     full_name = Column(String(255), nullable=True)
     is_active = Column(Boolean, default=True)
     is_admin = Column(Boolean, default=False)  # Organization admin
-    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -83,12 +87,26 @@ class Project(Base):
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     is_active = Column(Boolean, default=True)
     color = Column(String(7), default="#3B82F6")  # Hex color for UI
+    # Maintained by triggers on insert/delete of tasks
+    task_count = Column(Integer, nullable=False, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
     organization = relationship("Organization", back_populates="projects")
     tasks = relationship("Task", back_populates="project", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        Index("ix_projects_org_active", "organization_id", "is_active"),
+        Index(
+            "ix_projects_org_active_created_at_id", "organization_id", "created_at", "id",
+            postgresql_where=text("is_active = true"),
+        ),
+    )
+
+
+# Largest magnitude the Numeric(10, 2) geometry columns of tasks hold
+GEOMETRY_LIMIT = 99_999_999.99
 
 
 class Task(Base):
@@ -98,26 +116,44 @@ class Task(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(500), nullable=False)
     description = Column(Text, nullable=True)
-    status = Column(Enum(TaskStatus), default=TaskStatus.TODO, index=True)
+    status = Column(Enum(TaskStatus), default=TaskStatus.TODO)
     priority = Column(Enum(TaskPriority), default=TaskPriority.MEDIUM)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False, index=True)
+    # Denormalized from the project so tenant filters need no join (kept in sync by a DB trigger)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
     assignee_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
     created_by_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     due_date = Column(DateTime(timezone=True), nullable=True)
     completed_at = Column(DateTime(timezone=True), nullable=True)
-    estimated_hours = Column(Numeric(10, 2), nullable=True)
-    actual_hours = Column(Numeric(10, 2), nullable=True)
-    price = Column(Numeric(10, 2), nullable=True)  # Task price
-    tags = Column(JSON, default=list)  # List of tags
+    # asdecimal=False: the driver hands back floats, so responses need no per-field conversion
+    estimated_hours = Column(Numeric(10, 2, asdecimal=False), nullable=True)
+    actual_hours = Column(Numeric(10, 2, asdecimal=False), nullable=True)
+    price = Column(Numeric(10, 2, asdecimal=False), nullable=True)  # Task price
+    tags = Column(JSONB, default=list)  # List of tags (JSONB so containment filters use a GIN index)
     extra_data = Column(JSON, default=dict)  # Additional metadata (renamed from 'metadata' to avoid SQLAlchemy conflict)
     # Position and size for drag-and-drop interface
-    position_x = Column(Numeric(10, 2), nullable=True)  # X position relative to container
-    position_y = Column(Numeric(10, 2), nullable=True)  # Y position relative to container
-    box_width = Column(Numeric(10, 2), nullable=True, default=250)  # Box width in pixels
-    box_height = Column(Numeric(10, 2), nullable=True, default=140)  # Box height in pixels
-    is_archived = Column(Boolean, default=False, index=True)  # Archive flag to hide tasks from frontend
+    position_x = Column(Numeric(10, 2, asdecimal=False), nullable=True)  # X position relative to container
+    position_y = Column(Numeric(10, 2, asdecimal=False), nullable=True)  # Y position relative to container
+    box_width = Column(Numeric(10, 2, asdecimal=False), nullable=True, default=250)  # Box width in pixels
+    box_height = Column(Numeric(10, 2, asdecimal=False), nullable=True, default=140)  # Box height in pixels
+    is_archived = Column(Boolean, default=False)  # Archive flag to hide tasks from frontend
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Global change sequence, stamped by a DB trigger on every insert/update (delta sync). The
+    # trigger also stamps change_txid (xid8, read with plain SQL): see migration 0015
+    change_seq = Column(BigInteger, nullable=False, server_default=text("0"), server_onupdate=FetchedValue())
+    # Bumped by a DB trigger when content (not board geometry) changes; optimistic concurrency
+    version = Column(Integer, nullable=False, server_default=text("1"), server_onupdate=FetchedValue())
+    # Generated full-text document (see app.services.task_search); deferred so ORM loads skip it
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B') || "
+            "setweight(jsonb_to_tsvector('simple', coalesce(tags, '[]'::jsonb), '[\"string\"]'), 'A')",
+            persisted=True,
+        ),
+    ))
     
     # Relationships
     project = relationship("Project", back_populates="tasks")
@@ -125,6 +161,26 @@ class Task(Base):
     creator = relationship("User", foreign_keys=[created_by_id])
     comments = relationship("TaskComment", back_populates="task", cascade="all, delete-orphan")
     activity_logs = relationship("TaskActivityLog", back_populates="task", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        Index("ix_tasks_org_archived_status", "organization_id", "is_archived", "status"),
+        Index("ix_tasks_org_created_at", "organization_id", "created_at"),
+        Index("ix_tasks_org_active_created_at_id", "organization_id", "created_at", "id",
+              postgresql_where=text("is_archived = false")),
+        Index("ix_tasks_project_active_created_at_id", "project_id", "created_at", "id",
+              postgresql_where=text("is_archived = false")),
+        Index("ix_tasks_project_status", "project_id", "status"),
+        Index("ix_tasks_org_status_completed_at", "organization_id", "status", "completed_at"),
+        Index("ix_tasks_org_open_due_date", "organization_id", "due_date",
+              postgresql_where=text("status <> 'DONE'")),
+        Index("ix_tasks_org_change_txid", "organization_id", text("change_txid"), "change_seq"),
+        # btree_gin lets organization_id lead the GIN indexes
+        Index("ix_tasks_org_search_vector", "organization_id", "search_vector", postgresql_using="gin"),
+        Index("ix_tasks_org_title_trgm", "organization_id", "title", postgresql_using="gin",
+              postgresql_ops={"title": "gin_trgm_ops"}),
+        Index("ix_tasks_org_tags", "organization_id", "tags", postgresql_using="gin",
+              postgresql_ops={"tags": "jsonb_path_ops"}),
+    )
 
 
 class TaskComment(Base):
@@ -132,7 +188,7 @@ class TaskComment(Base):
     __tablename__ = "task_comments"
     
     id = Column(Integer, primary_key=True, index=True)
-    task_id = Column(Integer, ForeignKey("tasks.id"), nullable=False)
+    task_id = Column(Integer, ForeignKey("tasks.id"), nullable=False, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     content = Column(Text, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -146,30 +202,160 @@ class TaskActivityLog(Base):
     __tablename__ = "task_activity_logs"
     
     id = Column(Integer, primary_key=True, index=True)
-    task_id = Column(Integer, ForeignKey("tasks.id"), nullable=False, index=True)
+    task_id = Column(Integer, ForeignKey("tasks.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     action = Column(String(100), nullable=False)  # created, updated, assigned, completed, etc.
     old_value = Column(JSON, nullable=True)
     new_value = Column(JSON, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    # Task version right after the change; history is ordered by (task_version, id)
+    task_version = Column(Integer, nullable=False, server_default="0")
     
     # Relationships
     task = relationship("Task", back_populates="activity_logs")
+    
+    __table_args__ = (
+        Index("ix_task_activity_logs_task_created_at_id", "task_id", "created_at", "id"),
+        Index("ix_task_activity_logs_task_version_id", "task_id", "task_version", "id"),
+    )
+
+
+class TaskSnapshot(Base):
+    """Full task state as of an activity log entry (see app.services.task_history)"""
+    __tablename__ = "task_snapshots"
+    
+    id = Column(BigInteger, primary_key=True)
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False)
+    # task_version and id of the last activity log row folded into the state
+    task_version = Column(Integer, nullable=False)
+    activity_id = Column(Integer, nullable=False)
+    taken_at = Column(DateTime(timezone=True), nullable=False)
+    state = Column(JSONB, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_task_snapshots_task_version_activity", "task_id", "task_version", "activity_id"),
+    )
 
 
 class AnalyticsEvent(Base):
-    """Analytics events for data pipeline processing"""
+    """Analytics events for data pipeline processing
+    
+    Range-partitioned by month on created_at (see app.services.partitions);
+    the primary key includes the partitioning column as PostgreSQL requires.
+    """
     __tablename__ = "analytics_events"
     
-    id = Column(Integer, primary_key=True, index=True)
-    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False, index=True)
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
     event_type = Column(String(100), nullable=False, index=True)  # task_created, task_completed, etc.
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=True)
-    task_id = Column(Integer, ForeignKey("tasks.id"), nullable=True)
+    task_id = Column(Integer, nullable=True)  # No FK: events outlive deleted tasks
     extra_data = Column(JSON, default=dict)  # Additional metadata
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now(), index=True)
+    
+    __table_args__ = (
+        Index("ix_analytics_events_org_created_at", "organization_id", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+
+class AnalyticsEventCount(Base):
+    """Task events per organization, day and type, fed from the task outbox
+    
+    Maintained by the pipeline's "analytics" outbox consumer (see
+    app.services.outbox); the outbox tables themselves use xid8 columns and
+    are read with plain SQL.
+    """
+    __tablename__ = "analytics_event_counts"
+    
+    organization_id = Column(Integer, ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    event_type = Column(String(50), primary_key=True)
+    count = Column(BigInteger, nullable=False, server_default="0")
+
+
+def rollup_measure_columns():
+    """Measure columns shared by the rollup tables (see app.services.rollups)"""
+    columns = [
+        Column("tasks_created", BigInteger, nullable=False, server_default="0"),
+        Column("tasks_completed", BigInteger, nullable=False, server_default="0"),
+        Column("completion_seconds_sum", Numeric(20, 6), nullable=False, server_default="0"),
+        Column("completion_count", BigInteger, nullable=False, server_default="0"),
+    ]
+    for dimension, values in (("status", TaskStatus), ("priority", TaskPriority)):
+        for value in values:
+            columns += [
+                Column(f"tasks_{dimension}_{value.value}", BigInteger, nullable=False, server_default="0"),
+                Column(f"priced_{dimension}_{value.value}", BigInteger, nullable=False, server_default="0"),
+                Column(f"price_{dimension}_{value.value}", Numeric(14, 2), nullable=False, server_default="0"),
+            ]
+    return columns
+
+
+class DailyOrgRollup(Base):
+    """Task measures per organization and UTC day, maintained from the task outbox"""
+    __table__ = Table(
+        "daily_org_rollups",
+        Base.metadata,
+        Column("organization_id", Integer, ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True),
+        Column("day", Date, primary_key=True),
+        *rollup_measure_columns(),
+    )
+
+
+class DailyProjectRollup(Base):
+    """Task measures per project and UTC day, maintained from the task outbox"""
+    __table__ = Table(
+        "daily_project_rollups",
+        Base.metadata,
+        Column("project_id", Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True),
+        Column("day", Date, primary_key=True),
+        Column("organization_id", Integer, nullable=False),
+        *rollup_measure_columns(),
+    )
+
+
+class OrgRollupTotal(Base):
+    """The daily organization measures summed over all days"""
+    __table__ = Table(
+        "org_rollup_totals",
+        Base.metadata,
+        Column("organization_id", Integer, ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True),
+        *rollup_measure_columns(),
+    )
+
+
+class OrgChangeCounter(Base):
+    """Per-organization change counters used as cheap ETag version stamps
+    
+    Bumped by statement-level triggers on projects and users (see migration
+    0006), so every writer - API, batch endpoints, pipeline, raw SQL -
+    invalidates cached representations without application code. Tasks take
+    no lock here: their version comes from change_txid (migration 0015), and
+    the task_count updates their inserts and deletes make are not project
+    changes (migration 0017).
+    """
+    __tablename__ = "org_change_counters"
     
-    # Note: PostgreSQL partitioning can be added later if needed for large datasets
-    # For partitioned tables, primary key must include partitioning column
+    organization_id = Column(Integer, ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True)
+    projects_version = Column(BigInteger, nullable=False, server_default="0")
+    users_version = Column(BigInteger, nullable=False, server_default="0")
+    # tombstones_compacted_txid (xid8): tombstones up to this transaction have been compacted;
+    # older sync cursors must resync
+
 
+class TaskTombstone(Base):
+    """Record of a deleted task for delta sync, written by a DB trigger on delete"""
+    __tablename__ = "task_tombstones"
+    
+    task_id = Column(Integer, primary_key=True)
+    organization_id = Column(Integer, nullable=False)
+    project_id = Column(Integer, nullable=True)
+    # From the tasks' global change sequence; change_txid (xid8) is set alongside
+    change_seq = Column(BigInteger, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    
+    __table_args__ = (
+        Index("ix_task_tombstones_org_change_txid", "organization_id", text("change_txid"), "change_seq"),
+    )
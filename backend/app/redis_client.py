@@ -0,0 +1,20 @@
+"""
+Shared Redis client for caching and cross-worker messaging
+"""
+import redis
+from app.config import settings
+
+_client: redis.Redis | None = None
+
+
+def get_redis() -> redis.Redis:
+    """Return the process-wide Redis client (created lazily)"""
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_connect_timeout=1,
+            socket_timeout=1,
+            health_check_interval=30,
+        )
+    return _client
@@ -1,17 +1,26 @@
 """Analytics router - demonstrates data pipeline and analytics capabilities"""
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List, Dict, Any
-from datetime import datetime, timedelta
+import time
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Dict, Any, Literal, Optional
+from datetime import datetime, timedelta, timezone
 from pydantic import BaseModel
-from app.database import get_db
-from app.models import Task, Project, Organization, User, AnalyticsEvent, TaskStatus
-from app.utils.auth import get_current_active_user
+from app.database import get_read_db
+from app.models import Task, Project, Organization, AnalyticsEvent, TaskStatus
+from app.utils.auth import Principal, get_current_active_user
+from app.services.etags import check_not_modified, set_etag
+from app.services.dashboard import dashboard_figures, rollup_dashboard_figures
+from app.services.rollups import read_rollups
 
 router = APIRouter()
 
 
+def minute_bucket() -> int:
+    """Current minute, for ETags on representations that depend on the clock"""
+    return int(time.time() // 60)
+
+
 class AnalyticsResponse(BaseModel):
     total_tasks: int
     tasks_by_status: Dict[str, int]
@@ -34,195 +43,77 @@ class TimeSeriesData(BaseModel):
 
 
 @router.get("/dashboard", response_model=AnalyticsResponse)
-def get_dashboard_analytics(
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
-    days: int = Query(30, ge=1, le=365)
+async def get_dashboard_analytics(
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db),
+    days: int = Query(30, ge=1, le=365),
+    source: Literal["tasks", "rollups"] = Query("tasks")
 ):
-    """Get dashboard analytics - demonstrates data aggregation and pipeline capabilities"""
+    """Get dashboard analytics - demonstrates data aggregation and pipeline capabilities
+    
+    Computed in two statements (see app.services.dashboard) rather than one
+    query per figure. With source=rollups the figures come from the daily
+    rollups plus not-yet-folded changes, at day granularity, so the cost
+    does not grow with the organization's history; until the rollups have
+    been built this falls back to the tasks.
+    """
     org_id = current_user.organization_id
-    start_date = datetime.utcnow() - timedelta(days=days)
-    
-    # Total tasks
-    total_tasks = db.query(Task).join(Project).filter(
-        Project.organization_id == org_id
-    ).count()
-    
-    # Tasks by status
-    tasks_by_status = db.query(
-        Task.status,
-        func.count(Task.id).label('count')
-    ).join(Project).filter(
-        Project.organization_id == org_id
-    ).group_by(Task.status).all()
-    
-    status_dict = {status.value: 0 for status in TaskStatus}
-    for status, count in tasks_by_status:
-        status_dict[status.value] = count
-    
-    # Tasks by priority
-    tasks_by_priority = db.query(
-        Task.priority,
-        func.count(Task.id).label('count')
-    ).join(Project).filter(
-        Project.organization_id == org_id
-    ).group_by(Task.priority).all()
-    
-    priority_dict = {}
-    for priority, count in tasks_by_priority:
-        priority_dict[priority.value] = count
-    
-    # Tasks completed today
-    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    tasks_completed_today = db.query(Task).join(Project).filter(
-        Project.organization_id == org_id,
-        Task.status == TaskStatus.DONE,
-        Task.completed_at >= today_start
-    ).count()
-    
-    # Tasks completed this week
-    week_start = today_start - timedelta(days=today_start.weekday())
-    tasks_completed_this_week = db.query(Task).join(Project).filter(
-        Project.organization_id == org_id,
-        Task.status == TaskStatus.DONE,
-        Task.completed_at >= week_start
-    ).count()
-    
-    # Average completion time
-    completed_tasks = db.query(Task).join(Project).filter(
-        Project.organization_id == org_id,
-        Task.status == TaskStatus.DONE,
-        Task.completed_at.isnot(None),
-        Task.created_at >= start_date
-    ).all()
-    
-    completion_times = []
-    for task in completed_tasks:
-        if task.completed_at:
-            delta = task.completed_at - task.created_at
-            completion_times.append(delta.total_seconds() / 3600)  # Hours
-    
-    avg_completion_time = sum(completion_times) / len(completion_times) if completion_times else None
-    
-    # Overdue tasks
-    now = datetime.utcnow()
-    tasks_overdue = db.query(Task).join(Project).filter(
-        Project.organization_id == org_id,
-        Task.due_date.isnot(None),
-        Task.due_date < now,
-        Task.status != TaskStatus.DONE
-    ).count()
-    
-    # Productivity score (0-100)
-    if total_tasks > 0:
-        completed = status_dict.get('done', 0)
-        productivity_score = (completed / total_tasks) * 100
-    else:
-        productivity_score = 0.0
-    
-    # Top contributors
-    top_contributors = db.query(
-        User.id,
-        User.full_name,
-        User.email,
-        func.count(Task.id).label('task_count')
-    ).join(Task, User.id == Task.assignee_id).join(
-        Project, Task.project_id == Project.id
-    ).filter(
-        Project.organization_id == org_id,
-        Task.created_at >= start_date
-    ).group_by(User.id, User.full_name, User.email).order_by(
-        func.count(Task.id).desc()
-    ).limit(10).all()
-    
-    contributors = [
-        {
-            "user_id": u.id,
-            "name": u.full_name or u.email,
-            "email": u.email,
-            "tasks_completed": u.task_count
-        }
-        for u in top_contributors
-    ]
     
-    # Price aggregations
-    # Total price
-    total_price_result = db.query(func.sum(Task.price)).join(Project).filter(
-        Project.organization_id == org_id,
-        Task.price.isnot(None)
-    ).scalar()
-    total_price = float(total_price_result) if total_price_result else 0.0
-    
-    # Price by status
-    price_by_status_query = db.query(
-        Task.status,
-        func.sum(Task.price).label('total_price')
-    ).join(Project).filter(
-        Project.organization_id == org_id,
-        Task.price.isnot(None)
-    ).group_by(Task.status).all()
-    
-    price_by_status = {status.value: 0.0 for status in TaskStatus}
-    for status, price_sum in price_by_status_query:
-        price_by_status[status.value] = float(price_sum) if price_sum else 0.0
-    
-    # Price by priority
-    price_by_priority_query = db.query(
-        Task.priority,
-        func.sum(Task.price).label('total_price')
-    ).join(Project).filter(
-        Project.organization_id == org_id,
-        Task.price.isnot(None)
-    ).group_by(Task.priority).all()
-    
-    price_by_priority = {}
-    for priority, price_sum in price_by_priority_query:
-        price_by_priority[priority.value] = float(price_sum) if price_sum else 0.0
-    
-    return AnalyticsResponse(
-        total_tasks=total_tasks,
-        tasks_by_status=status_dict,
-        tasks_by_priority=priority_dict,
-        tasks_completed_today=tasks_completed_today,
-        tasks_completed_this_week=tasks_completed_this_week,
-        average_completion_time_hours=avg_completion_time,
-        tasks_overdue=tasks_overdue,
-        productivity_score=round(productivity_score, 2),
-        top_contributors=contributors,
-        total_price=round(total_price, 2),
-        price_by_status=price_by_status,
-        price_by_priority=price_by_priority
+    # "Today", "this week" and "overdue" move with the clock, so the ETag also rolls every minute
+    etag, not_modified = await check_not_modified(
+        request, db, org_id, "analytics.dashboard", ("tasks", "users"), minute_bucket()
     )
+    if not_modified:
+        return not_modified
+    set_etag(response, etag)
+    
+    # One grouping-sets scan for every count and sum, one query for top contributors
+    now = datetime.now(timezone.utc)
+    start_date = now - timedelta(days=days)
+    figures = None
+    if source == "rollups":
+        figures = await rollup_dashboard_figures(db, org_id, start_date, now)
+    if figures is None:
+        figures = await dashboard_figures(db, org_id, start_date, now)
+    
+    return AnalyticsResponse(**figures)
 
 
 @router.get("/timeseries", response_model=List[TimeSeriesData])
-def get_timeseries_analytics(
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
-    days: int = Query(30, ge=1, le=365)
+async def get_timeseries_analytics(
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db),
+    days: int = Query(30, ge=1, le=365),
+    project_id: Optional[int] = Query(None),
+    source: Literal["tasks", "rollups"] = Query("tasks")
 ):
-    """Get time series analytics - demonstrates data pipeline for time-series analysis"""
+    """Get time series analytics - demonstrates data pipeline for time-series analysis
+    
+    With source=rollups each day is read from the daily organization (or
+    project) rollups plus not-yet-folded changes, one row per day however
+    much history there is; until the rollups have been built this falls
+    back to the tasks. Rollup days are whole UTC days, so the first day of
+    the window is counted in full.
+    """
     org_id = current_user.organization_id
-    start_date = datetime.utcnow() - timedelta(days=days)
     
-    # Get daily task creation and completion counts
-    created_by_date = db.query(
-        func.date(Task.created_at).label('date'),
-        func.count(Task.id).label('count')
-    ).join(Project).filter(
-        Project.organization_id == org_id,
-        Task.created_at >= start_date
-    ).group_by(func.date(Task.created_at)).all()
-    
-    completed_by_date = db.query(
-        func.date(Task.completed_at).label('date'),
-        func.count(Task.id).label('count')
-    ).join(Project).filter(
-        Project.organization_id == org_id,
-        Task.status == TaskStatus.DONE,
-        Task.completed_at >= start_date,
-        Task.completed_at.isnot(None)
-    ).group_by(func.date(Task.completed_at)).all()
+    etag, not_modified = await check_not_modified(
+        request, db, org_id, "analytics.timeseries", ("tasks",), minute_bucket()
+    )
+    if not_modified:
+        return not_modified
+    set_etag(response, etag)
+    
+    if project_id is not None:
+        project_in_org = await db.scalar(
+            select(Project.id).where(Project.id == project_id, Project.organization_id == org_id)
+        )
+        if project_in_org is None:
+            raise HTTPException(status_code=404, detail="Project not found")
     
     # Create date range
     date_range = {}
@@ -230,6 +121,48 @@ def get_timeseries_analytics(
         date = (datetime.utcnow() - timedelta(days=i)).date()
         date_range[date] = {"created": 0, "completed": 0}
     
+    rollups = None
+    if source == "rollups":
+        rollups = await read_rollups(db, org_id, min(date_range), project_id)
+    if rollups is not None:
+        daily, _ = rollups
+        for date, measures in daily.items():
+            if date in date_range:
+                date_range[date]["created"] = int(measures.get("tasks_created", 0))
+                date_range[date]["completed"] = int(measures.get("tasks_completed", 0))
+        return [
+            TimeSeriesData(date=str(date), tasks_created=data["created"], tasks_completed=data["completed"])
+            for date, data in sorted(date_range.items())
+        ]
+    
+    start_date = datetime.now(timezone.utc) - timedelta(days=days)
+    project_filter = [Task.project_id == project_id] if project_id is not None else []
+    
+    # Get daily task creation and completion counts
+    created_by_date = (await db.execute(
+        select(
+            func.date(Task.created_at).label('date'),
+            func.count(Task.id).label('count')
+        ).where(
+            Task.organization_id == org_id,
+            Task.created_at >= start_date,
+            *project_filter
+        ).group_by(func.date(Task.created_at))
+    )).all()
+    
+    completed_by_date = (await db.execute(
+        select(
+            func.date(Task.completed_at).label('date'),
+            func.count(Task.id).label('count')
+        ).where(
+            Task.organization_id == org_id,
+            Task.status == TaskStatus.DONE,
+            Task.completed_at >= start_date,
+            Task.completed_at.isnot(None),
+            *project_filter
+        ).group_by(func.date(Task.completed_at))
+    )).all()
+    
     # Fill in data
     for date, count in created_by_date:
         if date in date_range:
@@ -1,26 +1,38 @@
 """Authentication router"""
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
-from app.database import get_db
+from app.database import get_async_db
 from app.models import User, Organization
 from app.schemas.auth import UserCreate, UserLogin, Token, UserResponse, UserUpdate, PasswordChange
 from app.utils.auth import (
-    verify_password, 
-    get_password_hash, 
+    verify_password_async,
+    get_password_hash_async,
     create_access_token,
-    get_current_active_user
+    get_current_user_record
 )
+from app.services.principal_cache import invalidate_principal
 from app.config import settings
 
 router = APIRouter()
 
 
+async def _find_user_by_email(db: AsyncSession, email: str) -> User | None:
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
+
+
+async def _slug_exists(db: AsyncSession, slug: str) -> bool:
+    result = await db.execute(select(Organization.id).where(Organization.slug == slug))
+    return result.first() is not None
+
+
 @router.post("/register", response_model=UserResponse)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new user and organization"""
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await _find_user_by_email(db, user_data.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -32,23 +44,23 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
     org_slug = org_name.lower().replace(" ", "-")[:50]
     
     # Ensure unique slug
-    existing_org = db.query(Organization).filter(Organization.slug == org_slug).first()
     counter = 1
-    while existing_org:
+    while await _slug_exists(db, org_slug):
         org_slug = f"{org_name.lower().replace(' ', '-')[:45]}-{counter}"
-        existing_org = db.query(Organization).filter(Organization.slug == org_slug).first()
         counter += 1
     
+    # Hash in the process pool before opening the write transaction
+    hashed_password = await get_password_hash_async(user_data.password)
+    
     organization = Organization(
         name=org_name,
         slug=org_slug,
         subscription_tier="free"
     )
     db.add(organization)
-    db.flush()
+    await db.flush()
     
     # Create user
-    hashed_password = get_password_hash(user_data.password)
     user = User(
         email=user_data.email,
         hashed_password=hashed_password,
@@ -57,17 +69,17 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
         is_admin=True  # First user is admin
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     
     return user
 
 
 @router.post("/login", response_model=Token)
-def login(user_data: UserLogin, db: Session = Depends(get_db)):
+async def login(user_data: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """Authenticate user and return access token"""
-    user = db.query(User).filter(User.email == user_data.email).first()
-    if not user or not verify_password(user_data.password, user.hashed_password):
+    user = await _find_user_by_email(db, user_data.email)
+    if not user or not await verify_password_async(user_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -86,35 +98,42 @@ def login(user_data: UserLogin, db: Session = Depends(get_db)):
     return {"access_token": access_token, "token_type": "bearer"}
 
 
-@router.get("/me", response_model=UserResponse)
-def get_current_user_info(current_user: User = Depends(get_current_active_user), db: Session = Depends(get_db)):
-    """Get current user information"""
+async def _build_user_response(db: AsyncSession, user: User) -> UserResponse:
     # Include organization name in response
-    org = db.query(Organization).filter(Organization.id == current_user.organization_id).first()
+    org = await db.get(Organization, user.organization_id)
     user_dict = {
-        "id": current_user.id,
-        "email": current_user.email,
-        "full_name": current_user.full_name,
-        "is_active": current_user.is_active,
-        "is_admin": current_user.is_admin,
-        "organization_id": current_user.organization_id,
+        "id": user.id,
+        "email": user.email,
+        "full_name": user.full_name,
+        "is_active": user.is_active,
+        "is_admin": user.is_admin,
+        "organization_id": user.organization_id,
         "organization_name": org.name if org else None,
     }
     return UserResponse(**user_dict)
 
 
+@router.get("/me", response_model=UserResponse)
+async def get_current_user_info(
+    current_user: User = Depends(get_current_user_record),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get current user information"""
+    return await _build_user_response(db, current_user)
+
+
 @router.patch("/me", response_model=UserResponse)
-def update_current_user(
+async def update_current_user(
     user_update: UserUpdate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_record),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update current user information"""
     update_data = user_update.model_dump(exclude_unset=True)
     
     # Check if email is being changed and if it's already taken
     if "email" in update_data and update_data["email"] != current_user.email:
-        existing_user = db.query(User).filter(User.email == update_data["email"]).first()
+        existing_user = await _find_user_by_email(db, update_data["email"])
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -125,32 +144,22 @@ def update_current_user(
     for field, value in update_data.items():
         setattr(current_user, field, value)
     
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
+    invalidate_principal(current_user.id)
     
-    # Include organization name in response
-    org = db.query(Organization).filter(Organization.id == current_user.organization_id).first()
-    user_dict = {
-        "id": current_user.id,
-        "email": current_user.email,
-        "full_name": current_user.full_name,
-        "is_active": current_user.is_active,
-        "is_admin": current_user.is_admin,
-        "organization_id": current_user.organization_id,
-        "organization_name": org.name if org else None,
-    }
-    return UserResponse(**user_dict)
+    return await _build_user_response(db, current_user)
 
 
 @router.post("/change-password")
-def change_password(
+async def change_password(
     password_data: PasswordChange,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_record),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Change user password"""
     # Verify current password
-    if not verify_password(password_data.current_password, current_user.hashed_password):
+    if not await verify_password_async(password_data.current_password, current_user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect"
@@ -164,8 +173,8 @@ def change_password(
         )
     
     # Update password
-    current_user.hashed_password = get_password_hash(password_data.new_password)
-    db.commit()
+    current_user.hashed_password = await get_password_hash_async(password_data.new_password)
+    await db.commit()
+    invalidate_principal(current_user.id)
     
     return {"message": "Password changed successfully"}
-
@@ -0,0 +1,69 @@
+"""Export router - streaming bulk export for BI"""
+from datetime import datetime, timezone
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from app.database import async_engine, replica_pool
+from app.services.export import EXPORT_FORMATS, export_filename, stream_export
+from app.utils.auth import Principal, get_current_active_user
+
+router = APIRouter()
+
+
+def accepts_gzip(request: Request) -> bool:
+    """True unless the client left gzip out of Accept-Encoding or gave it q=0"""
+    for coding in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            quality = params.strip().removeprefix("q=") or "1"
+            try:
+                return float(quality) > 0
+            except ValueError:
+                return True
+    return False
+
+
+@router.get("/{dataset}")
+async def export_dataset(
+    dataset: Literal["tasks", "activity"],
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv|parquet)$"),
+    current_user: Principal = Depends(get_current_active_user)
+):
+    """Stream every task (or activity log entry) in the organization
+    
+    Rows come from a server-side cursor and are encoded a chunk at a time,
+    so the response starts immediately and memory stays flat however large
+    the organization is. Served from a read replica when one is healthy.
+    NDJSON and CSV are gzipped when the client accepts it; Parquet is
+    already compressed per column and is sent as is.
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Only organization admins can export data")
+    
+    if format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(status_code=501, detail="Parquet export is not available on this server")
+    
+    gzip = format != "parquet" and accepts_gzip(request)
+    replica = replica_pool.choose() if replica_pool.replicas else None
+    engine = replica.engine if replica else async_engine
+    
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    filename = export_filename(dataset, current_user.organization_id, format, False, stamp)
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Vary": "Accept-Encoding",
+    }
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    
+    return StreamingResponse(
+        stream_export(engine, current_user.organization_id, dataset, format, gzip=gzip),
+        media_type=EXPORT_FORMATS[format][0],
+        headers=headers
+    )
@@ -1,15 +1,16 @@
 """Google OAuth authentication router"""
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.responses import RedirectResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 import httpx
 import json
 from urllib.parse import urlencode
-from app.database import get_db
+from app.database import get_async_db
 from app.models import User, Organization
 from app.schemas.auth import Token, UserResponse
-from app.utils.auth import create_access_token, get_current_active_user
+from app.utils.auth import create_access_token, get_current_user_record
 from app.config import settings
 
 router = APIRouter()
@@ -38,7 +39,7 @@ async def google_login():
 
 
 @router.get("/google/callback")
-async def google_callback(code: str, db: Session = Depends(get_db)):
+async def google_callback(code: str, db: AsyncSession = Depends(get_async_db)):
     """Handle Google OAuth callback"""
     if not settings.GOOGLE_CLIENT_ID or not settings.GOOGLE_CLIENT_SECRET:
         raise HTTPException(
@@ -79,7 +80,8 @@ async def google_callback(code: str, db: Session = Depends(get_db)):
         picture = google_user.get("picture", "")
         
         # Find or create user
-        user = db.query(User).filter(User.email == email).first()
+        result = await db.execute(select(User).where(User.email == email))
+        user = result.scalars().first()
         
         if not user:
             # Create organization for new user
@@ -87,11 +89,13 @@ async def google_callback(code: str, db: Session = Depends(get_db)):
             org_slug = org_name.lower().replace(" ", "-")[:50]
             
             # Ensure unique slug
-            existing_org = db.query(Organization).filter(Organization.slug == org_slug).first()
+            slug_query = select(Organization.id).where(Organization.slug == org_slug)
+            existing_org = (await db.execute(slug_query)).first()
             counter = 1
             while existing_org:
                 org_slug = f"{org_name.lower().replace(' ', '-')[:45]}-{counter}"
-                existing_org = db.query(Organization).filter(Organization.slug == org_slug).first()
+                slug_query = select(Organization.id).where(Organization.slug == org_slug)
+                existing_org = (await db.execute(slug_query)).first()
                 counter += 1
             
             organization = Organization(
@@ -100,7 +104,7 @@ async def google_callback(code: str, db: Session = Depends(get_db)):
                 subscription_tier="free"
             )
             db.add(organization)
-            db.flush()
+            await db.flush()
             
             # Create user
             user = User(
@@ -112,8 +116,8 @@ async def google_callback(code: str, db: Session = Depends(get_db)):
                 is_active=True,
             )
             db.add(user)
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            await db.refresh(user)
         
         # Generate JWT token
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -140,7 +144,7 @@ async def google_callback(code: str, db: Session = Depends(get_db)):
 
 
 @router.get("/google/user", response_model=UserResponse)
-async def get_google_user(current_user: User = Depends(get_current_active_user)):
+async def get_google_user(current_user: User = Depends(get_current_user_record)):
     """Get current authenticated user (works with Google OAuth)"""
     return current_user
 
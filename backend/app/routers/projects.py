@@ -1,14 +1,21 @@
 """Projects router"""
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from pydantic import BaseModel
-from app.database import get_db
-from app.models import Project, Organization, User
-from app.utils.auth import get_current_active_user
+from app.database import get_async_db, get_read_db
+from app.models import Project
+from app.utils.auth import Principal, get_current_active_user
+from app.utils.pagination import Keyset, set_next_cursor
+from app.services.etags import check_not_modified, set_etag
+from app.services.usage import lock_organization_quota
 
 router = APIRouter()
 
+PROJECT_ORDER = Keyset("created_at", Project.created_at, Project.id)
+
 
 class ProjectCreate(BaseModel):
     name: str
@@ -36,16 +43,16 @@ class ProjectResponse(BaseModel):
 
 
 @router.post("", response_model=ProjectResponse)
-def create_project(
+async def create_project(
     project_data: ProjectCreate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new project"""
-    # Check organization limits
-    org = db.query(Organization).filter(Organization.id == current_user.organization_id).first()
-    project_count = db.query(Project).filter(Project.organization_id == current_user.organization_id).count()
-    if project_count >= org.max_projects:
+    # Check organization limits; the organization row stays locked until
+    # commit so concurrent creates cannot overshoot the quota
+    org = await lock_organization_quota(db, current_user.organization_id)
+    if org.project_count >= org.max_projects:
         raise HTTPException(
             status_code=403,
             detail=f"Project limit reached ({org.max_projects} projects)"
@@ -57,37 +64,62 @@ def create_project(
         owner_id=current_user.id
     )
     db.add(project)
-    db.commit()
-    db.refresh(project)
+    await db.commit()
+    await db.refresh(project)
     
     return project
 
 
-@router.get("", response_model=List[ProjectResponse])
-def get_projects(
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+@router.get("", response_model=List[ProjectResponse], response_class=ORJSONResponse)
+async def get_projects(
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = Query(None)
 ):
-    """Get all projects for organization"""
-    projects = db.query(Project).filter(
-        Project.organization_id == current_user.organization_id,
-        Project.is_active == True
-    ).all()
+    """Get all projects for organization
+    
+    Without `limit` every active project is returned; with it, pages are
+    chained through the X-Next-Cursor response header.
+    """
+    etag, not_modified = await check_not_modified(
+        request, db, current_user.organization_id, "projects.list", ("projects",)
+    )
+    if not_modified:
+        return not_modified
+    
+    query = PROJECT_ORDER.apply(
+        select(Project).where(
+            Project.organization_id == current_user.organization_id,
+            Project.is_active == True
+        ),
+        cursor,
+        limit
+    )
+    result = await db.execute(query)
+    projects, next_cursor = PROJECT_ORDER.page(result.scalars().all(), limit)
+    set_next_cursor(response, next_cursor)
+    set_etag(response, etag)
     
     return projects
 
 
 @router.get("/{project_id}", response_model=ProjectResponse)
-def get_project(
+async def get_project(
     project_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific project"""
-    project = db.query(Project).filter(
-        Project.id == project_id,
-        Project.organization_id == current_user.organization_id
-    ).first()
+    result = await db.execute(
+        select(Project).where(
+            Project.id == project_id,
+            Project.organization_id == current_user.organization_id
+        )
+    )
+    project = result.scalars().first()
     
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -96,17 +128,20 @@ def get_project(
 
 
 @router.patch("/{project_id}", response_model=ProjectResponse)
-def update_project(
+async def update_project(
     project_id: int,
     project_update: ProjectUpdate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a project"""
-    project = db.query(Project).filter(
-        Project.id == project_id,
-        Project.organization_id == current_user.organization_id
-    ).first()
+    result = await db.execute(
+        select(Project).where(
+            Project.id == project_id,
+            Project.organization_id == current_user.organization_id
+        )
+    )
+    project = result.scalars().first()
     
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -116,30 +151,33 @@ def update_project(
     for field, value in update_data.items():
         setattr(project, field, value)
     
-    db.commit()
-    db.refresh(project)
+    await db.commit()
+    await db.refresh(project)
     
     return project
 
 
 @router.delete("/{project_id}")
-def delete_project(
+async def delete_project(
     project_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a project (soft delete by setting is_active to False)"""
-    project = db.query(Project).filter(
-        Project.id == project_id,
-        Project.organization_id == current_user.organization_id
-    ).first()
+    result = await db.execute(
+        select(Project).where(
+            Project.id == project_id,
+            Project.organization_id == current_user.organization_id
+        )
+    )
+    project = result.scalars().first()
     
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
     # Soft delete by setting is_active to False
     project.is_active = False
-    db.commit()
+    await db.commit()
     
     return {"message": "Project deleted successfully"}
 
@@ -1,10 +1,10 @@
 """Subscription router - SaaS subscription management"""
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
-from app.database import get_db
-from app.models import Organization, User
-from app.utils.auth import get_current_active_user
+from app.database import get_async_db
+from app.models import Organization
+from app.utils.auth import Principal, get_current_active_user
 
 router = APIRouter()
 
@@ -20,27 +20,23 @@ class SubscriptionResponse(BaseModel):
 
 
 @router.get("", response_model=SubscriptionResponse)
-def get_subscription(
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+async def get_subscription(
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get organization subscription details"""
-    org = db.query(Organization).filter(Organization.id == current_user.organization_id).first()
+    org = await db.get(Organization, current_user.organization_id)
     if not org:
         raise HTTPException(status_code=404, detail="Organization not found")
     
-    # Get current usage
-    current_users = db.query(User).filter(User.organization_id == org.id).count()
-    from app.models import Project
-    current_projects = db.query(Project).filter(Project.organization_id == org.id).count()
-    
     return SubscriptionResponse(
         tier=org.subscription_tier.value,
         status=org.subscription_status,
         max_users=org.max_users,
         max_projects=org.max_projects,
         max_tasks_per_project=org.max_tasks_per_project,
-        current_users=current_users,
-        current_projects=current_projects
+        # Usage counters are maintained by triggers on users and projects
+        current_users=org.user_count,
+        current_projects=org.project_count
     )
 
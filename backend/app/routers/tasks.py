@@ -1,56 +1,73 @@
 """Tasks router"""
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+import asyncio
+import os
+import tempfile
+from fastapi import (
+    APIRouter, BackgroundTasks, Depends, File, HTTPException, status, Header, Query, Request, Response, UploadFile
+)
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select, func, insert, update, delete, literal_column, or_, text, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 from typing import List, Optional
-from datetime import datetime
-from app.database import get_db
-from app.models import Task, Project, User, Organization, TaskActivityLog, TaskStatus
-from app.schemas.task import TaskCreate, TaskUpdate, TaskResponse, TaskWithDetails
-from app.utils.auth import get_current_active_user
-from app.services.activity_logger import log_task_activity
+from datetime import datetime, timezone
+from app.database import get_async_db, get_read_db
+from app.models import (
+    Task, Project, User, TaskActivityLog, TaskComment, TaskStatus, TaskTombstone
+)
+from app.schemas.task import (
+    TaskCreate, TaskUpdate, TaskResponse, TaskWithDetails, TaskActivityResponse,
+    TaskBatchRequest, TaskBatchResponse, TaskBatchResult, TaskLayoutRequest, TaskChangesResponse,
+    TaskSearchResult, TagCount, TaskHistoryEntry
+)
+from app.utils.auth import Principal, get_current_active_user
+from app.utils.pagination import Keyset, set_next_cursor, next_cursor_headers
+from app.utils.serialization import TASK_COLUMNS, task_to_dict, task_row_to_dict, task_details_row_to_dict
+from app.services.activity_logger import log_task_activities
+from app.services.activity_buffer import activity_buffer
+from app.services.layout_coalescer import LAYOUT_FIELDS, layout_coalescer
+from app.services.etags import check_not_modified, etag_headers, set_etag
+from app.services.task_search import prefix_tsquery, full_text_query, fuzzy_query
+from app.services.usage import lock_project_quotas
+from app.services.task_import import IMPORT_FORMATS, ImportJob, load_job, publish_job, run_import
+from app.services.task_history import (
+    apply_entry, decode_task_state, encode_task_diff, encode_task_state, rebuild_task_state
+)
 
 router = APIRouter()
 
+TASK_SORTS = {
+    "created_at": Keyset("created_at", Task.created_at, Task.id),
+    "-created_at": Keyset("-created_at", Task.created_at, Task.id, descending=True),
+}
 
-def safe_get_is_archived(task: Task) -> bool:
-    """Safely get is_archived value, returning False if column doesn't exist"""
-    try:
-        return getattr(task, 'is_archived', False)
-    except Exception:
-        return False
-
-
-def check_organization_access(user: User, project_id: int, db: Session) -> Project:
-    """Verify user has access to project"""
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    
-    if project.organization_id != user.organization_id:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
-    return project
+ACTIVITY_ORDER = Keyset("-created_at", TaskActivityLog.created_at, TaskActivityLog.id, descending=True)
+# Commit order; see app.services.task_history
+HISTORY_ORDER = Keyset("-task_version", TaskActivityLog.task_version, TaskActivityLog.id, descending=True)
 
 
 @router.post("", response_model=TaskResponse)
-def create_task(
+async def create_task(
     task_data: TaskCreate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new task"""
-    # Verify project access
-    project = check_organization_access(current_user, task_data.project_id, db)
-    
-    # Check organization limits (if org exists and has limits set)
-    org = db.query(Organization).filter(Organization.id == current_user.organization_id).first()
-    if org and org.max_tasks_per_project is not None:
-        task_count = db.query(Task).join(Project).filter(Project.id == task_data.project_id).count()
-        if task_count >= org.max_tasks_per_project:
-            raise HTTPException(
-                status_code=403,
-                detail=f"Task limit reached ({org.max_tasks_per_project} tasks per project)"
-            )
+    # Verify project access and check the task limit; the project row stays
+    # locked until commit so concurrent creates cannot overshoot the quota
+    quotas = await lock_project_quotas(db, [task_data.project_id])
+    if task_data.project_id not in quotas:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    organization_id, task_count, max_tasks = quotas[task_data.project_id]
+    if organization_id != current_user.organization_id:
+        raise HTTPException(status_code=403, detail="Access denied")
+    
+    if max_tasks is not None and task_count >= max_tasks:
+        raise HTTPException(
+            status_code=403,
+            detail=f"Task limit reached ({max_tasks} tasks per project)"
+        )
     
     # Prepare task data, ensuring tags is a list
     task_dict = task_data.model_dump(exclude={"project_id"})
@@ -65,13 +82,14 @@ def create_task(
         task = Task(
             **task_dict,
             project_id=task_data.project_id,
+            organization_id=organization_id,
             created_by_id=current_user.id
         )
         db.add(task)
-        db.commit()
-        db.refresh(task)
+        await db.commit()
+        await db.refresh(task)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         import logging
         import traceback
         error_msg = f"Failed to create task: {str(e)}\n{traceback.format_exc()}"
@@ -82,258 +100,744 @@ def create_task(
             detail=f"Failed to create task: {str(e)}"
         )
     
-    # Log activity (in a separate transaction to avoid blocking)
+    # Log activity (queued; written in batches by the activity buffer)
     try:
-        log_task_activity(db, task.id, current_user.id, "created", None, task_data.model_dump())
+        await activity_buffer.enqueue([activity_buffer.entry(
+            current_user.id, task.id, organization_id, task.project_id,
+            "created", None, encode_task_state(task_to_dict(task)), task.version
+        )])
     except Exception as e:
         # Log error but don't fail task creation
         import logging
         logging.error(f"Failed to log task activity: {e}")
     
-    # Build TaskResponse - Access all attributes while session is still active
-    # Convert SQLAlchemy Numeric types to float for JSON serialization
-    import logging
-    import traceback
-    
-    # Helper function to safely convert Numeric to float
-    def safe_float(value):
-        if value is None:
-            return None
+    return task_to_dict(task)
+
+
+class BatchItemError(Exception):
+    """A single batch operation was rejected; the rest of the batch still applies"""
+
+
+@router.post("/batch", response_model=TaskBatchResponse)
+async def batch_tasks(
+    batch: TaskBatchRequest,
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Apply many create/update/archive/delete operations in one transaction
+    
+    Tenancy is checked with one query for the referenced tasks and one for the
+    referenced projects; writes go out as bulk INSERT/UPDATE/DELETE statements
+    and the audit trail as one multi-row insert. Operations that fail
+    validation are reported per item and skipped; everything else commits
+    together.
+    """
+    operations = batch.operations
+    org_id = current_user.organization_id
+    
+    # Current state of every referenced task in this organization (one query).
+    # When any update carries expected_version the rows are locked, so the
+    # versions checked below still hold when the bulk UPDATE runs.
+    task_ids = {op.id for op in operations if op.op != "create"}
+    state = {}
+    if task_ids:
+        query = select(*TASK_COLUMNS).where(Task.id.in_(task_ids), Task.organization_id == org_id)
+        if any(op.op == "update" and op.data.expected_version is not None for op in operations):
+            query = query.order_by(Task.id).with_for_update(key_share=True)
+        result = await db.execute(query)
+        state = {row.id: row._asdict() for row in result}
+    
+    # Referenced projects in this organization with their task counts (one
+    # query); the rows stay locked until commit so the quota check holds
+    project_ids = {op.data.project_id for op in operations if op.op == "create"}
+    project_counts = {}
+    max_tasks = None
+    if project_ids:
+        quotas = await lock_project_quotas(db, project_ids)
+        for project_id, (organization_id, task_count, limit) in quotas.items():
+            if organization_id == org_id:
+                project_counts[project_id] = task_count
+                max_tasks = limit
+    
+    results: List[TaskBatchResult] = []
+    creates = []  # (result index, insert values)
+    updates = {}  # task id -> merged column values
+    deletes = set()
+    activity = []  # (task id, entry); entries for created tasks are added once ids are known
+    
+    for index, op in enumerate(operations):
         try:
-            return float(value)
-        except (TypeError, ValueError):
-            return None
+            if op.op == "create":
+                if op.data.project_id not in project_counts:
+                    raise BatchItemError("Project not found")
+                if max_tasks is not None and project_counts[op.data.project_id] >= max_tasks:
+                    raise BatchItemError(f"Task limit reached ({max_tasks} tasks per project)")
+                project_counts[op.data.project_id] += 1
+                
+                values = op.data.model_dump()
+                values["tags"] = values["tags"] or []
+                values.update(organization_id=org_id, created_by_id=current_user.id)
+                creates.append((index, values))
+                results.append(TaskBatchResult(index=index, op=op.op, ok=True))
+                continue
+            
+            task = state.get(op.id)
+            if task is None or op.id in deletes:
+                raise BatchItemError("Task not found")
+            
+            if op.op == "delete":
+                deletes.add(op.id)
+                updates.pop(op.id, None)
+            else:
+                if op.op == "archive":
+                    changes = {"is_archived": True}
+                else:
+                    expected_version = op.data.expected_version
+                    if expected_version is not None and task["version"] != expected_version:
+                        raise BatchItemError(f"Version conflict (current version {task['version']})")
+                    changes = op.data.model_dump(exclude_unset=True, exclude={"expected_version"})
+                    if "status" in changes:
+                        if changes["status"] == TaskStatus.DONE and task["status"] != TaskStatus.DONE:
+                            changes["completed_at"] = datetime.now(timezone.utc)
+                        elif changes["status"] != TaskStatus.DONE:
+                            changes["completed_at"] = None
+                
+                # Later operations on the same task win, as if applied one by one
+                old_value, new_value = encode_task_diff(task, changes)
+                updates.setdefault(op.id, {}).update(changes)
+                task.update({k: v for k, v in changes.items() if k in task})
+                # Mirror the version trigger so a later op in this batch can expect it
+                if set(changes) - set(LAYOUT_FIELDS):
+                    task["version"] += 1
+                if new_value:
+                    activity.append((op.id, {
+                        "task_id": op.id,
+                        "organization_id": org_id,
+                        "project_id": task["project_id"],
+                        "action": "archived" if op.op == "archive" else "updated",
+                        "old_value": old_value,
+                        "new_value": new_value,
+                    }))
+            results.append(TaskBatchResult(index=index, op=op.op, id=op.id, ok=True))
+        except BatchItemError as e:
+            results.append(TaskBatchResult(index=index, op=op.op, id=getattr(op, "id", None), ok=False, error=str(e)))
     
     try:
-        # Access all task attributes while the session is active
-        # This ensures we don't have lazy loading issues
-        task_response = {
-            "id": int(task.id),
-            "title": str(task.title),
-            "description": task.description if task.description else None,
-            "status": task.status,
-            "priority": task.priority,
-            "project_id": int(task.project_id),
-            "assignee_id": int(task.assignee_id) if task.assignee_id else None,
-            "created_by_id": int(task.created_by_id),
-            "due_date": task.due_date,
-            "completed_at": task.completed_at,
-            "estimated_hours": safe_float(task.estimated_hours),
-            "actual_hours": safe_float(task.actual_hours),
-            "price": safe_float(task.price),
-            "tags": list(task.tags) if task.tags else [],
-            "position_x": safe_float(task.position_x),
-            "position_y": safe_float(task.position_y),
-            "box_width": safe_float(task.box_width),
-            "box_height": safe_float(task.box_height),
-            "is_archived": safe_get_is_archived(task),
-            "created_at": task.created_at,
-            "updated_at": task.updated_at,
-        }
-        response_obj = TaskResponse(**task_response)
-        return response_obj
-    except Exception as e:
-        error_msg = f"Failed to build task response: {str(e)}\n{traceback.format_exc()}"
-        logging.error(error_msg)
-        print(error_msg)  # Also print to stdout for docker logs
+        if creates:
+            # Every create dumps the full TaskCreate, so all rows share one key set;
+            # the returned rows carry the column defaults for the creation entries
+            inserted = await db.execute(
+                insert(Task).returning(*TASK_COLUMNS, sort_by_parameter_order=True),
+                [values for _, values in creates]
+            )
+            for (index, values), row in zip(creates, inserted.all()):
+                created = task_row_to_dict(row)
+                results[index].id = created["id"]
+                activity.append((created["id"], {
+                    "task_id": created["id"],
+                    "organization_id": org_id,
+                    "project_id": values["project_id"],
+                    "action": "created",
+                    "old_value": None,
+                    "new_value": encode_task_state(created),
+                    "task_version": created["version"],
+                }))
         
-        # Fallback: Try to use model_validate (from_attributes is set in Config)
-        try:
-            # In Pydantic v2, model_validate uses from_attributes from Config class
-            response_obj = TaskResponse.model_validate(task)
-            return response_obj
-        except Exception as validate_error:
-            validate_error_msg = f"model_validate also failed: {str(validate_error)}\n{traceback.format_exc()}"
-            logging.error(validate_error_msg)
-            print(validate_error_msg)
-            # Last resort: Create a minimal response with essential fields
-            # The task was created successfully, so we must return a valid response
-            try:
-                return TaskResponse(
-                    id=int(task.id),
-                    title=str(task.title),
-                    description=task.description if task.description else None,
-                    status=task.status,
-                    priority=task.priority,
-                    project_id=int(task.project_id),
-                    assignee_id=int(task.assignee_id) if task.assignee_id else None,
-                    created_by_id=int(task.created_by_id),
-                    due_date=task.due_date,
-                    completed_at=task.completed_at,
-                    estimated_hours=safe_float(task.estimated_hours),
-                    actual_hours=safe_float(task.actual_hours),
-                    price=safe_float(task.price),
-                    tags=list(task.tags) if task.tags else [],
-                    position_x=safe_float(task.position_x),
-                    position_y=safe_float(task.position_y),
-                    box_width=safe_float(task.box_width),
-                    box_height=safe_float(task.box_height),
-                    is_archived=safe_get_is_archived(task),
-                    created_at=task.created_at,
-                    updated_at=task.updated_at,
-                )
-            except Exception as final_error:
-                # If even minimal response fails, log and raise - this is unexpected
-                final_error_msg = f"Complete failure in response building: {str(final_error)}\n{traceback.format_exc()}"
-                logging.error(final_error_msg)
-                print(final_error_msg)
-                # Task was created, but we can't build a response - this is a critical error
-                # Return a basic response with minimal fields
-                return TaskResponse(
-                    id=int(task.id),
-                    title=str(task.title),
-                    description=None,
-                    status=task.status,
-                    priority=task.priority,
-                    project_id=int(task.project_id),
-                    assignee_id=None,
-                    created_by_id=int(task.created_by_id),
-                    due_date=None,
-                    completed_at=None,
-                    estimated_hours=None,
-                    actual_hours=None,
-                    price=None,
-                    tags=[],
-                    position_x=None,
-                    position_y=None,
-                    box_width=None,
-                    box_height=None,
-                    is_archived=safe_get_is_archived(task),
-                    created_at=task.created_at,
-                    updated_at=None,
-                )
-
-
-@router.get("", response_model=List[TaskWithDetails])
-def get_tasks(
+        # Group by changed columns so each group is one executemany UPDATE by primary key
+        by_columns = {}
+        for task_id, changes in updates.items():
+            by_columns.setdefault(tuple(sorted(changes)), []).append({"id": task_id, **changes})
+        for rows in by_columns.values():
+            await db.execute(update(Task), rows)
+        
+        if deletes:
+            await db.execute(delete(TaskComment).where(TaskComment.task_id.in_(deletes)))
+            await db.execute(delete(TaskActivityLog).where(TaskActivityLog.task_id.in_(deletes)))
+            await db.execute(
+                delete(Task).where(Task.id.in_(deletes)).execution_options(synchronize_session=False)
+            )
+        
+        # The UPDATEs hold the rows until commit, so these are the versions being committed
+        versions = {}
+        if updates:
+            result = await db.execute(select(Task.id, Task.version).where(Task.id.in_(updates)))
+            versions = dict(result.all())
+        for task_id, entry in activity:
+            entry.setdefault("task_version", versions.get(task_id, 0))
+        
+        await log_task_activities(
+            db, [entry for task_id, entry in activity if task_id not in deletes], current_user.id
+        )
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        import logging
+        logging.error(f"Failed to apply task batch: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to apply task batch: {str(e)}")
+    
+    succeeded = sum(1 for r in results if r.ok)
+    return TaskBatchResponse(results=results, succeeded=succeeded, failed=len(results) - succeeded)
+
+
+@router.patch("/layout", status_code=status.HTTP_202_ACCEPTED)
+async def update_layout(
+    layout: TaskLayoutRequest,
+    current_user: Principal = Depends(get_current_active_user)
+):
+    """Queue board geometry changes (drag/resize)
+    
+    Changes are coalesced per task and written in batches shortly after; no
+    activity or analytics rows are recorded for geometry. Tasks outside the
+    caller's organization are silently ignored at flush time.
+    """
+    for change in layout.changes:
+        layout_coalescer.submit(
+            current_user.organization_id,
+            change.task_id,
+            change.model_dump(exclude={"task_id"}, exclude_none=True)
+        )
+    return {"accepted": len(layout.changes)}
+
+
+async def run_import_file(path: str, fmt: str, job: ImportJob) -> None:
+    """Background import of a spooled upload; the file is removed afterwards"""
+    try:
+        await run_import(path, fmt, job)
+    finally:
+        await asyncio.to_thread(os.unlink, path)
+
+
+@router.post("/import", status_code=status.HTTP_202_ACCEPTED)
+async def import_tasks(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$", description="Defaults to the file extension"),
+    current_user: Principal = Depends(get_current_active_user)
+):
+    """Import tasks from a CSV or NDJSON file
+    
+    Columns: title, project_id (required), description, status, priority,
+    assignee_email, due_date, estimated_hours, price, tags. The upload is
+    spooled to disk and imported in the background through COPY; poll
+    GET /tasks/import/{job_id} for progress. The import lands in one
+    transaction, and rejected rows are reported by line number.
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Only organization admins can import tasks")
+    
+    filename = file.filename or "upload"
+    fmt = format or filename.rsplit(".", 1)[-1].lower()
+    if fmt == "jsonl":
+        fmt = "ndjson"
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Upload a .csv or .ndjson file, or pass format")
+    
+    # Spool the upload: the request body is gone once the response is sent
+    spooled = await asyncio.to_thread(
+        tempfile.NamedTemporaryFile, prefix="task-import-", suffix=f".{fmt}", delete=False
+    )
+    try:
+        while chunk := await file.read(1024 * 1024):
+            await asyncio.to_thread(spooled.write, chunk)
+    finally:
+        await asyncio.to_thread(spooled.close)
+    
+    job = ImportJob(current_user.organization_id, current_user.id, filename, on_progress=publish_job)
+    await job.update(status="queued")
+    background_tasks.add_task(run_import_file, spooled.name, fmt, job)
+    return job.to_dict()
+
+
+@router.get("/import/{job_id}")
+async def get_import_job(
+    job_id: str,
+    current_user: Principal = Depends(get_current_active_user)
+):
+    """Progress or outcome of a task import"""
+    job = await load_job(job_id)
+    if not job or job["organization_id"] != current_user.organization_id:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
+
+
+def split_tags(value: str) -> List[str]:
+    """'a, b,,c' -> ['a', 'b', 'c']"""
+    return [t.strip() for t in value.split(",") if t.strip()]
+
+
+def task_details_query():
+    """Select task columns plus assignee/creator names and project name in one statement"""
+    assignee = aliased(User)
+    creator = aliased(User)
+    return (
+        select(
+            *TASK_COLUMNS,
+            func.coalesce(assignee.full_name, assignee.email),
+            func.coalesce(creator.full_name, creator.email),
+            Project.name,
+        )
+        .outerjoin(assignee, assignee.id == Task.assignee_id)
+        .outerjoin(creator, creator.id == Task.created_by_id)
+        .outerjoin(Project, Project.id == Task.project_id)
+    )
+
+
+@router.get("", response_model=List[TaskWithDetails], response_class=ORJSONResponse)
+async def get_tasks(
+    request: Request,
     project_id: Optional[int] = Query(None),
     status: Optional[TaskStatus] = Query(None),
     assignee_id: Optional[int] = Query(None),
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    tag: Optional[str] = Query(None),
+    tags_any: Optional[str] = Query(None, description="Comma-separated; task has at least one"),
+    tags_all: Optional[str] = Query(None, description="Comma-separated; task has every one"),
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db),
     skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=500)
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None),
+    sort: str = Query("-created_at", pattern="^-?created_at$")
 ):
-    """Get tasks with filtering (excludes archived tasks)"""
-    query = db.query(Task).join(Project).filter(
-        Project.organization_id == current_user.organization_id,
+    """Get tasks with filtering (excludes archived tasks)
+    
+    Pass the X-Next-Cursor response header back as `cursor` for the next page.
+    `skip` is still honoured for callers that have not moved to cursors.
+    """
+    etag, not_modified = await check_not_modified(
+        request, db, current_user.organization_id, "tasks.list", ("tasks", "projects", "users")
+    )
+    if not_modified:
+        return not_modified
+    
+    # One statement: related names are joined in rather than loaded per task
+    query = task_details_query().where(
+        Task.organization_id == current_user.organization_id,
         Task.is_archived == False  # Filter out archived tasks
     )
     
     if project_id:
-        query = query.filter(Task.project_id == project_id)
+        query = query.where(Task.project_id == project_id)
     
     if status:
-        query = query.filter(Task.status == status)
+        query = query.where(Task.status == status)
     
     if assignee_id:
-        query = query.filter(Task.assignee_id == assignee_id)
-    
-    tasks = query.offset(skip).limit(limit).all()
-    
-    # Enrich with details
-    result = []
-    for task in tasks:
-        # Build the response data manually
-        task_dict = {
-            "id": task.id,
-            "title": task.title,
-            "description": task.description,
-            "status": task.status,
-            "priority": task.priority,
-            "project_id": task.project_id,
-            "assignee_id": task.assignee_id,
-            "created_by_id": task.created_by_id,
-            "due_date": task.due_date,
-            "completed_at": task.completed_at,
-            "estimated_hours": float(task.estimated_hours) if task.estimated_hours else None,
-            "actual_hours": float(task.actual_hours) if task.actual_hours else None,
-            "price": float(task.price) if task.price else None,
-            "tags": task.tags if task.tags else [],
-            "position_x": float(task.position_x) if task.position_x else None,
-            "position_y": float(task.position_y) if task.position_y else None,
-            "box_width": float(task.box_width) if task.box_width else None,
-            "box_height": float(task.box_height) if task.box_height else None,
-            "is_archived": safe_get_is_archived(task),
-            "created_at": task.created_at,
-            "updated_at": task.updated_at,
-            "assignee_name": task.assignee.full_name or task.assignee.email if task.assignee else None,
-            "creator_name": task.creator.full_name or task.creator.email if task.creator else None,
-            "project_name": task.project.name if task.project else "",
-        }
-        result.append(TaskWithDetails(**task_dict))
-    
-    return result
+        query = query.where(Task.assignee_id == assignee_id)
+    
+    # Containment (@>) is the operator the jsonb_path_ops GIN index serves
+    if tag:
+        query = query.where(Task.tags.contains([tag]))
+    
+    if tags_all:
+        query = query.where(Task.tags.contains(split_tags(tags_all)))
+    
+    if tags_any and split_tags(tags_any):
+        query = query.where(or_(*(Task.tags.contains([t]) for t in split_tags(tags_any))))
+    
+    keyset = TASK_SORTS[sort]
+    query = keyset.apply(query, cursor, limit)
+    if skip and not cursor:
+        query = query.offset(skip)
+    
+    result = await db.execute(query)
+    rows, next_cursor = keyset.page(result.all(), limit)
+    return ORJSONResponse(
+        [task_details_row_to_dict(row) for row in rows],
+        headers={**next_cursor_headers(next_cursor), **etag_headers(etag)}
+    )
+
+
+@router.get("/tags", response_model=List[TagCount], response_class=ORJSONResponse)
+async def get_tag_counts(
+    request: Request,
+    project_id: Optional[int] = Query(None),
+    include_archived: bool = Query(False),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Tag usage counts for the organization or one project, most used first"""
+    etag, not_modified = await check_not_modified(
+        request, db, current_user.organization_id, "tasks.tags", ("tasks",)
+    )
+    if not_modified:
+        return not_modified
+    
+    tag = func.jsonb_array_elements_text(Task.tags).table_valued("value").alias("tag")
+    task_count = func.count().label("count")
+    query = select(tag.c.value, task_count).select_from(Task).join(tag, true()).where(
+        Task.organization_id == current_user.organization_id
+    )
+    if project_id:
+        query = query.where(Task.project_id == project_id)
+    if not include_archived:
+        query = query.where(Task.is_archived == False)
+    
+    result = await db.execute(
+        query.group_by(tag.c.value).order_by(task_count.desc(), tag.c.value).limit(limit)
+    )
+    return ORJSONResponse(
+        [{"tag": value, "count": count} for value, count in result],
+        headers=etag_headers(etag)
+    )
+
+
+@router.get("/search", response_model=List[TaskSearchResult], response_class=ORJSONResponse)
+async def search_tasks(
+    q: str = Query(..., min_length=1, max_length=200),
+    project_id: Optional[int] = Query(None),
+    include_archived: bool = Query(False),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=1000),
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Search task titles, descriptions and tags
+    
+    Terms are prefix-matched and results ranked by relevance. When nothing
+    matches, titles are searched by trigram similarity so typos still find
+    the task; each result says which kind of `match` produced it.
+    """
+    org_id = current_user.organization_id
+    rows, match = [], "full_text"
+    has_text_matches = False
+    
+    tsquery = prefix_tsquery(q)
+    if tsquery:
+        query = full_text_query(org_id, tsquery, include_archived)
+        if project_id:
+            query = query.where(Task.project_id == project_id)
+        rows = (await db.execute(query.offset(offset).limit(limit))).all()
+        # Past the last page of real matches is an empty page, not a reason to go fuzzy
+        has_text_matches = bool(rows) or (
+            offset > 0 and (await db.execute(query.limit(1))).first() is not None
+        )
+    
+    if not has_text_matches:
+        match = "fuzzy"
+        query = fuzzy_query(org_id, q, include_archived)
+        if project_id:
+            query = query.where(Task.project_id == project_id)
+        rows = (await db.execute(query.offset(offset).limit(limit))).all()
+    
+    return ORJSONResponse([
+        {**task_row_to_dict(row), "rank": float(row.rank), "match": match}
+        for row in rows
+    ])
+
+
+# Transactions below this have all finished: no change with a lower change_txid can still appear
+CHANGE_HORIZON_SQL = "SELECT pg_snapshot_xmin(pg_current_snapshot())::text"
+
+
+def parse_change_cursor(cursor: str):
+    """'<txid>.<seq>.<floor>' -> ints; None for anything else (including pre-0015 integer cursors)
+    
+    (txid, seq) is the last change read. floor is the transaction from which
+    the client needs deletions: where its full sync started, or txid itself.
+    """
+    parts = cursor.split(".")
+    if len(parts) != 3 or not all(part.isdigit() for part in parts):
+        return None
+    return tuple(int(part) for part in parts)
+
+
+@router.get("/changes", response_model=TaskChangesResponse, response_class=ORJSONResponse)
+async def get_task_changes(
+    since: Optional[str] = Query(None, max_length=80),
+    limit: int = Query(500, ge=1, le=2000),
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Tasks created, updated, archived or deleted after a change cursor
+    
+    Omit `since` for a full sync, then pass the returned `cursor` back as
+    `since`; keep paging while `has_more` is true. Cursors older than the
+    compacted tombstone horizon get 410 and must do a full sync again.
+    
+    Changes are ordered by (writing transaction, sequence) and only served
+    once every older transaction has finished, so a slow writer can never
+    commit a change behind a cursor already handed out.
+    """
+    org_id = current_user.organization_id
+    horizon = int((await db.execute(text(CHANGE_HORIZON_SQL))).scalar())
+    
+    after, floor = (0, 0), horizon
+    if since is not None:
+        cursor = parse_change_cursor(since)
+        compacted = (await db.execute(
+            text("SELECT tombstones_compacted_txid::text FROM org_change_counters WHERE organization_id = :org_id"),
+            {"org_id": org_id}
+        )).scalar()
+        if cursor is None or (compacted is not None and int(compacted) >= cursor[2]):
+            raise HTTPException(status_code=410, detail="Sync cursor expired, full sync required")
+        after, floor = cursor[:2], cursor[2]
+    
+    window = {"org_id": org_id, "after_txid": str(after[0]), "after_seq": after[1], "horizon": str(horizon)}
+    change_key = (
+        "(change_txid, change_seq) > (CAST(CAST(:after_txid AS text) AS xid8), :after_seq)"
+        " AND change_txid < CAST(CAST(:horizon AS text) AS xid8)"
+    )
+    task_rows = (await db.execute(
+        select(*TASK_COLUMNS, literal_column("tasks.change_txid::text").label("change_txid")).where(
+            Task.organization_id == org_id,
+            text(change_key)
+        ).order_by(literal_column("tasks.change_txid"), Task.change_seq).limit(limit + 1),
+        window
+    )).all()
+    
+    # A full sync has nothing to delete on the client
+    tombstone_rows = []
+    if since is not None:
+        tombstone_rows = (await db.execute(
+            select(
+                literal_column("task_tombstones.change_txid::text").label("change_txid"),
+                TaskTombstone.change_seq,
+                TaskTombstone.task_id
+            ).where(
+                TaskTombstone.organization_id == org_id,
+                text(change_key)
+            ).order_by(literal_column("task_tombstones.change_txid"), TaskTombstone.change_seq).limit(limit + 1),
+            window
+        )).all()
+    
+    merged = sorted(
+        [((int(row.change_txid), row.change_seq), row, None) for row in task_rows]
+        + [((int(row.change_txid), row.change_seq), None, row.task_id) for row in tombstone_rows],
+        key=lambda item: item[0]
+    )
+    has_more = len(merged) > limit
+    merged = merged[:limit]
+    
+    # Everything below the horizon has been read, so an exhausted feed resumes from there
+    position = merged[-1][0] if merged else after
+    if not has_more:
+        position = max(position, (horizon, 0))
+    floor = max(floor, position[0])
+    
+    return ORJSONResponse({
+        "changes": [task_row_to_dict(row) for _, row, _ in merged if row is not None],
+        "deleted": [task_id for _, _, task_id in merged if task_id is not None],
+        "cursor": f"{position[0]}.{position[1]}.{floor}",
+        "has_more": has_more,
+    })
 
 
 @router.get("/{task_id}", response_model=TaskWithDetails)
-def get_task(
+async def get_task(
     task_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db),
+    as_of: Optional[datetime] = Query(None)
 ):
-    """Get a specific task (can retrieve archived tasks by ID)"""
-    task = db.query(Task).join(Project).filter(
-        Task.id == task_id,
-        Project.organization_id == current_user.organization_id
-    ).first()
+    """Get a specific task (can retrieve archived tasks by ID)
+    
+    With `as_of`, the task's fields are rebuilt from its history as they
+    were at that time (latest snapshot plus the diffs after it). Board
+    geometry, version and timestamps are not part of the history and are
+    the current values.
+    """
+    if as_of is not None:
+        return await get_task_as_of(db, task_id, current_user.organization_id, as_of)
+    
+    etag, not_modified = await check_not_modified(
+        request, db, current_user.organization_id, "tasks.get", ("tasks", "projects", "users"), task_id
+    )
+    if not_modified:
+        return not_modified
     
-    if not task:
+    result = await db.execute(
+        task_details_query().where(
+            Task.id == task_id,
+            Task.organization_id == current_user.organization_id
+        )
+    )
+    row = result.first()
+    
+    if not row:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    # Build the response data manually
-    task_dict = {
-        "id": task.id,
-        "title": task.title,
-        "description": task.description,
-        "status": task.status,
-        "priority": task.priority,
-        "project_id": task.project_id,
-        "assignee_id": task.assignee_id,
-        "created_by_id": task.created_by_id,
-        "due_date": task.due_date,
-        "completed_at": task.completed_at,
-        "estimated_hours": float(task.estimated_hours) if task.estimated_hours else None,
-        "actual_hours": float(task.actual_hours) if task.actual_hours else None,
-        "tags": task.tags if task.tags else [],
-        "position_x": float(task.position_x) if task.position_x else None,
-        "position_y": float(task.position_y) if task.position_y else None,
-        "box_width": float(task.box_width) if task.box_width else None,
-        "box_height": float(task.box_height) if task.box_height else None,
-        "is_archived": task.is_archived if hasattr(task, 'is_archived') else False,
-        "created_at": task.created_at,
-        "updated_at": task.updated_at,
-        "assignee_name": task.assignee.full_name or task.assignee.email if task.assignee else None,
-        "creator_name": task.creator.full_name or task.creator.email if task.creator else None,
-        "project_name": task.project.name if task.project else "",
-    }
-    
-    return TaskWithDetails(**task_dict)
+    set_etag(response, etag)
+    return task_details_row_to_dict(row)
+
+
+async def get_task_as_of(db: AsyncSession, task_id: int, organization_id: int, as_of: datetime) -> dict:
+    """A task's details with its history fields as they were at as_of"""
+    if as_of.tzinfo is None:
+        as_of = as_of.replace(tzinfo=timezone.utc)
+    
+    row = (await db.execute(
+        task_details_query().where(Task.id == task_id, Task.organization_id == organization_id)
+    )).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Task not found")
+    
+    data = task_details_row_to_dict(row)
+    if as_of < data["created_at"]:
+        raise HTTPException(status_code=404, detail="Task did not exist at that time")
+    
+    state, _ = await rebuild_task_state(db, task_id, as_of=as_of)
+    if state is None:
+        raise HTTPException(status_code=404, detail="No history recorded for this task at that time")
+    past = decode_task_state(state)
+    
+    # Names follow the past assignee and project, not the current ones
+    if past["assignee_id"] != data["assignee_id"]:
+        data["assignee_name"] = await db.scalar(
+            select(func.coalesce(User.full_name, User.email)).where(User.id == past["assignee_id"])
+        ) if past["assignee_id"] else None
+    if past["project_id"] != data["project_id"]:
+        data["project_name"] = await db.scalar(select(Project.name).where(Project.id == past["project_id"])) or ""
+    data.update(past)
+    data["tags"] = data["tags"] or []
+    data["is_archived"] = bool(data["is_archived"])
+    return data
+
+
+@router.get("/{task_id}/activity", response_model=List[TaskActivityResponse], response_class=ORJSONResponse)
+async def get_task_activity(
+    task_id: int,
+    response: Response,
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None)
+):
+    """Get a task's activity log, newest first, paginated by cursor"""
+    task_id_in_org = await db.scalar(
+        select(Task.id).where(
+            Task.id == task_id,
+            Task.organization_id == current_user.organization_id
+        )
+    )
+    if task_id_in_org is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    
+    query = ACTIVITY_ORDER.apply(
+        select(TaskActivityLog).where(TaskActivityLog.task_id == task_id),
+        cursor,
+        limit
+    )
+    result = await db.execute(query)
+    entries, next_cursor = ACTIVITY_ORDER.page(result.scalars().all(), limit)
+    set_next_cursor(response, next_cursor)
+    return entries
+
+
+@router.get("/{task_id}/history", response_model=List[TaskHistoryEntry], response_class=ORJSONResponse)
+async def get_task_history(
+    task_id: int,
+    response: Response,
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None)
+):
+    """Get a task's changes, newest first, each with the task's state right after it
+    
+    The state before the page is rebuilt once from the nearest snapshot, then
+    the page's diffs are replayed forward, so a page costs one snapshot read
+    plus a bounded number of log rows however long the history is.
+    """
+    task_id_in_org = await db.scalar(
+        select(Task.id).where(
+            Task.id == task_id,
+            Task.organization_id == current_user.organization_id
+        )
+    )
+    if task_id_in_org is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    
+    query = HISTORY_ORDER.apply(
+        select(TaskActivityLog).where(TaskActivityLog.task_id == task_id),
+        cursor,
+        limit
+    )
+    result = await db.execute(query)
+    entries, next_cursor = HISTORY_ORDER.page(result.scalars().all(), limit)
+    
+    history = []
+    if entries:
+        oldest = entries[-1]
+        state, _ = await rebuild_task_state(db, task_id, upto=(oldest.task_version, oldest.id))
+        states = [state]
+        for entry in reversed(entries[:-1]):
+            state = apply_entry(state, entry.action, entry.new_value)
+            states.append(state)
+        states.reverse()
+        history = [
+            {
+                "activity_id": entry.id,
+                "user_id": entry.user_id,
+                "action": entry.action,
+                "created_at": entry.created_at,
+                "old_value": entry.old_value or {},
+                "new_value": entry.new_value or {},
+                "state": decode_task_state(state) if state is not None else None,
+            }
+            for entry, state in zip(entries, states)
+        ]
+    
+    set_next_cursor(response, next_cursor)
+    return history
+
+
+def expected_task_version(if_match: Optional[str], expected_version: Optional[int]) -> Optional[int]:
+    """Version precondition from If-Match ("7" or W/"7") or the body's expected_version"""
+    if if_match is None or if_match.strip() == "*":
+        return expected_version
+    value = if_match.strip().removeprefix("W/").strip('"')
+    if not value.isdigit():
+        raise HTTPException(status_code=400, detail="If-Match must be a task version")
+    if expected_version is not None and expected_version != int(value):
+        raise HTTPException(status_code=400, detail="If-Match and expected_version disagree")
+    return int(value)
+
+
+def version_conflict(current_version: Optional[int] = None) -> HTTPException:
+    detail = "Task was modified by someone else; reload it and retry"
+    if current_version is not None:
+        detail += f" (current version {current_version})"
+    return HTTPException(status_code=409, detail=detail)
 
 
 @router.patch("/{task_id}", response_model=TaskResponse)
-def update_task(
+async def update_task(
     task_id: int,
     task_update: TaskUpdate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db),
+    if_match: Optional[str] = Header(None)
 ):
-    """Update a task"""
-    task = db.query(Task).join(Project).filter(
-        Task.id == task_id,
-        Project.organization_id == current_user.organization_id
-    ).first()
+    """Update a task
+    
+    Pass the task's `version` as `expected_version` (or If-Match) to make the
+    write conditional: it becomes UPDATE ... WHERE version = :v, and 409 is
+    returned if someone else changed the task first. No row lock is taken.
+    Without either, the update is last-write-wins as before.
+    """
+    expected_version = expected_task_version(if_match, task_update.expected_version)
+    
+    result = await db.execute(
+        select(Task).where(
+            Task.id == task_id,
+            Task.organization_id == current_user.organization_id
+        )
+    )
+    task = result.scalars().first()
     
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    old_data = {
-        "status": task.status,
-        "assignee_id": task.assignee_id,
-        "priority": task.priority
-    }
+    # Already stale: fail before computing or writing anything
+    if expected_version is not None and task.version != expected_version:
+        raise version_conflict(task.version)
     
-    update_data = task_update.model_dump(exclude_unset=True)
+    update_data = task_update.model_dump(exclude_unset=True, exclude={"expected_version"})
+    if not update_data:
+        return task_to_dict(task)
     
     # Handle status change
     if "status" in update_data:
@@ -346,19 +850,29 @@ def update_task(
                 raise HTTPException(status_code=400, detail=f"Invalid status: {new_status}")
         
         if new_status == TaskStatus.DONE and task.status != TaskStatus.DONE:
-            update_data["completed_at"] = datetime.utcnow()
+            update_data["completed_at"] = datetime.now(timezone.utc)
         elif new_status != TaskStatus.DONE:
             update_data["completed_at"] = None
         update_data["status"] = new_status
     
     try:
-        for field, value in update_data.items():
-            setattr(task, field, value)
-        
-        db.commit()
-        db.refresh(task)
+        # One statement writes and returns the new row; a concurrent change
+        # since the read above matches no row instead of being overwritten
+        statement = update(Task).where(Task.id == task_id).values(**update_data)
+        if expected_version is not None:
+            statement = statement.where(Task.version == expected_version)
+        result = await db.execute(
+            statement.returning(*TASK_COLUMNS).execution_options(synchronize_session=False)
+        )
+        row = result.first()
+        if row is None:
+            await db.rollback()
+            raise version_conflict()
+        await db.commit()
+    except HTTPException:
+        raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         import logging
         import traceback
         error_msg = f"Failed to update task: {str(e)}\n{traceback.format_exc()}"
@@ -369,123 +883,83 @@ def update_task(
             detail=f"Failed to update task: {str(e)}"
         )
     
-    # Log activity
+    # Log only the fields that changed (queued; written in batches by the activity buffer)
     try:
-        log_task_activity(db, task.id, current_user.id, "updated", old_data, update_data)
+        old_value, new_value = encode_task_diff(task_to_dict(task), task_row_to_dict(row))
+        if new_value:
+            await activity_buffer.enqueue([activity_buffer.entry(
+                current_user.id, task_id, current_user.organization_id, task.project_id,
+                "updated", old_value, new_value, row.version
+            )])
     except Exception as e:
         # Log error but don't fail task update
         import logging
         logging.error(f"Failed to log task activity: {e}")
     
-    # Build TaskResponse manually to avoid serialization issues
-    try:
-        task_response = {
-            "id": task.id,
-            "title": task.title,
-            "description": task.description,
-            "status": task.status.value if hasattr(task.status, 'value') else str(task.status),
-            "priority": task.priority.value if hasattr(task.priority, 'value') else str(task.priority),
-            "project_id": task.project_id,
-            "assignee_id": task.assignee_id,
-            "created_by_id": task.created_by_id,
-            "due_date": task.due_date,
-            "completed_at": task.completed_at,
-            "estimated_hours": float(task.estimated_hours) if task.estimated_hours else None,
-            "actual_hours": float(task.actual_hours) if task.actual_hours else None,
-            "price": float(task.price) if task.price else None,
-            "tags": task.tags if task.tags else [],
-            "position_x": float(task.position_x) if task.position_x else None,
-            "position_y": float(task.position_y) if task.position_y else None,
-            "box_width": float(task.box_width) if task.box_width else None,
-            "box_height": float(task.box_height) if task.box_height else None,
-            "is_archived": safe_get_is_archived(task),
-            "created_at": task.created_at,
-            "updated_at": task.updated_at,
-        }
-        return TaskResponse(**task_response)
-    except Exception as e:
-        import logging
-        import traceback
-        error_msg = f"Failed to serialize task response: {str(e)}\n{traceback.format_exc()}"
-        logging.error(error_msg)
-        print(error_msg)
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to serialize task response: {str(e)}"
-        )
+    return task_row_to_dict(row)
 
 
 @router.patch("/{task_id}/archive", response_model=TaskResponse)
-def archive_task(
+async def archive_task(
     task_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Archive a task (marks it as archived but doesn't delete it)"""
-    task = db.query(Task).join(Project).filter(
-        Task.id == task_id,
-        Project.organization_id == current_user.organization_id
-    ).first()
+    result = await db.execute(
+        select(Task).where(
+            Task.id == task_id,
+            Task.organization_id == current_user.organization_id
+        )
+    )
+    task = result.scalars().first()
     
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
     # Mark task as archived
+    was_archived = bool(task.is_archived)
     task.is_archived = True
-    db.commit()
-    db.refresh(task)
+    await db.flush()
+    # Read while the row is locked: a later update may commit before the refresh below
+    archived_version = await db.scalar(select(Task.version).where(Task.id == task.id))
+    await db.commit()
+    await db.refresh(task)
     
-    # Log activity
+    # Log activity (queued; written in batches by the activity buffer)
     try:
-        log_task_activity(db, task.id, current_user.id, "archived", None, {"is_archived": True})
+        if not was_archived:
+            await activity_buffer.enqueue([activity_buffer.entry(
+                current_user.id, task.id, current_user.organization_id, task.project_id,
+                "archived", {"is_archived": False}, {"is_archived": True}, archived_version
+            )])
     except Exception as e:
         import logging
         logging.error(f"Failed to log task activity: {e}")
     
-    # Build response
-    task_response = {
-        "id": task.id,
-        "title": task.title,
-        "description": task.description,
-        "status": task.status.value if hasattr(task.status, 'value') else str(task.status),
-        "priority": task.priority.value if hasattr(task.priority, 'value') else str(task.priority),
-        "project_id": task.project_id,
-        "assignee_id": task.assignee_id,
-        "created_by_id": task.created_by_id,
-        "due_date": task.due_date,
-        "completed_at": task.completed_at,
-        "estimated_hours": float(task.estimated_hours) if task.estimated_hours else None,
-        "actual_hours": float(task.actual_hours) if task.actual_hours else None,
-        "tags": task.tags if task.tags else [],
-        "position_x": float(task.position_x) if task.position_x else None,
-        "position_y": float(task.position_y) if task.position_y else None,
-        "box_width": float(task.box_width) if task.box_width else None,
-        "box_height": float(task.box_height) if task.box_height else None,
-        "is_archived": safe_get_is_archived(task),
-        "created_at": task.created_at,
-        "updated_at": task.updated_at,
-    }
-    
-    return TaskResponse(**task_response)
+    return task_to_dict(task)
 
 
 @router.delete("/{task_id}")
-def delete_task(
+async def delete_task(
     task_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a task"""
-    task = db.query(Task).join(Project).filter(
-        Task.id == task_id,
-        Project.organization_id == current_user.organization_id
-    ).first()
+    result = await db.execute(
+        select(Task).where(
+            Task.id == task_id,
+            Task.organization_id == current_user.organization_id
+        )
+    )
+    task = result.scalars().first()
     
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    db.delete(task)
-    db.commit()
+    await db.delete(task)
+    await db.commit()
     
     return {"message": "Task deleted successfully"}
 
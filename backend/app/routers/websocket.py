@@ -4,8 +4,13 @@ from typing import Dict, List
 import json
 import asyncio
 from jose import jwt
+from pydantic import ValidationError
 from app.config import settings
+from app.database import AsyncSessionLocal
 from app.models import User
+from app.schemas.task import TaskLayoutRequest
+from app.services.layout_coalescer import layout_coalescer
+from app.utils.auth import load_principal
 
 router = APIRouter()
 
@@ -63,12 +68,38 @@ async def websocket_task_updates(
         await websocket.close(code=1008, reason="Invalid token")
         return
     
+    async with AsyncSessionLocal() as db:
+        principal = await load_principal(db, user_id)
+    if principal is None or not principal.is_active:
+        await websocket.close(code=1008, reason="Invalid token")
+        return
+    
     await manager.connect(websocket, user_id)
     
     try:
         while True:
             # Keep connection alive and handle incoming messages
             data = await websocket.receive_text()
+            
+            # Board geometry streamed while dragging: {"type": "layout", "changes": [...]}
+            try:
+                message = json.loads(data)
+            except ValueError:
+                message = None
+            if isinstance(message, dict) and message.get("type") == "layout":
+                try:
+                    layout = TaskLayoutRequest(changes=message.get("changes") or [])
+                except ValidationError as e:
+                    await websocket.send_json({"type": "error", "message": str(e)})
+                    continue
+                for change in layout.changes:
+                    layout_coalescer.submit(
+                        principal.organization_id,
+                        change.task_id,
+                        change.model_dump(exclude={"task_id"}, exclude_none=True)
+                    )
+                continue
+            
             # Echo back or handle message
             await websocket.send_json({"type": "pong", "message": "Connected"})
     except WebSocketDisconnect:
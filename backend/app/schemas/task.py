@@ -1,8 +1,11 @@
 """Task schemas"""
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict, Any, Literal, Union, Annotated
 from datetime import datetime
-from app.models import TaskStatus, TaskPriority
+from app.models import GEOMETRY_LIMIT, TaskStatus, TaskPriority
+
+# A finite value the geometry columns can store
+Geometry = Annotated[float, Field(ge=-GEOMETRY_LIMIT, le=GEOMETRY_LIMIT, allow_inf_nan=False)]
 
 
 class TaskCreate(BaseModel):
@@ -29,11 +32,13 @@ class TaskUpdate(BaseModel):
     actual_hours: Optional[float] = None
     price: Optional[float] = None
     tags: Optional[List[str]] = None
-    position_x: Optional[float] = None
-    position_y: Optional[float] = None
-    box_width: Optional[float] = None
-    box_height: Optional[float] = None
+    position_x: Optional[Geometry] = None
+    position_y: Optional[Geometry] = None
+    box_width: Optional[Geometry] = None
+    box_height: Optional[Geometry] = None
     is_archived: Optional[bool] = None  # Temporarily disabled in model until migration
+    # Only apply the update if the task is still at this version (409 otherwise)
+    expected_version: Optional[int] = None
 
 
 class TaskResponse(BaseModel):
@@ -58,13 +63,119 @@ class TaskResponse(BaseModel):
     is_archived: bool = False  # Always False until migration adds column to database
     created_at: datetime
     updated_at: Optional[datetime]
+    change_seq: int = 0
+    version: int = 1
     
     class Config:
         from_attributes = True
 
 
+class TaskSearchResult(TaskResponse):
+    rank: float
+    match: Literal["full_text", "fuzzy"]
+
+
 class TaskWithDetails(TaskResponse):
     assignee_name: Optional[str] = None
     creator_name: Optional[str] = None
     project_name: str
 
+
+
+class TaskActivityResponse(BaseModel):
+    id: int
+    task_id: int
+    user_id: int
+    action: str
+    old_value: Optional[Dict[str, Any]]
+    new_value: Optional[Dict[str, Any]]
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class TaskHistoryEntry(BaseModel):
+    """One change and the task's state right after it"""
+    activity_id: int
+    user_id: int
+    action: str
+    created_at: datetime
+    old_value: Dict[str, Any]
+    new_value: Dict[str, Any]
+    # None when the task has no reconstructible history at this point
+    state: Optional[Dict[str, Any]] = None
+
+
+class TaskBatchCreate(BaseModel):
+    op: Literal["create"]
+    data: TaskCreate
+
+
+class TaskBatchUpdate(BaseModel):
+    op: Literal["update"]
+    id: int
+    data: TaskUpdate
+
+
+class TaskBatchArchive(BaseModel):
+    op: Literal["archive"]
+    id: int
+
+
+class TaskBatchDelete(BaseModel):
+    op: Literal["delete"]
+    id: int
+
+
+TaskBatchOperation = Annotated[
+    Union[TaskBatchCreate, TaskBatchUpdate, TaskBatchArchive, TaskBatchDelete],
+    Field(discriminator="op"),
+]
+
+
+class TaskBatchRequest(BaseModel):
+    operations: List[TaskBatchOperation] = Field(..., min_length=1, max_length=1000)
+
+
+class TaskBatchResult(BaseModel):
+    index: int
+    op: str
+    id: Optional[int] = None
+    ok: bool
+    error: Optional[str] = None
+
+
+class TaskBatchResponse(BaseModel):
+    results: List[TaskBatchResult]
+    succeeded: int
+    failed: int
+
+
+class TaskLayoutChange(BaseModel):
+    """Geometry for one task: absolute values and/or relative deltas"""
+    task_id: int
+    position_x: Optional[Geometry] = None
+    position_y: Optional[Geometry] = None
+    box_width: Optional[Geometry] = None
+    box_height: Optional[Geometry] = None
+    dx: Optional[Geometry] = None
+    dy: Optional[Geometry] = None
+    dw: Optional[Geometry] = None
+    dh: Optional[Geometry] = None
+
+
+class TaskLayoutRequest(BaseModel):
+    changes: List[TaskLayoutChange] = Field(..., min_length=1, max_length=1000)
+
+
+class TaskChangesResponse(BaseModel):
+    changes: List[TaskResponse]
+    deleted: List[int]
+    cursor: str
+    has_more: bool
+
+
+class TagCount(BaseModel):
+    tag: str
+    count: int
@@ -0,0 +1,351 @@
+"""Write-behind buffer for task activity logs and analytics events
+
+Task writes used to commit their own row and then a second transaction for
+the audit trail. Now the request appends a compact record to a Redis stream
+(one XADD per request, durable across API restarts) and returns; a flusher
+in every API worker reads the stream through a consumer group and writes
+batches with multi-row INSERTs every ACTIVITY_FLUSH_INTERVAL_MS or
+ACTIVITY_FLUSH_MAX_EVENTS records, whichever comes first.
+
+- Entries are acknowledged only after their batch commits, so a crash
+  between read and commit redelivers them (at-least-once). Entries left
+  pending by a worker that died, or by a failed batch, are claimed again
+  after ACTIVITY_CLAIM_IDLE_MS. A reclaimed batch that fails again is
+  written one record per transaction, so a bad record holds back no other;
+  a record delivered more than FLUSH_MAX_ATTEMPTS times is moved to the
+  DEAD_LETTER_KEY stream instead of being read again.
+- Back-pressure: when the stream backlog passes ACTIVITY_MAX_BACKLOG,
+  producers wait for the flusher to catch up; if it does not within
+  ACTIVITY_BACKPRESSURE_TIMEOUT_SECONDS, or Redis is unavailable, the
+  records are written to the database directly by the request.
+- The record carries organization_id and project_id from the caller, so
+  nothing is re-queried, and its own created_at, so the audit trail keeps
+  the time of the change rather than the time of the flush.
+"""
+import asyncio
+import logging
+import os
+import socket
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+import redis
+from sqlalchemy import select
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models import Task
+from app.redis_client import get_redis
+from app.services.activity_logger import log_task_activities
+
+logger = logging.getLogger(__name__)
+
+STREAM_KEY = "taskflow:activity"
+GROUP = "activity-writers"
+# Records that keep failing are parked here for inspection (with their original id)
+DEAD_LETTER_KEY = "taskflow:activity:dead"
+DEAD_LETTER_MAX_LEN = 100000
+# Deliveries (XPENDING times_delivered) a record gets before it is dead-lettered
+FLUSH_MAX_ATTEMPTS = 5
+
+
+class ActivityBuffer:
+    """Durable write-behind queue for activity records, flushed in batches"""
+
+    def __init__(
+        self,
+        flush_interval_ms: int,
+        max_batch: int,
+        max_backlog: int,
+        backpressure_timeout: float,
+        claim_idle_ms: int,
+    ):
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch = max_batch
+        self.max_backlog = max_backlog
+        self.backpressure_timeout = backpressure_timeout
+        self.claim_idle_ms = claim_idle_ms
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self._below_backlog = asyncio.Event()
+        self._below_backlog.set()
+        self._backlog = 0
+        self.enqueued = 0
+        self.written_direct = 0
+        self.throttled = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.dropped = 0
+        self.dead_lettered = 0
+        self.failed_flushes = 0
+        self.lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self.last_flush_ms = 0.0
+
+    @staticmethod
+    def entry(
+        user_id: int,
+        task_id: int,
+        organization_id: int,
+        project_id: Optional[int],
+        action: str,
+        old_value: Optional[Dict[str, Any]],
+        new_value: Optional[Dict[str, Any]],
+        task_version: int,
+    ) -> Dict[str, Any]:
+        """A record in the shape log_task_activities() takes; values must be JSON-safe
+
+        task_version is the task's version right after the change, which
+        orders the history however late the record is written.
+        """
+        return {
+            "user_id": user_id,
+            "task_id": task_id,
+            "organization_id": organization_id,
+            "project_id": project_id,
+            "action": action,
+            "old_value": old_value,
+            "new_value": new_value,
+            "task_version": task_version,
+            "created_at": datetime.now(timezone.utc),
+        }
+
+    async def enqueue(self, entries: List[Dict[str, Any]]) -> None:
+        """Queue records for the flusher, or write them now when it cannot keep up"""
+        if not entries:
+            return
+        if self._task is None:
+            # No flusher in this process (scripts, pipeline): write through
+            await self._write_direct(entries)
+            return
+
+        if not self._below_backlog.is_set():
+            self.throttled += 1
+            try:
+                await asyncio.wait_for(self._below_backlog.wait(), timeout=self.backpressure_timeout)
+            except asyncio.TimeoutError:
+                await self._write_direct(entries)
+                return
+
+        try:
+            await asyncio.to_thread(self._add, entries)
+        except redis.RedisError as e:
+            logger.warning(f"Activity stream unavailable, writing {len(entries)} records directly: {e}")
+            await self._write_direct(entries)
+            return
+        self.enqueued += len(entries)
+        self._backlog += len(entries)
+        if self._backlog >= self.max_backlog:
+            self._below_backlog.clear()
+        # A full batch is waiting: flush now rather than at the next tick
+        if self._backlog >= self.max_batch and not self._flush_lock.locked():
+            asyncio.get_running_loop().create_task(self.flush())
+
+    async def _write_direct(self, entries: List[Dict[str, Any]]) -> None:
+        async with AsyncSessionLocal() as db:
+            await log_task_activities(db, entries)
+            await db.commit()
+        self.written_direct += len(entries)
+
+    def _ensure_group(self) -> None:
+        try:
+            get_redis().xgroup_create(STREAM_KEY, GROUP, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def _add(self, entries: List[Dict[str, Any]]) -> None:
+        pipe = get_redis().pipeline(transaction=False)
+        for entry in entries:
+            pipe.xadd(STREAM_KEY, {"e": orjson.dumps(entry)})
+        pipe.execute()
+
+    def _read(self) -> Tuple[List[Tuple[bytes, Dict[bytes, bytes]]], int]:
+        """Entries left pending (by dead consumers or failed batches) first, then new ones
+
+        Returns (messages, how many of them are redeliveries).
+        """
+        client = get_redis()
+        _, claimed, *_ = client.xautoclaim(
+            STREAM_KEY, GROUP, self.consumer, min_idle_time=self.claim_idle_ms, start_id="0-0",
+            count=self.max_batch
+        )
+        claimed = self._dead_letter_exhausted(client, claimed)
+        if len(claimed) >= self.max_batch:
+            return claimed, len(claimed)
+        fresh = client.xreadgroup(GROUP, self.consumer, {STREAM_KEY: ">"}, count=self.max_batch - len(claimed))
+        return claimed + (fresh[0][1] if fresh else []), len(claimed)
+
+    def _dead_letter_exhausted(self, client, claimed):
+        """Move claimed records delivered more than FLUSH_MAX_ATTEMPTS times to the dead-letter stream"""
+        if not claimed:
+            return claimed
+        pipe = client.pipeline(transaction=False)
+        for message_id, _ in claimed:
+            pipe.xpending_range(STREAM_KEY, GROUP, min=message_id, max=message_id, count=1)
+        deliveries = [info[0]["times_delivered"] if info else 0 for info in pipe.execute()]
+        exhausted = [
+            (message_id, fields)
+            for (message_id, fields), delivered in zip(claimed, deliveries)
+            if delivered > FLUSH_MAX_ATTEMPTS
+        ]
+        if not exhausted:
+            return claimed
+
+        ids = [message_id for message_id, _ in exhausted]
+        pipe = client.pipeline(transaction=False)
+        for message_id, fields in exhausted:
+            pipe.xadd(
+                DEAD_LETTER_KEY, {**fields, b"id": message_id}, maxlen=DEAD_LETTER_MAX_LEN, approximate=True
+            )
+        pipe.xack(STREAM_KEY, GROUP, *ids)
+        pipe.xdel(STREAM_KEY, *ids)
+        pipe.execute()
+        self.dead_lettered += len(ids)
+        logger.error(
+            f"Moved {len(ids)} activity records to {DEAD_LETTER_KEY} after {FLUSH_MAX_ATTEMPTS} failed "
+            f"flushes ({self.dead_lettered} so far)"
+        )
+        dead = set(ids)
+        return [(message_id, fields) for message_id, fields in claimed if message_id not in dead]
+
+    def _ack(self, ids: List[bytes]) -> int:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.xack(STREAM_KEY, GROUP, *ids)
+        pipe.xdel(STREAM_KEY, *ids)
+        pipe.xlen(STREAM_KEY)
+        return pipe.execute()[-1]
+
+    @staticmethod
+    def _decode(fields: Dict[bytes, bytes]) -> Dict[str, Any]:
+        entry = orjson.loads(fields[b"e"])
+        entry["created_at"] = datetime.fromisoformat(entry["created_at"])
+        return entry
+
+    async def _write(self, entries: List[Dict[str, Any]]) -> int:
+        """Write records in one transaction; returns how many were kept"""
+        async with AsyncSessionLocal() as db:
+            # Tasks deleted since the record was queued have nothing to attach to
+            task_ids = {entry["task_id"] for entry in entries}
+            existing = set((await db.execute(
+                select(Task.id).where(Task.id.in_(task_ids))
+            )).scalars().all()) if task_ids else set()
+            kept = [entry for entry in entries if entry["task_id"] in existing]
+            self.dropped += len(entries) - len(kept)
+            await log_task_activities(db, kept)
+            await db.commit()
+        return len(kept)
+
+    async def flush(self) -> int:
+        """Write everything currently queued, one batch per transaction; returns rows written"""
+        async with self._flush_lock:
+            written = 0
+            while True:
+                messages, redelivered = await asyncio.to_thread(self._read)
+                if not messages:
+                    break
+
+                decoded, done = [], []
+                for message_id, fields in messages:
+                    try:
+                        decoded.append((message_id, self._decode(fields)))
+                    except (KeyError, ValueError, TypeError) as e:
+                        done.append(message_id)
+                        self.dropped += 1
+                        logger.error(f"Dropping malformed activity record {message_id!r}: {e}")
+
+                # Stream ids start with the enqueue time in ms
+                oldest_ms = min(int(message_id.split(b"-")[0]) for message_id, _ in messages)
+                self.lag_ms = max(time.time() * 1000 - oldest_ms, 0.0)
+                self.max_lag_ms = max(self.max_lag_ms, self.lag_ms)
+
+                started = time.perf_counter()
+                try:
+                    kept = await self._write([entry for _, entry in decoded])
+                    done += [message_id for message_id, _ in decoded]
+                except Exception as e:
+                    self.failed_flushes += 1
+                    logger.error(f"Failed to flush {len(decoded)} activity records: {e}")
+                    if not redelivered:
+                        # Left pending; claimed again after ACTIVITY_CLAIM_IDLE_MS
+                        break
+                    # Some of these failed before: one transaction each, so only the bad ones stay pending
+                    kept = 0
+                    for message_id, entry in decoded:
+                        try:
+                            kept += await self._write([entry])
+                            done.append(message_id)
+                        except Exception as e:
+                            logger.error(f"Failed to flush activity record {message_id!r}: {e}")
+                    if not done:
+                        break
+
+                self._backlog = await asyncio.to_thread(self._ack, done)
+                if self._backlog < self.max_backlog:
+                    self._below_backlog.set()
+                else:
+                    self._below_backlog.clear()
+                self.last_flush_ms = (time.perf_counter() - started) * 1000
+                self.flushes += 1
+                self.rows_written += kept
+                written += kept
+                if len(messages) < self.max_batch:
+                    self.lag_ms = 0.0
+                    break
+            return written
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except redis.RedisError as e:
+                logger.warning(f"Activity flush could not reach Redis: {e}")
+
+    def start(self) -> None:
+        if self._task is None:
+            try:
+                self._ensure_group()
+            except redis.RedisError as e:
+                # Without the stream every record is written directly
+                logger.warning(f"Activity buffer disabled, Redis unavailable: {e}")
+                return
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """Stop the loop and drain what this worker can before shutdown"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+            try:
+                await self.flush()
+            except redis.RedisError as e:
+                logger.warning(f"Activity records left in the stream at shutdown: {e}")
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "backlog": self._backlog,
+            "enqueued": self.enqueued,
+            "written_direct": self.written_direct,
+            "throttled": self.throttled,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "dropped": self.dropped,
+            "dead_lettered": self.dead_lettered,
+            "failed_flushes": self.failed_flushes,
+            "lag_ms": round(self.lag_ms, 1),
+            "max_lag_ms": round(self.max_lag_ms, 1),
+            "last_flush_ms": round(self.last_flush_ms, 2),
+        }
+
+
+activity_buffer = ActivityBuffer(
+    flush_interval_ms=settings.ACTIVITY_FLUSH_INTERVAL_MS,
+    max_batch=settings.ACTIVITY_FLUSH_MAX_EVENTS,
+    max_backlog=settings.ACTIVITY_MAX_BACKLOG,
+    backpressure_timeout=settings.ACTIVITY_BACKPRESSURE_TIMEOUT_SECONDS,
+    claim_idle_ms=settings.ACTIVITY_CLAIM_IDLE_MS,
+)
@@ -1,59 +1,57 @@
 """Activity logging service - part of data pipeline"""
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import TaskActivityLog, AnalyticsEvent
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from datetime import datetime
+from app.services.task_history import take_due_snapshots
 
 
-def log_task_activity(
-    db: Session,
-    task_id: int,
-    user_id: int,
-    action: str,
-    old_value: Dict[str, Any] | None,
-    new_value: Dict[str, Any] | None
-):
-    """Log task activity for audit trail"""
-    activity_log = TaskActivityLog(
-        task_id=task_id,
-        user_id=user_id,
-        action=action,
-        old_value=old_value or {},
-        new_value=new_value or {}
-    )
-    db.add(activity_log)
+async def log_task_activities(db: AsyncSession, entries: List[Dict[str, Any]], user_id: Optional[int] = None):
+    """Log many task activities with one multi-row INSERT per table
     
-    # Also create analytics event for pipeline processing
-    # Use a separate try-except to ensure activity logging doesn't fail
-    try:
-        from app.models import Task
-        from sqlalchemy.orm import joinedload
-        # Load task with project relationship to avoid lazy loading issues
-        task = db.query(Task).options(joinedload(Task.project)).filter(Task.id == task_id).first()
-        if task and task.project:
-            analytics_event = AnalyticsEvent(
-                organization_id=task.project.organization_id,
-                event_type=f"task_{action}",
-                user_id=user_id,
-                project_id=task.project_id,
-                task_id=task_id,
-                extra_data={
-                    "action": action,
-                    "old_value": old_value,
-                    "new_value": new_value
-                }
-            )
-            db.add(analytics_event)
-    except Exception as e:
-        # Log error but don't fail - analytics is optional
-        import logging
-        logging.warning(f"Failed to create analytics event: {e}")
+    Each entry carries task_id, organization_id, project_id, action, old_value,
+    new_value and task_version (the task's version after the change), and
+    optionally its own user_id (else `user_id` applies) and created_at (else
+    now). Values are the compact diffs from
+    app.services.task_history; analytics events get only the names of the
+    changed fields, not a second copy of the values. Tasks that have
+    accumulated enough diffs get a history snapshot. Runs in the caller's
+    transaction; the caller commits.
+    """
+    if not entries:
+        return
     
-    try:
-        db.commit()
-    except Exception as e:
-        db.rollback()
-        import logging
-        logging.error(f"Failed to commit activity log: {e}")
-        raise
-
+    await db.execute(
+        insert(TaskActivityLog.__table__).values([
+            {
+                "task_id": entry["task_id"],
+                "user_id": entry.get("user_id", user_id),
+                "action": entry["action"],
+                "old_value": entry["old_value"] or {},
+                "new_value": entry["new_value"] or {},
+                # Records queued before versions were logged sort first, like older entries
+                "task_version": entry.get("task_version", 0),
+                "created_at": entry.get("created_at", func.now()),
+            }
+            for entry in entries
+        ])
+    )
+    await db.execute(
+        insert(AnalyticsEvent.__table__).values([
+            {
+                "organization_id": entry["organization_id"],
+                "event_type": f"task_{entry['action']}",
+                "user_id": entry.get("user_id", user_id),
+                "project_id": entry["project_id"],
+                "task_id": entry["task_id"],
+                "extra_data": {
+                    "action": entry["action"],
+                    "fields": sorted(entry["new_value"] or {}) if entry["action"] != "created" else []
+                },
+                "created_at": entry.get("created_at", func.now()),
+            }
+            for entry in entries
+        ])
+    )
+    await take_due_snapshots(db, [entry["task_id"] for entry in entries])
@@ -0,0 +1,195 @@
+"""Dashboard aggregation for GET /api/v1/analytics/dashboard
+
+The dashboard is two statements over the organization's tasks instead of
+one query per figure:
+
+1. One scan grouped by GROUPING SETS ((status), (priority), ()): the
+   per-status and per-priority rows carry counts and price sums, and the
+   grand-total row carries every scalar figure as a FILTER aggregate
+   (completed today / this week, overdue, price total, and the average
+   completion time, averaged in SQL instead of loading completed tasks).
+2. Top contributors, which joins users and has its own window.
+
+Results match the per-figure queries they replace, including which keys
+appear: priorities without tasks are absent, and price sums only cover
+groups with at least one priced task. Prices are rounded to cents in both
+paths (task prices are stored with two decimals, so no sum loses anything).
+
+rollup_dashboard_figures() computes the same figures from the daily
+rollups (app.services.rollups) at day granularity: the completion-time
+window starts at the beginning of its first day. Only overdue tasks and
+top contributors still read tasks, through indexes bounded by open tasks
+and the window.
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Float, cast, extract, func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Task, TaskPriority, TaskStatus, User
+from app.services.rollups import read_rollups
+
+# GROUPING(status, priority): the bit of each column left out of the set
+BY_STATUS, BY_PRIORITY, TOTAL = 1, 2, 3
+
+
+def day_starts(now: datetime):
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return today_start, today_start - timedelta(days=today_start.weekday())
+
+
+def dashboard_query(organization_id: int, start_date: datetime, now: datetime):
+    today_start, week_start = day_starts(now)
+    done = Task.status == TaskStatus.DONE
+    return (
+        select(
+            func.grouping(Task.status, Task.priority).label("grouping"),
+            Task.status,
+            Task.priority,
+            func.count(Task.id).label("tasks"),
+            func.count(Task.price).label("priced"),
+            func.sum(Task.price).label("price"),
+            func.count(Task.id).filter(done, Task.completed_at >= today_start).label("completed_today"),
+            func.count(Task.id).filter(done, Task.completed_at >= week_start).label("completed_this_week"),
+            func.count(Task.id).filter(
+                Task.due_date.isnot(None), Task.due_date < now, Task.status != TaskStatus.DONE
+            ).label("overdue"),
+            cast(
+                func.avg(extract("epoch", Task.completed_at - Task.created_at)).filter(
+                    done, Task.completed_at.isnot(None), Task.created_at >= start_date
+                ) / 3600,
+                Float,
+            ).label("average_completion_hours"),
+        )
+        .where(Task.organization_id == organization_id)
+        .group_by(func.grouping_sets(Task.status, Task.priority, literal_column("()")))
+    )
+
+
+def top_contributors_query(organization_id: int, start_date: datetime, limit: int = 10):
+    return (
+        select(User.id, User.full_name, User.email, func.count(Task.id).label("task_count"))
+        .join(Task, User.id == Task.assignee_id)
+        .where(Task.organization_id == organization_id, Task.created_at >= start_date)
+        .group_by(User.id, User.full_name, User.email)
+        .order_by(func.count(Task.id).desc())
+        .limit(limit)
+    )
+
+
+async def dashboard_figures(
+    db: AsyncSession, organization_id: int, start_date: datetime, now: datetime
+) -> Dict[str, Any]:
+    """Every dashboard figure, keyed as in AnalyticsResponse"""
+    rows = (await db.execute(dashboard_query(organization_id, start_date, now))).all()
+
+    status_counts = {status.value: 0 for status in TaskStatus}
+    price_by_status = {status.value: 0.0 for status in TaskStatus}
+    priority_counts, price_by_priority = {}, {}
+    total = None
+    for row in rows:
+        if row.grouping == TOTAL:
+            total = row
+        elif row.grouping == BY_STATUS and row.status is not None:
+            status_counts[row.status.value] = row.tasks
+            if row.priced:
+                price_by_status[row.status.value] = round(float(row.price), 2) if row.price else 0.0
+        elif row.grouping == BY_PRIORITY and row.priority is not None:
+            priority_counts[row.priority.value] = row.tasks
+            if row.priced:
+                price_by_priority[row.priority.value] = round(float(row.price), 2) if row.price else 0.0
+
+    total_tasks = total.tasks if total else 0
+    total_price = float(total.price) if total and total.price else 0.0
+    if total_tasks > 0:
+        productivity_score = (status_counts.get("done", 0) / total_tasks) * 100
+    else:
+        productivity_score = 0.0
+
+    contributors = (await db.execute(top_contributors_query(organization_id, start_date))).all()
+
+    return {
+        "total_tasks": total_tasks,
+        "tasks_by_status": status_counts,
+        "tasks_by_priority": priority_counts,
+        "tasks_completed_today": total.completed_today if total else 0,
+        "tasks_completed_this_week": total.completed_this_week if total else 0,
+        "average_completion_time_hours": total.average_completion_hours if total else None,
+        "tasks_overdue": total.overdue if total else 0,
+        "productivity_score": round(productivity_score, 2),
+        "top_contributors": contributor_dicts(contributors),
+        "total_price": round(total_price, 2),
+        "price_by_status": price_by_status,
+        "price_by_priority": price_by_priority,
+    }
+
+
+async def rollup_dashboard_figures(
+    db: AsyncSession, organization_id: int, start_date: datetime, now: datetime
+) -> Optional[Dict[str, Any]]:
+    """The dashboard from the daily rollups; None if they have not been built"""
+    today_start, week_start = day_starts(now)
+    first_day = min(start_date.date(), week_start.date())
+    rollups = await read_rollups(db, organization_id, first_day)
+    if rollups is None:
+        return None
+    daily, totals = rollups
+
+    def since(day, measure):
+        return sum(values.get(measure, 0) for d, values in daily.items() if d >= day)
+
+    total_tasks = int(totals.get("tasks_created", 0))
+    status_counts = {s.value: int(totals.get(f"tasks_status_{s.value}", 0)) for s in TaskStatus}
+    priority_counts = {
+        p.value: int(totals[f"tasks_priority_{p.value}"])
+        for p in TaskPriority if totals.get(f"tasks_priority_{p.value}")
+    }
+    price_by_status = {
+        s.value: round(totals.get(f"price_status_{s.value}", 0.0), 2) if totals.get(f"priced_status_{s.value}") else 0.0
+        for s in TaskStatus
+    }
+    price_by_priority = {
+        p.value: round(totals[f"price_priority_{p.value}"], 2)
+        for p in TaskPriority if totals.get(f"priced_priority_{p.value}")
+    }
+    completion_count = since(start_date.date(), "completion_count")
+    average_completion = (
+        since(start_date.date(), "completion_seconds_sum") / completion_count / 3600 if completion_count else None
+    )
+    productivity_score = (status_counts["done"] / total_tasks) * 100 if total_tasks > 0 else 0.0
+
+    overdue = await db.scalar(select(func.count(Task.id)).where(
+        Task.organization_id == organization_id,
+        Task.due_date.isnot(None),
+        Task.due_date < now,
+        Task.status != TaskStatus.DONE
+    ))
+    contributors = (await db.execute(top_contributors_query(organization_id, start_date))).all()
+
+    return {
+        "total_tasks": total_tasks,
+        "tasks_by_status": status_counts,
+        "tasks_by_priority": priority_counts,
+        "tasks_completed_today": int(since(today_start.date(), "tasks_completed")),
+        "tasks_completed_this_week": int(since(week_start.date(), "tasks_completed")),
+        "average_completion_time_hours": average_completion,
+        "tasks_overdue": overdue,
+        "productivity_score": round(productivity_score, 2),
+        "top_contributors": contributor_dicts(contributors),
+        "total_price": round(sum(totals.get(f"price_status_{s.value}", 0.0) for s in TaskStatus), 2),
+        "price_by_status": price_by_status,
+        "price_by_priority": price_by_priority,
+    }
+
+
+def contributor_dicts(rows) -> List[Dict[str, Any]]:
+    return [
+        {
+            "user_id": u.id,
+            "name": u.full_name or u.email,
+            "email": u.email,
+            "tasks_completed": u.task_count
+        }
+        for u in rows
+    ]
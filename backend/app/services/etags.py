@@ -0,0 +1,138 @@
+"""Conditional GET support - weak ETags from per-organization version stamps
+
+A read endpoint first fetches its organization's versions (one statement of
+index probes) and derives a weak ETag from the versions it depends on plus
+the request's query string. When the client's If-None-Match matches, a 304
+is returned before any task, project or user row is read.
+
+Projects and users are versioned by counters in org_change_counters, bumped
+by database triggers in the same transaction as the write. Tasks take no
+counter lock (migration 0015); their version has two parts:
+
+- the highest change_txid below the transaction horizon among the
+  organization's tasks and tombstones. Every transaction below the horizon
+  has finished, so nothing can still commit into this part.
+- the count and sum of change_seq of the rows committed at or above the
+  horizon. While an older transaction is open (a long import, say), later
+  commits land here; each written row carries a fresh change_seq, so every
+  commit changes this part the moment it becomes visible, rather than when
+  the older transaction ends.
+
+The second part is usually empty: it only holds rows while some older
+transaction is still running, and those rows move into the first part when
+it ends, costing one extra 200. Either way an ETag can only be older than
+the data it is attached to, never newer.
+"""
+import hashlib
+import threading
+from typing import Dict, Optional, Sequence, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Clients must revalidate on every use, but may keep the body
+CACHE_CONTROL = "private, no-cache"
+
+# scope -> SQL for its current version (NULL when never written), :organization_id bound
+VERSION_SQL = {
+    "tasks": """
+        SELECT concat_ws('.',
+            greatest(
+                (SELECT max(change_txid) FROM tasks
+                 WHERE organization_id = :organization_id AND change_txid < pg_snapshot_xmin(pg_current_snapshot())),
+                (SELECT max(change_txid) FROM task_tombstones
+                 WHERE organization_id = :organization_id AND change_txid < pg_snapshot_xmin(pg_current_snapshot())),
+                (SELECT tombstones_compacted_txid FROM org_change_counters WHERE organization_id = :organization_id)
+            )::text,
+            (SELECT count(*) || '.' || coalesce(sum(change_seq), 0) FROM (
+                SELECT change_seq FROM tasks
+                WHERE organization_id = :organization_id AND change_txid >= pg_snapshot_xmin(pg_current_snapshot())
+                UNION ALL
+                SELECT change_seq FROM task_tombstones
+                WHERE organization_id = :organization_id AND change_txid >= pg_snapshot_xmin(pg_current_snapshot())
+            ) AS recent)
+        )
+    """,
+    "projects": "SELECT projects_version::text FROM org_change_counters WHERE organization_id = :organization_id",
+    "users": "SELECT users_version::text FROM org_change_counters WHERE organization_id = :organization_id",
+}
+
+
+class ConditionalGetStats:
+    """Per-endpoint counts of 304s versus full responses"""
+
+    def __init__(self):
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, hit: bool) -> None:
+        with self._lock:
+            counts = self._counts.setdefault(endpoint, {"not_modified": 0, "full": 0})
+            counts["not_modified" if hit else "full"] += 1
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                endpoint: {
+                    **counts,
+                    "hit_rate": round(counts["not_modified"] / max(sum(counts.values()), 1), 4),
+                }
+                for endpoint, counts in self._counts.items()
+            }
+
+
+conditional_get_stats = ConditionalGetStats()
+
+
+async def org_versions(db: AsyncSession, organization_id: int, scopes: Sequence[str]) -> Tuple[str, ...]:
+    """Current versions of the given scopes for an organization ("0" when never written)"""
+    columns = ", ".join(f"coalesce(({VERSION_SQL[scope]}), '0')" for scope in scopes)
+    result = await db.execute(text(f"SELECT {columns}"), {"organization_id": organization_id})
+    return tuple(result.first())
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison of If-None-Match against an ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+
+async def check_not_modified(
+    request: Request,
+    db: AsyncSession,
+    organization_id: int,
+    endpoint: str,
+    scopes: Sequence[str],
+    *extra,
+) -> Tuple[str, Optional[Response]]:
+    """ETag for this request, plus a ready 304 response when the client is current
+
+    `extra` carries anything else the representation depends on (e.g. a time
+    bucket for "overdue" counts); the query string is always included.
+    """
+    versions = await org_versions(db, organization_id, scopes)
+    etag = make_etag(endpoint, organization_id, *versions, str(request.url.query), *extra)
+    hit = etag_matches(request, etag)
+    conditional_get_stats.record(endpoint, hit)
+    if hit:
+        return etag, Response(status_code=304, headers=etag_headers(etag))
+    return etag, None
+
+
+def etag_headers(etag: str) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers.update(etag_headers(etag))
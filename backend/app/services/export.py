@@ -0,0 +1,267 @@
+"""Bulk export of an organization's tasks and activity history
+
+Rows are read through a server-side cursor (yield_per) and encoded one
+partition at a time, so memory stays bounded by EXPORT_CHUNK_ROWS whatever
+the tenant's size. The same ExportEncoder backs the streaming endpoint
+(async, GET /api/v1/export/{dataset}) and the pipeline's
+export_organization_data task (sync, writes a file).
+
+Formats:
+- ndjson: one JSON object per line (orjson)
+- csv: header row, then one line per row; JSON columns are JSON-encoded
+- parquet: one row group per partition; needs pyarrow, imported lazily so
+  the API runs without it
+"""
+import asyncio
+import csv
+import io
+import zlib
+from typing import Any, AsyncIterator, Callable, Iterator, List, Sequence
+
+import orjson
+from sqlalchemy import Boolean, DateTime, Enum, Integer, JSON, Numeric, Select, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.models import Task, TaskActivityLog
+from app.utils.serialization import TASK_COLUMNS
+
+EXPORT_CHUNK_ROWS = 5000
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+ACTIVITY_COLUMNS = (
+    TaskActivityLog.id, TaskActivityLog.task_id, TaskActivityLog.user_id, TaskActivityLog.action,
+    TaskActivityLog.old_value, TaskActivityLog.new_value, TaskActivityLog.created_at,
+)
+
+# Columns exported as a list of strings rather than a JSON document
+LIST_COLUMNS = {"tags"}
+
+
+def export_query(dataset: str, organization_id: int) -> Select:
+    """Rows for a dataset; unordered so the planner is free to scan sequentially"""
+    if dataset == "tasks":
+        return select(*TASK_COLUMNS).where(Task.organization_id == organization_id)
+    if dataset == "activity":
+        return (
+            select(*ACTIVITY_COLUMNS)
+            .join(Task, Task.id == TaskActivityLog.task_id)
+            .where(Task.organization_id == organization_id)
+        )
+    raise ValueError(f"Unknown export dataset: {dataset}")
+
+
+def _kind(name: str, column_type) -> str:
+    if name in LIST_COLUMNS:
+        return "list"
+    if isinstance(column_type, Boolean):
+        return "bool"
+    if isinstance(column_type, Integer):
+        return "int"
+    if isinstance(column_type, Numeric):
+        return "float"
+    if isinstance(column_type, DateTime):
+        return "datetime"
+    if isinstance(column_type, Enum):
+        return "enum"
+    if isinstance(column_type, JSON):
+        return "json"
+    return "str"
+
+
+def _column_kinds(statement: Select) -> List[tuple]:
+    return [(c["name"], _kind(c["name"], c["type"])) for c in statement.column_descriptions]
+
+
+def _flat_value(kind: str, value: Any, text: bool = False) -> Any:
+    """A value as CSV (text=True) or Parquet hold it: enums by value, JSON as text"""
+    if value is None:
+        return None
+    if kind == "enum":
+        return value.value
+    if kind == "json" or (text and kind == "list"):
+        return orjson.dumps(value).decode("utf-8")
+    if text and kind == "datetime":
+        return value.isoformat()
+    return value
+
+
+class _ChunkSink:
+    """Write-only file object that collects what pyarrow writes until drained"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ExportEncoder:
+    """Incremental encoder: start(), then encode(rows) per partition, then finish()
+
+    With gzip=True every piece is passed through one streaming gzip
+    compressor, so the concatenated output is a single valid .gz stream.
+    """
+
+    def __init__(self, fmt: str, statement: Select, gzip: bool = False):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}")
+        self.fmt = fmt
+        self.columns = _column_kinds(statement)
+        self.names = [name for name, _ in self.columns]
+        self.rows = 0
+        self._compressor = zlib.compressobj(wbits=31) if gzip else None
+        self._encode: Callable[[Sequence[Sequence[Any]]], bytes] = getattr(self, f"_encode_{fmt}")
+        self._parquet_writer = None
+        self._sink = None
+
+    def _out(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) if self._compressor and data else data
+
+    def start(self) -> bytes:
+        if self.fmt == "csv":
+            return self._out(self._csv_line(self.names))
+        if self.fmt == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            self._sink = _ChunkSink()
+            self._parquet_writer = pq.ParquetWriter(pa.PythonFile(self._sink, mode="w"), self._arrow_schema())
+            return self._out(self._sink.drain())
+        return b""
+
+    def encode(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        self.rows += len(rows)
+        return self._out(self._encode(rows)) if rows else b""
+
+    def finish(self) -> bytes:
+        data = b""
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            data = self._sink.drain()
+        data = self._out(data)
+        if self._compressor:
+            data += self._compressor.flush()
+        return data
+
+    def _encode_ndjson(self, rows) -> bytes:
+        names = self.names
+        return b"".join(orjson.dumps(dict(zip(names, row))) + b"\n" for row in rows)
+
+    def _csv_line(self, values) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(values)
+        return buffer.getvalue().encode("utf-8")
+
+    def _encode_csv(self, rows) -> bytes:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        kinds = [kind for _, kind in self.columns]
+        writer.writerows(
+            [_flat_value(kind, value, text=True) for kind, value in zip(kinds, row)]
+            for row in rows
+        )
+        return buffer.getvalue().encode("utf-8")
+
+    def _arrow_schema(self):
+        import pyarrow as pa
+
+        types = {
+            "bool": pa.bool_(),
+            "int": pa.int64(),
+            "float": pa.float64(),
+            "datetime": pa.timestamp("us", tz="UTC"),
+            "list": pa.list_(pa.string()),
+        }
+        return pa.schema([(name, types.get(kind, pa.string())) for name, kind in self.columns])
+
+    def _encode_parquet(self, rows) -> bytes:
+        import pyarrow as pa
+
+        arrays = {
+            name: [_flat_value(kind, row[i]) for row in rows]
+            for i, (name, kind) in enumerate(self.columns)
+        }
+        self._parquet_writer.write_table(pa.Table.from_pydict(arrays, schema=self._parquet_writer.schema))
+        return self._sink.drain()
+
+
+async def stream_export(
+    engine: AsyncEngine,
+    organization_id: int,
+    dataset: str,
+    fmt: str,
+    gzip: bool = False,
+    chunk_rows: int = EXPORT_CHUNK_ROWS,
+) -> AsyncIterator[bytes]:
+    """Encoded export as an async byte stream (for StreamingResponse)
+
+    Opens its own connection: the response body is produced after the
+    request's session dependency has already closed. Only the fetches run on
+    the event loop; encoding and compression of each partition run in a
+    worker thread, so a large export does not stall other requests.
+    """
+    statement = export_query(dataset, organization_id)
+    encoder = ExportEncoder(fmt, statement, gzip=gzip)
+    async with engine.connect() as conn:
+        result = await conn.stream(statement.execution_options(yield_per=chunk_rows))
+        header = encoder.start()
+        if header:
+            yield header
+        async for rows in result.partitions():
+            data = await asyncio.to_thread(encoder.encode, rows)
+            if data:
+                yield data
+    yield await asyncio.to_thread(encoder.finish)
+
+
+def iter_export(
+    engine: Engine,
+    organization_id: int,
+    dataset: str,
+    fmt: str,
+    gzip: bool = False,
+    chunk_rows: int = EXPORT_CHUNK_ROWS,
+) -> Iterator[bytes]:
+    """Encoded export as a sync byte stream (for the pipeline)"""
+    statement = export_query(dataset, organization_id)
+    encoder = ExportEncoder(fmt, statement, gzip=gzip)
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=chunk_rows).execute(statement)
+        yield encoder.start()
+        for rows in result.partitions():
+            yield encoder.encode(rows)
+    yield encoder.finish()
+
+
+def export_filename(dataset: str, organization_id: int, fmt: str, gzip: bool, stamp: str) -> str:
+    name = f"{dataset}-org{organization_id}-{stamp}.{EXPORT_FORMATS[fmt][1]}"
+    return f"{name}.gz" if gzip else name
+
@@ -0,0 +1,224 @@
+"""Board layout coalescer - batches drag and resize writes
+
+A drag on the board produces a stream of geometry updates for the same task.
+Instead of a full task update per event, updates are merged in memory per
+task and the latest state is written every LAYOUT_FLUSH_INTERVAL_MS with a
+single UPDATE ... FROM (VALUES ...). Pure geometry changes write no activity
+log or analytics rows.
+
+Each field is either set to an absolute value or moved by a relative delta;
+an absolute value absorbs later deltas, a delta on top of a pending delta
+accumulates.
+
+Rows are written in (organization, task) order, so two workers flushing
+overlapping organizations take their locks in the same order, in chunks of
+FLUSH_CHUNK_ROWS that each commit on their own. Values are validated on the
+way in (app.schemas.task.Geometry) and clamped to GEOMETRY_LIMIT on the
+way out, since deltas accumulate. Should a chunk still hit a value error,
+it is written again row by row under savepoints: only the offending rows
+are dropped, not other tenants' geometry. Any other failure (a lost
+connection) puts the unwritten chunks back under anything submitted since,
+to be retried by the next flush, up to FLUSH_MAX_ATTEMPTS flushes in a row.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.exc import DataError
+
+from app.config import settings
+from app.database import async_engine
+from app.models import GEOMETRY_LIMIT
+
+logger = logging.getLogger(__name__)
+
+# field -> name of its relative-delta counterpart in incoming updates
+LAYOUT_FIELDS = {
+    "position_x": "dx",
+    "position_y": "dy",
+    "box_width": "dw",
+    "box_height": "dh",
+}
+
+SET, ADD = "s", "a"
+
+# 10 bind parameters per row; asyncpg allows 32767 per statement
+FLUSH_CHUNK_ROWS = 2000
+# Pending geometry is dropped after this many failed flushes in a row (the database is down)
+FLUSH_MAX_ATTEMPTS = 3
+
+
+def _build_update(items):
+    """UPDATE ... FROM (VALUES ...) for a list of (task id, (org id, fields))"""
+    rows, params = [], {}
+    for i, (task_id, (organization_id, fields)) in enumerate(items):
+        columns = [f"CAST(:id_{i} AS integer)", f"CAST(:org_{i} AS integer)"]
+        params[f"id_{i}"] = task_id
+        params[f"org_{i}"] = organization_id
+        for field in LAYOUT_FIELDS:
+            mode, value = fields.get(field, (None, None))
+            columns.append(f"CAST(:{field}_m_{i} AS char(1))")
+            columns.append(f"CAST(:{field}_v_{i} AS numeric)")
+            params[f"{field}_m_{i}"] = mode
+            params[f"{field}_v_{i}"] = value
+        rows.append(f"({', '.join(columns)})")
+
+    value_columns = ", ".join(f"{field}_m, {field}_v" for field in LAYOUT_FIELDS)
+    assignments = ",\n".join(
+        f"{field} = CASE v.{field}_m "
+        f"WHEN '{SET}' THEN least(greatest(v.{field}_v, -{GEOMETRY_LIMIT}), {GEOMETRY_LIMIT}) "
+        f"WHEN '{ADD}' THEN least(greatest(coalesce(tasks.{field}, 0) + v.{field}_v, -{GEOMETRY_LIMIT}), {GEOMETRY_LIMIT}) "
+        f"ELSE tasks.{field} END"
+        for field in LAYOUT_FIELDS
+    )
+    # organization_id in the join keeps a client from moving another tenant's task
+    statement = text(f"""
+        UPDATE tasks SET {assignments}
+        FROM (VALUES {', '.join(rows)}) AS v(id, organization_id, {value_columns})
+        WHERE tasks.id = v.id AND tasks.organization_id = v.organization_id
+    """)
+    return statement, params
+
+
+class LayoutCoalescer:
+    """Per-task merge buffer for geometry updates with periodic batched flushes"""
+
+    def __init__(self, flush_interval_ms: int, max_pending: int):
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_pending = max_pending
+        # task id -> (organization id, {field: (mode, value)})
+        self._pending: Dict[int, Tuple[int, Dict[str, Tuple[str, float]]]] = {}
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.submitted = 0
+        self.coalesced = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.failed_rows = 0
+        self.failed_attempts = 0
+        self.last_flush_ms = 0.0
+
+    def _restore(self, batch: Dict[int, Tuple[int, Dict[str, Tuple[str, float]]]]) -> None:
+        """Put a failed batch back; updates submitted since apply on top of it"""
+        for task_id, (organization_id, fields) in batch.items():
+            newer = self._pending.get(task_id)
+            if newer is None:
+                self._pending[task_id] = (organization_id, fields)
+                continue
+            if newer[0] != organization_id:
+                continue
+            merged = dict(fields)
+            for field, (mode, value) in newer[1].items():
+                if mode == ADD and field in merged:
+                    merged[field] = (merged[field][0], merged[field][1] + value)
+                else:
+                    merged[field] = (mode, value)
+            self._pending[task_id] = (organization_id, merged)
+
+    def submit(self, organization_id: int, task_id: int, changes: Dict[str, float]) -> None:
+        """Merge one geometry update for a task into the pending state"""
+        self.submitted += 1
+        entry = self._pending.get(task_id)
+        if entry is None or entry[0] != organization_id:
+            entry = (organization_id, {})
+            self._pending[task_id] = entry
+        else:
+            self.coalesced += 1
+        fields = entry[1]
+
+        for field, delta_name in LAYOUT_FIELDS.items():
+            if changes.get(field) is not None:
+                fields[field] = (SET, float(changes[field]))
+            delta = changes.get(delta_name)
+            if delta:
+                mode, value = fields.get(field, (ADD, 0.0))
+                fields[field] = (mode, value + float(delta))
+
+        if len(self._pending) >= self.max_pending:
+            asyncio.get_running_loop().create_task(self.flush())
+
+    async def _write_rows(self, chunk) -> int:
+        """Write a chunk one row per savepoint, dropping the rows the columns reject"""
+        updated = 0
+        async with async_engine.begin() as conn:
+            for item in chunk:
+                try:
+                    async with conn.begin_nested():
+                        statement, params = _build_update([item])
+                        updated += (await conn.execute(statement, params)).rowcount
+                except DataError as e:
+                    self.failed_rows += 1
+                    logger.error(f"Dropped layout update for task {item[0]} (organization {item[1][0]}): {e}")
+        return updated
+
+    async def flush(self) -> int:
+        """Write all pending geometry, one transaction per chunk; returns rows updated"""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            pending, self._pending = self._pending, {}
+
+            items = sorted(pending.items(), key=lambda item: (item[1][0], item[0]))
+            started = time.perf_counter()
+            updated = 0
+            # Chunked to stay under the driver's bind-parameter limit
+            for start in range(0, len(items), FLUSH_CHUNK_ROWS):
+                chunk = items[start:start + FLUSH_CHUNK_ROWS]
+                try:
+                    try:
+                        async with async_engine.begin() as conn:
+                            statement, params = _build_update(chunk)
+                            updated += (await conn.execute(statement, params)).rowcount
+                    except DataError:
+                        updated += await self._write_rows(chunk)
+                except Exception as e:
+                    unwritten = dict(items[start:])
+                    self.failed_attempts += 1
+                    if self.failed_attempts < FLUSH_MAX_ATTEMPTS:
+                        self._restore(unwritten)
+                        logger.warning(f"Failed to flush {len(unwritten)} layout updates, kept for retry: {e}")
+                    else:
+                        self.failed_attempts = 0
+                        self.failed_rows += len(unwritten)
+                        logger.error(f"Failed to flush {len(unwritten)} layout updates, dropped: {e}")
+                    self.rows_written += updated
+                    return updated
+            self.failed_attempts = 0
+            self.last_flush_ms = (time.perf_counter() - started) * 1000
+            self.flushes += 1
+            self.rows_written += updated
+            return updated
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "pending": len(self._pending),
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "failed_rows": self.failed_rows,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+        }
+
+
+layout_coalescer = LayoutCoalescer(
+    flush_interval_ms=settings.LAYOUT_FLUSH_INTERVAL_MS,
+    max_pending=settings.LAYOUT_MAX_PENDING,
+)
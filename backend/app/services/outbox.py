@@ -0,0 +1,171 @@
+"""Task outbox consumers for the pipeline
+
+Every task change writes a task_outbox row in its own transaction (triggers
+from migration 0012). A consumer reads the outbox in three steps:
+
+1. plan_claims() locks the consumer row, takes the current transaction
+   horizon (pg_snapshot_xmin: every older transaction has finished, so no
+   row below it can still appear) and splits the rows between the stored
+   watermark and that horizon into disjoint id ranges of at most
+   OUTBOX_CLAIM_EVENTS rows. The claims and the new watermark commit
+   together, so each event lands in exactly one claim.
+2. process_claim() runs one claim: it locks the claim row (SKIP LOCKED, so
+   workers never wait on each other), hands the events to the consumer's
+   handler and marks the claim done in the same transaction as the
+   handler's writes. A retry of a finished claim finds nothing to do, and a
+   failure rolls back both, leaving the claim pending.
+3. stale_claims() finds pending claims whose worker never reported back, for
+   the dispatcher to send again.
+
+Handlers are registered with @outbox_consumer(name) and receive the open
+connection and the claim's events in id order.
+"""
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine, Row
+
+OUTBOX_CLAIM_EVENTS = 5000
+CLAIM_RETRY_AFTER = timedelta(minutes=10)
+COMPACT_BATCH_SIZE = 10000
+
+OUTBOX_HANDLERS: Dict[str, Callable[[Connection, Sequence[Row]], None]] = {}
+
+
+class UnknownConsumer(ValueError):
+    """The consumer has no outbox_consumers row (yet: rollups registers on its first rebuild)"""
+
+
+def outbox_consumer(name: str):
+    """Register a handler for a consumer (its outbox_consumers row must exist)"""
+    def register(handler):
+        OUTBOX_HANDLERS[name] = handler
+        return handler
+    return register
+
+
+def plan_claims(engine: Engine, consumer: str, claim_events: int = OUTBOX_CLAIM_EVENTS) -> List[int]:
+    """Claim everything new since the consumer's watermark; returns the new claim ids"""
+    with engine.begin() as conn:
+        # Serializes planners for this consumer; the lock is held for one short query
+        low = conn.execute(text("""
+            SELECT watermark::text FROM outbox_consumers WHERE name = :consumer FOR UPDATE
+        """), {"consumer": consumer}).scalar()
+        if low is None:
+            raise UnknownConsumer(f"Unknown outbox consumer: {consumer}")
+        high = conn.execute(text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text")).scalar()
+        if int(high) <= int(low):
+            return []
+
+        claim_ids = conn.execute(text("""
+            INSERT INTO outbox_claims (consumer, low_txid, high_txid, first_id, last_id)
+            SELECT :consumer, CAST(:low AS xid8), CAST(:high AS xid8), min(id), max(id)
+            FROM (
+                SELECT id, (row_number() OVER (ORDER BY id) - 1) / :claim_events AS bucket
+                FROM task_outbox
+                WHERE txid >= CAST(:low AS xid8) AND txid < CAST(:high AS xid8)
+            ) window_rows
+            GROUP BY bucket
+            ORDER BY bucket
+            RETURNING id
+        """), {"consumer": consumer, "low": low, "high": high, "claim_events": claim_events}).scalars().all()
+
+        conn.execute(text("""
+            UPDATE outbox_consumers SET watermark = CAST(:high AS xid8), updated_at = now()
+            WHERE name = :consumer
+        """), {"consumer": consumer, "high": high})
+        return list(claim_ids)
+
+
+def process_claim(engine: Engine, claim_id: int) -> Optional[int]:
+    """Run one claim's events through its handler; None if it is done or taken"""
+    with engine.begin() as conn:
+        claim = conn.execute(text("""
+            SELECT consumer, low_txid::text AS low, high_txid::text AS high, first_id, last_id
+            FROM outbox_claims
+            WHERE id = :claim_id AND status = 'pending'
+            FOR UPDATE SKIP LOCKED
+        """), {"claim_id": claim_id}).first()
+        if claim is None:
+            return None
+
+        # The txid bounds matter: a range can interleave with rows of later windows
+        events = conn.execute(text("""
+            SELECT id, organization_id, project_id, task_id, event_type, payload, created_at
+            FROM task_outbox
+            WHERE id BETWEEN :first_id AND :last_id
+              AND txid >= CAST(:low AS xid8) AND txid < CAST(:high AS xid8)
+            ORDER BY id
+        """), {"first_id": claim.first_id, "last_id": claim.last_id, "low": claim.low, "high": claim.high}).all()
+
+        OUTBOX_HANDLERS[claim.consumer](conn, events)
+
+        conn.execute(text("""
+            UPDATE outbox_claims SET status = 'done', events = :events, processed_at = now()
+            WHERE id = :claim_id
+        """), {"claim_id": claim_id, "events": len(events)})
+        return len(events)
+
+
+def stale_claims(engine: Engine, consumer: str, older_than: timedelta = CLAIM_RETRY_AFTER) -> List[int]:
+    """Pending claims old enough that their worker has probably been lost"""
+    with engine.connect() as conn:
+        return list(conn.execute(text("""
+            SELECT id FROM outbox_claims
+            WHERE consumer = :consumer AND status = 'pending' AND created_at < now() - :older_than
+            ORDER BY id
+        """), {"consumer": consumer, "older_than": older_than}).scalars().all())
+
+
+def compact_outbox(engine: Engine, cutoff: datetime, batch_size: int = COMPACT_BATCH_SIZE) -> Dict[str, int]:
+    """Delete outbox rows and finished claims older than cutoff
+
+    Rows above the slowest consumer's watermark are kept whatever their age.
+    """
+    removed = {"events": 0, "claims": 0}
+    while True:
+        with engine.begin() as conn:
+            count = conn.execute(text("""
+                DELETE FROM task_outbox
+                WHERE id IN (
+                    SELECT id FROM task_outbox
+                    WHERE created_at < :cutoff
+                      AND txid < (SELECT coalesce(min(watermark), '0') FROM outbox_consumers)
+                    LIMIT :batch_size
+                )
+            """), {"cutoff": cutoff, "batch_size": batch_size}).rowcount
+        removed["events"] += count
+        if count < batch_size:
+            break
+    with engine.begin() as conn:
+        removed["claims"] = conn.execute(text("""
+            DELETE FROM outbox_claims WHERE status = 'done' AND processed_at < :cutoff
+        """), {"cutoff": cutoff}).rowcount
+    return removed
+
+
+@outbox_consumer("analytics")
+def count_analytics_events(conn: Connection, events: Sequence[Row]) -> None:
+    """Add the claim's events to analytics_event_counts (per organization, day and type)"""
+    counts: Dict[tuple, int] = {}
+    for event in events:
+        key = (event.organization_id, event.created_at.date(), event.event_type)
+        counts[key] = counts.get(key, 0) + 1
+    if not counts:
+        return
+    keys = sorted(counts)
+    # Sorted keys: concurrent claims touching the same rows lock them in the same order
+    conn.execute(text("""
+        INSERT INTO analytics_event_counts AS c (organization_id, day, event_type, count)
+        SELECT organization_id, day, event_type, n
+        FROM unnest(CAST(:orgs AS integer[]), CAST(:days AS date[]), CAST(:types AS text[]), CAST(:counts AS bigint[]))
+            AS t(organization_id, day, event_type, n)
+        WHERE EXISTS (SELECT 1 FROM organizations o WHERE o.id = t.organization_id)
+        ON CONFLICT (organization_id, day, event_type) DO UPDATE SET count = c.count + EXCLUDED.count
+    """), {
+        "orgs": [key[0] for key in keys],
+        "days": [key[1] for key in keys],
+        "types": [key[2] for key in keys],
+        "counts": [counts[key] for key in keys],
+    })
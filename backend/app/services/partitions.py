@@ -0,0 +1,132 @@
+"""Monthly range partitions for analytics_events
+
+Partitions are named analytics_events_yYYYYmMM and cover
+[first day of month, first day of next month). The pipeline creates them
+ahead of time and enforces retention by detaching and dropping whole months,
+which is constant time regardless of how many rows a month holds.
+
+Events for a month with no partition (the pipeline was down for longer than
+it creates ahead) land in the DEFAULT partition instead of failing the
+insert. ensure_monthly_partitions() also creates the months found there and
+moves their rows in, so the default partition stays empty.
+"""
+import re
+from datetime import date, datetime, timezone
+from typing import List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+PARENT_TABLE = "analytics_events"
+PARTITION_PATTERN = re.compile(rf"^{PARENT_TABLE}_y(\d{{4}})m(\d{{2}})$")
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def has_default_partition(conn: Connection) -> bool:
+    return conn.execute(text("SELECT to_regclass(:name)"), {"name": DEFAULT_PARTITION}).scalar() is not None
+
+
+def create_month_partition(conn: Connection, month: date) -> bool:
+    """Create the partition for a month; returns False if it already existed
+
+    The month's rows in the default partition are moved into it: a partition
+    cannot be added while the default one holds rows in its range, so they
+    go into a plain table that is then attached.
+    """
+    name = partition_name(month)
+    exists = conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar()
+    if exists:
+        return False
+    bounds = f"FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    in_month = "created_at >= CAST(:lower AS timestamptz) AND created_at < CAST(:upper AS timestamptz)"
+    params = {"lower": month.isoformat(), "upper": add_months(month, 1).isoformat()}
+
+    stray = has_default_partition(conn) and conn.execute(
+        text(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_month})"), params
+    ).scalar()
+    if not stray:
+        conn.execute(text(f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} FOR VALUES {bounds}"))
+        return True
+
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    conn.execute(text(f"""
+        WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE {in_month} RETURNING *)
+        INSERT INTO {name} SELECT * FROM moved
+    """), params)
+    conn.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} FOR VALUES {bounds}"))
+    return True
+
+
+def default_partition_months(conn: Connection) -> List[date]:
+    """Months that have rows in the default partition"""
+    if not has_default_partition(conn):
+        return []
+    return list(conn.execute(text(
+        f"SELECT DISTINCT date_trunc('month', created_at)::date FROM {DEFAULT_PARTITION}"
+    )).scalars())
+
+
+def ensure_monthly_partitions(conn: Connection, months_ahead: int = 3, start: date | None = None) -> List[str]:
+    """Make sure partitions exist from `start` (default: this month) through months_ahead
+
+    Also creates the month of every row left in the default partition, which
+    empties it.
+    """
+    first = month_start(start or datetime.now(timezone.utc).date())
+    last = add_months(month_start(datetime.now(timezone.utc).date()), months_ahead)
+    months = set(default_partition_months(conn))
+    month = first
+    while month <= last:
+        months.add(month)
+        month = add_months(month, 1)
+    created = []
+    for month in sorted(months):
+        if create_month_partition(conn, month):
+            created.append(partition_name(month))
+    return created
+
+
+def list_monthly_partitions(conn: Connection) -> List[Tuple[str, date]]:
+    """Attached partitions of analytics_events with the month each one covers"""
+    names = conn.execute(text("""
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = CAST(:parent AS regclass)
+    """), {"parent": PARENT_TABLE}).scalars()
+    partitions = []
+    for name in names:
+        match = PARTITION_PATTERN.match(name)
+        if match:
+            partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+def drop_partitions_before(engine: Engine, cutoff: datetime) -> List[str]:
+    """Detach and drop every partition whose whole month ends at or before cutoff
+
+    Each partition is detached CONCURRENTLY (no lock on the parent for
+    writers) and then dropped, so this runs outside a transaction block.
+    """
+    dropped = []
+    with engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        for name, month in list_monthly_partitions(conn):
+            if add_months(month, 1) > cutoff.date():
+                continue
+            conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name} CONCURRENTLY"))
+            conn.execute(text(f"DROP TABLE {name}"))
+            dropped.append(name)
+    return dropped
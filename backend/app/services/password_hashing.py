@@ -0,0 +1,94 @@
+"""Password hashing pool - keeps bcrypt off the event loop and the AnyIO threadpool
+
+bcrypt costs ~250ms of CPU per call. Running it in request handlers lets a
+login burst occupy every threadpool slot, so it is executed in a dedicated
+process pool sized to the machine's cores. Callers beyond the admission limit
+are rejected instead of queueing without bound.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict
+
+import bcrypt
+
+from app.config import settings
+
+
+def bcrypt_hash(password: str) -> str:
+    """Hash a password with a fresh salt (runs in a pool process)"""
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+
+
+def bcrypt_check(plain_password: str, hashed_password: str) -> bool:
+    """Check a password against a bcrypt hash (runs in a pool process)"""
+    return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
+
+
+class HashingPoolOverloaded(Exception):
+    """Raised when more hashing calls are pending than the admission limit allows"""
+
+
+class HashingPool:
+    """Bounded process pool for bcrypt with queue-depth accounting"""
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: never fork a server process that already runs threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self.in_flight >= self.workers + self.max_pending:
+            self.rejected += 1
+            raise HashingPoolOverloaded()
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+
+    async def hash_password(self, password: str) -> str:
+        return await self.run(bcrypt_hash, password)
+
+    async def check_password(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(bcrypt_check, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "queue_depth": max(self.in_flight - self.workers, 0),
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+hashing_pool = HashingPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
@@ -0,0 +1,156 @@
+"""Principal cache - avoids a users-table lookup on every authenticated request
+
+Resolved principals are kept as small detached snapshots in a bounded,
+TTL'd in-process LRU keyed by user id. Every worker subscribes to a Redis
+channel so that a change to a user in one worker evicts the snapshot in all
+of them; the TTL bounds staleness if Redis is unavailable.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import redis
+
+from app.config import settings
+from app.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "taskflow:principal-invalidate"
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Lightweight, session-independent snapshot of an authenticated user"""
+    id: int
+    organization_id: int
+    is_active: bool
+    is_admin: bool
+
+
+class PrincipalCache:
+    """Bounded LRU cache of principals with per-entry expiry"""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, tuple[float, Principal]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, user_id: int) -> Optional[Principal]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, principal: Principal) -> None:
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._entries[principal.id] = (expires_at, principal)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def evict(self, user_id: int) -> None:
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+
+def invalidate_principal(user_id: int) -> None:
+    """Evict a user locally and tell every other worker to do the same"""
+    principal_cache.evict(user_id)
+    try:
+        get_redis().publish(INVALIDATION_CHANNEL, str(user_id))
+    except redis.RedisError as e:
+        # Other workers fall back to TTL expiry
+        logger.warning(f"Failed to publish principal invalidation for user {user_id}: {e}")
+
+
+class InvalidationListener:
+    """Background thread applying invalidations published by other workers"""
+
+    def __init__(self, cache: PrincipalCache):
+        self.cache = cache
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="principal-invalidation", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            pubsub = None
+            try:
+                client = redis.Redis.from_url(settings.REDIS_URL)
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Anything published while we were disconnected was missed
+                self.cache.clear()
+                while not self._stop.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is None:
+                        continue
+                    try:
+                        self.cache.evict(int(message["data"]))
+                    except (TypeError, ValueError):
+                        logger.warning(f"Ignoring malformed principal invalidation: {message!r}")
+            except redis.RedisError as e:
+                logger.warning(f"Principal invalidation listener disconnected: {e}")
+                self._stop.wait(5)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except redis.RedisError:
+                        pass
+
+
+invalidation_listener = InvalidationListener(principal_cache)
@@ -0,0 +1,338 @@
+"""Daily task rollups maintained from the task outbox
+
+A task contributes to the rollups through its current state only:
+
+- on its created day (UTC): tasks_created, its status and priority counts,
+  its price under that status and priority, and, once done, its completion
+  time (completion_seconds_sum / completion_count)
+- on its completed day, while done: tasks_completed
+
+Every outbox event therefore maps to an exact delta, contribution(after)
+minus contribution(before), which the "rollups" outbox consumer adds to
+daily_project_rollups, daily_org_rollups and org_rollup_totals in the
+claim's transaction. Reopening a task, moving it to another project or
+deleting it takes back exactly what it added.
+
+Readers add a live delta on top: the events the consumer has not folded in
+yet (above its watermark, or in a pending claim). They are read in the same
+statement as the rollup rows, so each event is counted exactly once, and a
+read costs one day row per day in the window plus the outbox lag,
+regardless of how much history the organization has.
+
+rebuild_rollups() recomputes everything from tasks and registers the
+consumer; run it once after migrating, or to repair the tables.
+"""
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import orjson
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Connection, Engine, Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import DailyOrgRollup, DailyProjectRollup, OrgRollupTotal, TaskPriority, TaskStatus
+from app.services.outbox import outbox_consumer
+
+CONSUMER = "rollups"
+
+DIMENSIONS = (("status", TaskStatus), ("priority", TaskPriority))
+MEASURES = tuple(
+    ["tasks_created", "tasks_completed", "completion_seconds_sum", "completion_count"]
+    + [
+        f"{measure}_{dimension}_{value.value}"
+        for dimension, values in DIMENSIONS
+        for value in values
+        for measure in ("tasks", "priced", "price")
+    ]
+)
+
+# (org id, project id, day) -> measure -> delta
+Deltas = Dict[Tuple[int, int, date], Dict[str, Any]]
+
+
+def _timestamp(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _utc_day(value: datetime) -> date:
+    return value.astimezone(timezone.utc).date()
+
+
+def _enum_value(enum_type, label: Optional[str]) -> Optional[str]:
+    """Outbox payloads hold enum labels as stored (TODO, IN_PROGRESS, ...)"""
+    return enum_type[label].value if label else None
+
+
+def contribution(state: Dict[str, Any]) -> List[Tuple[date, Dict[str, Any]]]:
+    """The (day, measures) a task in this state adds to its organization and project"""
+    created_at = _timestamp(state["created_at"])
+    completed_at = _timestamp(state.get("completed_at"))
+    price = state.get("price")
+    measures: Dict[str, Any] = {"tasks_created": 1}
+    for dimension, enum_type in DIMENSIONS:
+        value = _enum_value(enum_type, state.get(dimension))
+        if value is None:
+            continue
+        measures[f"tasks_{dimension}_{value}"] = 1
+        if price is not None:
+            measures[f"priced_{dimension}_{value}"] = 1
+            measures[f"price_{dimension}_{value}"] = Decimal(str(price))
+
+    days = [(_utc_day(created_at), measures)]
+    if state.get("status") == TaskStatus.DONE.name and completed_at is not None:
+        elapsed = completed_at - created_at
+        measures["completion_seconds_sum"] = (
+            Decimal(elapsed.days * 86400 + elapsed.seconds) + Decimal(elapsed.microseconds) / 1000000
+        )
+        measures["completion_count"] = 1
+        days.append((_utc_day(completed_at), {"tasks_completed": 1}))
+    return days
+
+
+def add_event(deltas: Deltas, event_type: str, payload: Dict[str, Any], organization_id: int, project_id: int) -> None:
+    """Add one outbox event's effect to deltas"""
+    if event_type == "task_deleted":
+        before, after = payload, None
+    else:
+        before, after = payload.get("old"), payload
+    # Events written before migration 0014 carry no ids; fall back to the row's
+    for sign, state in ((-1, before), (1, after)):
+        if state is None:
+            continue
+        key_org = state.get("organization_id", organization_id)
+        key_project = state.get("project_id", project_id)
+        for day, measures in contribution(state):
+            bucket = deltas.setdefault((key_org, key_project, day), {})
+            for measure, value in measures.items():
+                bucket[measure] = bucket.get(measure, 0) + sign * value
+
+
+def _merge(target: Dict[Any, Dict[str, Any]], key, measures: Dict[str, Any]) -> None:
+    bucket = target.setdefault(key, {})
+    for measure, value in measures.items():
+        bucket[measure] = bucket.get(measure, 0) + value
+
+
+def apply_deltas(conn: Connection, deltas: Deltas) -> None:
+    """Add deltas to the three rollup tables (sorted keys, so concurrent claims lock rows in one order)"""
+    by_project: Dict[Tuple[int, date], Dict[str, Any]] = {}
+    by_org: Dict[Tuple[int, date], Dict[str, Any]] = {}
+    totals: Dict[int, Dict[str, Any]] = {}
+    organizations: Dict[int, int] = {}
+    for (org_id, project_id, day), measures in deltas.items():
+        if not any(measures.values()):
+            continue
+        _merge(by_project, (project_id, day), measures)
+        organizations[project_id] = org_id
+        _merge(by_org, (org_id, day), measures)
+        _merge(totals, org_id, measures)
+
+    def upsert(table, keys: List[str], rows: List[Dict[str, Any]]) -> None:
+        if not rows:
+            return
+        statement = pg_insert(table).values(rows)
+        existing = statement.table.c
+        conn.execute(statement.on_conflict_do_update(
+            index_elements=keys,
+            set_={measure: existing[measure] + statement.excluded[measure] for measure in MEASURES},
+        ))
+
+    def rows(keyed, names):
+        return [
+            {**dict(zip(names, key if isinstance(key, tuple) else (key,))), **{m: 0 for m in MEASURES}, **measures}
+            for key, measures in sorted(keyed.items())
+        ]
+
+    # Deltas for deleted organizations or projects are dropped; their rows went with them
+    live_orgs = set(conn.execute(text("SELECT id FROM organizations WHERE id = ANY(:ids)"),
+                                 {"ids": list(totals)}).scalars().all()) if totals else set()
+    live_projects = set(conn.execute(text("SELECT id FROM projects WHERE id = ANY(:ids)"),
+                                     {"ids": list(organizations)}).scalars().all()) if organizations else set()
+
+    project_rows = [
+        {**row, "organization_id": organizations[row["project_id"]]}
+        for row in rows(by_project, ("project_id", "day")) if row["project_id"] in live_projects
+    ]
+    upsert(DailyProjectRollup.__table__, ["project_id", "day"], project_rows)
+    upsert(DailyOrgRollup.__table__, ["organization_id", "day"],
+           [row for row in rows(by_org, ("organization_id", "day")) if row["organization_id"] in live_orgs])
+    upsert(OrgRollupTotal.__table__, ["organization_id"],
+           [row for row in rows(totals, ("organization_id",)) if row["organization_id"] in live_orgs])
+
+
+@outbox_consumer(CONSUMER)
+def fold_rollup_events(conn: Connection, events: Iterable[Row]) -> None:
+    deltas: Deltas = {}
+    for event in events:
+        add_event(deltas, event.event_type, event.payload, event.organization_id, event.project_id)
+    apply_deltas(conn, deltas)
+
+
+def _measure_sums() -> str:
+    """SELECT list summing every measure for the tasks matching condition (created-day measures)"""
+    done = "status = 'DONE' AND completed_at IS NOT NULL"
+    parts = [
+        "count(*) AS tasks_created",
+        "0 AS tasks_completed",
+        f"coalesce(sum(extract(epoch FROM completed_at - created_at)) FILTER (WHERE {done}), 0) AS completion_seconds_sum",
+        f"count(*) FILTER (WHERE {done}) AS completion_count",
+    ]
+    for dimension, values in DIMENSIONS:
+        for value in values:
+            match = f"{dimension} = '{value.name}'"
+            parts += [
+                f"count(*) FILTER (WHERE {match}) AS tasks_{dimension}_{value.value}",
+                f"count(price) FILTER (WHERE {match}) AS priced_{dimension}_{value.value}",
+                f"coalesce(sum(price) FILTER (WHERE {match}), 0) AS price_{dimension}_{value.value}",
+            ]
+    return ", ".join(parts)
+
+
+def rebuild_rollups(engine: Engine) -> Dict[str, int]:
+    """Recompute all rollups from tasks and (re)start the consumer from this snapshot
+
+    Runs in one REPEATABLE READ transaction. The consumer's watermark becomes
+    the snapshot's horizon; events above it that the snapshot already sees
+    are subtracted here, since the consumer will add them again. A claim
+    folded concurrently makes the transaction fail with a serialization
+    error; run it again.
+    """
+    sums = ", ".join(f"sum({measure}) AS {measure}" for measure in MEASURES)
+    columns = ", ".join(MEASURES)
+    completed_zeros = ", ".join(
+        "count(*)" if measure == "tasks_completed" else "0" for measure in MEASURES
+    )
+    with engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="REPEATABLE READ")
+        with conn.begin():
+            horizon = conn.execute(text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text")).scalar()
+            conn.execute(text("DELETE FROM outbox_claims WHERE consumer = :consumer"), {"consumer": CONSUMER})
+            conn.execute(text("""
+                INSERT INTO outbox_consumers (name, watermark) VALUES (:consumer, CAST(:horizon AS xid8))
+                ON CONFLICT (name) DO UPDATE SET watermark = EXCLUDED.watermark, updated_at = now()
+            """), {"consumer": CONSUMER, "horizon": horizon})
+            for table in ("org_rollup_totals", "daily_org_rollups", "daily_project_rollups"):
+                conn.execute(text(f"DELETE FROM {table}"))
+
+            conn.execute(text(f"""
+                INSERT INTO daily_project_rollups (project_id, day, organization_id, {columns})
+                SELECT project_id, day, min(organization_id), {sums}
+                FROM (
+                    SELECT project_id, (created_at AT TIME ZONE 'UTC')::date AS day, min(organization_id) AS organization_id,
+                           {_measure_sums()}
+                    FROM tasks GROUP BY 1, 2
+                    UNION ALL
+                    SELECT project_id, (completed_at AT TIME ZONE 'UTC')::date, min(organization_id), {completed_zeros}
+                    FROM tasks WHERE status = 'DONE' AND completed_at IS NOT NULL GROUP BY 1, 2
+                ) parts
+                GROUP BY project_id, day
+            """))
+            projects = conn.execute(text(f"""
+                INSERT INTO daily_org_rollups (organization_id, day, {columns})
+                SELECT organization_id, day, {sums} FROM daily_project_rollups GROUP BY 1, 2
+            """)).rowcount
+            conn.execute(text(f"""
+                INSERT INTO org_rollup_totals (organization_id, {columns})
+                SELECT organization_id, {sums} FROM daily_org_rollups GROUP BY 1
+            """))
+
+            deltas: Deltas = {}
+            visible = conn.execute(text("""
+                SELECT event_type, payload, organization_id, project_id FROM task_outbox
+                WHERE txid >= CAST(:horizon AS xid8)
+            """), {"horizon": horizon}).all()
+            for event in visible:
+                add_event(deltas, event.event_type, event.payload, event.organization_id, event.project_id)
+            apply_deltas(conn, {key: {m: -v for m, v in measures.items()} for key, measures in deltas.items()})
+            return {"org_days": projects, "pending_events": len(visible)}
+
+
+# Two disjoint branches, each bounded by the outbox lag: events above the
+# watermark (an index range on ix_task_outbox_org_txid), and events of pending
+# claims, which all sit below it (id ranges on the primary key)
+PENDING_EVENTS_SQL = """
+    SELECT 'event' AS kind, jsonb_build_object(
+        'event_type', o.event_type, 'payload', o.payload,
+        'organization_id', o.organization_id, 'project_id', o.project_id
+    ) AS data
+    FROM outbox_consumers c
+    JOIN task_outbox o ON o.organization_id = :organization_id AND o.txid >= c.watermark
+    WHERE c.name = :consumer
+    UNION ALL
+    SELECT 'event', jsonb_build_object(
+        'event_type', o.event_type, 'payload', o.payload,
+        'organization_id', o.organization_id, 'project_id', o.project_id
+    )
+    FROM outbox_claims cl
+    JOIN task_outbox o
+      ON o.id BETWEEN cl.first_id AND cl.last_id
+     AND o.txid >= cl.low_txid AND o.txid < cl.high_txid
+    WHERE cl.consumer = :consumer AND cl.status = 'pending'
+      AND o.organization_id = :organization_id
+"""
+
+
+async def read_rollups(
+    db: AsyncSession,
+    organization_id: int,
+    from_day: date,
+    project_id: Optional[int] = None,
+) -> Optional[Tuple[Dict[date, Dict[str, float]], Dict[str, float]]]:
+    """Daily measures from from_day on and all-time totals, live events included
+
+    Totals are the organization's (empty for a project). Returns None if
+    the rollups have not been built yet.
+    """
+    if project_id is None:
+        rollups_sql = """
+            SELECT 'day' AS kind, to_jsonb(r) AS data FROM daily_org_rollups r
+            WHERE r.organization_id = :organization_id AND r.day >= :from_day
+            UNION ALL
+            SELECT 'totals', to_jsonb(t) FROM org_rollup_totals t WHERE t.organization_id = :organization_id
+        """
+    else:
+        rollups_sql = """
+            SELECT 'day' AS kind, to_jsonb(r) AS data FROM daily_project_rollups r
+            WHERE r.project_id = :project_id AND r.organization_id = :organization_id AND r.day >= :from_day
+        """
+    # One statement, one snapshot: an event is either folded into a row read here or still pending
+    result = await db.execute(
+        text(f"""
+            SELECT 'consumer' AS kind, NULL::jsonb AS data FROM outbox_consumers WHERE name = :consumer
+            UNION ALL {rollups_sql}
+            UNION ALL {PENDING_EVENTS_SQL}
+        """),
+        {"consumer": CONSUMER, "organization_id": organization_id, "project_id": project_id, "from_day": from_day},
+    )
+
+    daily: Dict[date, Dict[str, float]] = {}
+    totals: Dict[str, float] = {}
+    deltas: Deltas = {}
+    registered = False
+    for kind, data in result:
+        if kind == "consumer":
+            registered = True
+            continue
+        if isinstance(data, (str, bytes)):
+            data = orjson.loads(data)
+        if kind == "event":
+            add_event(deltas, data["event_type"], data["payload"], data["organization_id"], data["project_id"])
+        elif kind == "totals":
+            totals = {measure: float(data[measure]) for measure in MEASURES}
+        else:
+            daily[date.fromisoformat(data["day"])] = {measure: float(data[measure]) for measure in MEASURES}
+    if not registered:
+        return None
+
+    for (org_id, key_project, day), measures in deltas.items():
+        if org_id != organization_id or (project_id is not None and key_project != project_id):
+            continue
+        measures = {measure: float(value) for measure, value in measures.items()}
+        if project_id is None:
+            for measure, value in measures.items():
+                totals[measure] = totals.get(measure, 0.0) + value
+        if day >= from_day:
+            _merge(daily, day, measures)
+    return daily, totals
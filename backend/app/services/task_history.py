@@ -0,0 +1,262 @@
+"""Task history: compact field-level diffs and point-in-time reconstruction
+
+Activity log rows hold only what a change touched. For an update, old_value
+and new_value map each changed field to its previous and new value; fields
+sent but left unchanged are dropped. A creation logs the full initial state
+in new_value. Values are stored in one JSON-native form per field
+(HISTORY_FIELDS): enums by value, datetimes as UTC ISO 8601, numbers as
+numbers. The field's type says how to read a value back, so no per-value
+type tags are needed.
+
+Entries are ordered by (task_version, id): the task's version right after
+the change, then log order. Versions follow commit order, while log order
+does not: buffered entries (app.services.activity_buffer) can land after
+entries for later changes that were written directly.
+
+A task's state at a point in time is its latest snapshot (task_snapshots) at
+or before that point with the later diffs applied in version order. A
+snapshot is written in the activity writer's transaction whenever a task has
+SNAPSHOT_EVERY diffs since its last one. A rebuild therefore reads one
+snapshot and a bounded number of log rows, however long the history is.
+
+A snapshot never covers a missing version logged less than
+SNAPSHOT_GAP_GRACE ago, since its entry may still be in the buffer and
+would land behind the snapshot. Older gaps are changes that were never
+logged (a referenced user or project deleted, say) and are skipped.
+
+Tasks with no creation entry (imported, or logged before this format)
+have no history before their first snapshot.
+"""
+import enum
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from sqlalchemy import insert, select, func, or_, true, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import TaskActivityLog, TaskPriority, TaskSnapshot, TaskStatus
+
+SNAPSHOT_EVERY = 50
+SNAPSHOT_GAP_GRACE = timedelta(hours=1)
+
+# field -> stored kind; board geometry is not history (see LAYOUT_FIELDS)
+HISTORY_FIELDS = {
+    "title": "str",
+    "description": "str",
+    "status": "enum",
+    "priority": "enum",
+    "project_id": "int",
+    "assignee_id": "int",
+    "due_date": "datetime",
+    "completed_at": "datetime",
+    "estimated_hours": "float",
+    "actual_hours": "float",
+    "price": "float",
+    "tags": "list",
+    "extra_data": "json",
+    "is_archived": "bool",
+}
+
+ENUM_TYPES = {"status": TaskStatus, "priority": TaskPriority}
+
+# What a creation entry leaves unset starts from the column defaults
+DEFAULT_STATE = {
+    **{field: None for field in HISTORY_FIELDS},
+    "status": TaskStatus.TODO.value,
+    "priority": TaskPriority.MEDIUM.value,
+    "tags": [],
+    "extra_data": {},
+    "is_archived": False,
+}
+
+
+def encode_value(field: str, value: Any) -> Any:
+    if value is None:
+        return None
+    kind = HISTORY_FIELDS[field]
+    if kind == "enum":
+        return value.value if isinstance(value, enum.Enum) else str(value)
+    if kind == "datetime" and isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value.isoformat()
+    if kind == "float":
+        return float(value)
+    if kind == "list":
+        return list(value)
+    return value
+
+
+def decode_value(field: str, value: Any) -> Any:
+    if value is None:
+        return None
+    kind = HISTORY_FIELDS[field]
+    if kind == "enum":
+        enum_type = ENUM_TYPES[field]
+        try:
+            return enum_type(value)
+        except ValueError:
+            # Entries written before values were normalized may hold names
+            return enum_type[value]
+    if kind == "datetime":
+        return datetime.fromisoformat(value)
+    return value
+
+
+def encode_task_state(task: Mapping[str, Any]) -> Dict[str, Any]:
+    """Every history field of a task dict, encoded (the payload of a creation entry)"""
+    return {field: encode_value(field, task.get(field)) for field in HISTORY_FIELDS}
+
+
+def encode_task_diff(
+    before: Mapping[str, Any], changes: Mapping[str, Any]
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """(old_value, new_value) holding only the fields whose value actually changes"""
+    old_value, new_value = {}, {}
+    for field, value in changes.items():
+        if field not in HISTORY_FIELDS:
+            continue
+        new = encode_value(field, value)
+        old = encode_value(field, before.get(field))
+        if new != old:
+            old_value[field] = old
+            new_value[field] = new
+    return old_value, new_value
+
+
+def decode_task_state(state: Mapping[str, Any]) -> Dict[str, Any]:
+    return {field: decode_value(field, state.get(field)) for field in HISTORY_FIELDS}
+
+
+def apply_entry(state: Optional[Dict[str, Any]], action: str, new_value: Optional[Dict[str, Any]]):
+    """State after one log entry; None while no creation entry or snapshot has been seen"""
+    new_value = {k: v for k, v in (new_value or {}).items() if k in HISTORY_FIELDS}
+    if action == "created":
+        return {**DEFAULT_STATE, **new_value}
+    if state is None:
+        return None
+    return {**state, **new_value}
+
+
+def replay_entries(
+    state: Optional[Dict[str, Any]],
+    position: Optional[Tuple[int, int]],
+    entries: Iterable[Any],
+    settled_before: Optional[datetime] = None,
+) -> Tuple[Optional[Dict[str, Any]], Optional[Tuple[int, int]]]:
+    """Apply entries (in (task_version, id) order) to state at position
+
+    With settled_before, stop at the first entry that follows a gap in the
+    version sequence and was logged at or after settled_before: the missing
+    versions may still be on their way.
+    """
+    for entry in entries:
+        if (
+            settled_before is not None
+            and position is not None
+            and 0 < position[0] < entry.task_version - 1
+            and entry.created_at >= settled_before
+        ):
+            break
+        state = apply_entry(state, entry.action, entry.new_value)
+        position = (entry.task_version, entry.id)
+    return state, position
+
+
+async def _latest_snapshot(db: AsyncSession, task_id: int, upto: Optional[Tuple[int, int]]):
+    query = select(TaskSnapshot).where(TaskSnapshot.task_id == task_id)
+    if upto is not None:
+        query = query.where(tuple_(TaskSnapshot.task_version, TaskSnapshot.activity_id) <= tuple_(*upto))
+    query = query.order_by(TaskSnapshot.task_version.desc(), TaskSnapshot.activity_id.desc()).limit(1)
+    return (await db.execute(query)).scalars().first()
+
+
+async def rebuild_task_state(
+    db: AsyncSession,
+    task_id: int,
+    as_of: Optional[datetime] = None,
+    upto: Optional[Tuple[int, int]] = None,
+    settled_before: Optional[datetime] = None,
+) -> Tuple[Optional[Dict[str, Any]], Optional[Tuple[int, int]]]:
+    """Encoded state after the entries logged at or before as_of (or up to the (task_version, id) bound upto)
+
+    Returns (state, position of the last entry applied); state is None when
+    the task has no reconstructible history at that point. settled_before
+    is passed to replay_entries().
+    """
+    position_key = tuple_(TaskActivityLog.task_version, TaskActivityLog.id)
+    if as_of is not None:
+        last = (await db.execute(
+            select(TaskActivityLog.task_version, TaskActivityLog.id)
+            .where(TaskActivityLog.task_id == task_id, TaskActivityLog.created_at <= as_of)
+            .order_by(TaskActivityLog.task_version.desc(), TaskActivityLog.id.desc())
+            .limit(1)
+        )).first()
+        if last is None:
+            return None, None
+        upto = tuple(last)
+    snapshot = await _latest_snapshot(db, task_id, upto)
+    state = dict(snapshot.state) if snapshot else None
+    position = (snapshot.task_version, snapshot.activity_id) if snapshot else None
+
+    query = select(
+        TaskActivityLog.id,
+        TaskActivityLog.task_version,
+        TaskActivityLog.action,
+        TaskActivityLog.new_value,
+        TaskActivityLog.created_at,
+    ).where(TaskActivityLog.task_id == task_id)
+    if position is not None:
+        query = query.where(position_key > tuple_(*position))
+    if upto is not None:
+        query = query.where(position_key <= tuple_(*upto))
+    result = await db.execute(query.order_by(TaskActivityLog.task_version, TaskActivityLog.id))
+    return replay_entries(state, position, result, settled_before)
+
+
+async def take_due_snapshots(db: AsyncSession, task_ids: Iterable[int]) -> int:
+    """Snapshot every task among task_ids with SNAPSHOT_EVERY diffs since its last snapshot"""
+    task_ids = list(set(task_ids))
+    if not task_ids:
+        return 0
+
+    last = (
+        select(TaskSnapshot.task_version, TaskSnapshot.activity_id)
+        .where(TaskSnapshot.task_id == TaskActivityLog.task_id)
+        .order_by(TaskSnapshot.task_version.desc(), TaskSnapshot.activity_id.desc())
+        .limit(1)
+        .lateral()
+    )
+    due = (await db.execute(
+        select(TaskActivityLog.task_id, func.max(last.c.task_version), func.max(last.c.activity_id))
+        .outerjoin(last, true())
+        .where(
+            TaskActivityLog.task_id.in_(task_ids),
+            (last.c.activity_id.is_(None))
+            | (tuple_(TaskActivityLog.task_version, TaskActivityLog.id) > tuple_(last.c.task_version, last.c.activity_id))
+        )
+        .group_by(TaskActivityLog.task_id)
+        .having(
+            func.count() >= SNAPSHOT_EVERY,
+            # Without a base there is nothing to snapshot from
+            or_(func.max(last.c.activity_id).is_not(None), func.bool_or(TaskActivityLog.action == "created"))
+        )
+    )).all()
+
+    settled_before = datetime.now(timezone.utc) - SNAPSHOT_GAP_GRACE
+    snapshots: List[Dict[str, Any]] = []
+    for task_id, *previous in due:
+        state, position = await rebuild_task_state(db, task_id, settled_before=settled_before)
+        # Stopped at a gap before reaching anything new
+        if state is None or position == tuple(previous):
+            continue
+        snapshots.append({
+            "task_id": task_id,
+            "task_version": position[0],
+            "activity_id": position[1],
+            "taken_at": datetime.now(timezone.utc),
+            "state": state,
+        })
+    if snapshots:
+        await db.execute(insert(TaskSnapshot.__table__).values(snapshots))
+    return len(snapshots)
@@ -0,0 +1,60 @@
+"""Task full-text search
+
+Title, description and tags are indexed in the generated tasks.search_vector
+column (title and tags weighted A, description B) under a GIN index that is
+prefixed with organization_id (btree_gin), so a tenant's search never
+touches another tenant's postings.
+
+Every query term is matched as a prefix ("deplo" finds "deployment"). When
+no task matches, the search falls back to trigram word similarity on the
+title, which tolerates typos ("deplyoment").
+"""
+import re
+from typing import Optional
+
+from sqlalchemy import Select, func, literal, literal_column, select
+
+from app.models import Task
+from app.utils.serialization import TASK_COLUMNS
+
+SEARCH_CONFIG = "english"
+MAX_TERMS = 8
+# Minimum pg_trgm word_similarity for the fuzzy fallback
+FUZZY_THRESHOLD = 0.4
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def prefix_tsquery(q: str) -> Optional[str]:
+    """'deploy api' -> 'deploy:* & api:*'; None when q has no searchable terms"""
+    terms = _TERM.findall(q.lower())[:MAX_TERMS]
+    if not terms:
+        return None
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+def full_text_query(organization_id: int, tsquery: str, include_archived: bool = False) -> Select:
+    """Ranked prefix search; rows are TASK_COLUMNS followed by the rank"""
+    query = func.to_tsquery(literal_column(f"'{SEARCH_CONFIG}'::regconfig"), tsquery)
+    rank = func.ts_rank_cd(Task.search_vector, query).label("rank")
+    statement = select(*TASK_COLUMNS, rank).where(
+        Task.organization_id == organization_id,
+        Task.search_vector.op("@@")(query)
+    ).order_by(rank.desc(), Task.id.desc())
+    if not include_archived:
+        statement = statement.where(Task.is_archived == False)
+    return statement
+
+
+def fuzzy_query(organization_id: int, q: str, include_archived: bool = False) -> Select:
+    """Trigram fallback on titles; rows are TASK_COLUMNS followed by the similarity"""
+    similarity = func.word_similarity(q, Task.title).label("rank")
+    statement = select(*TASK_COLUMNS, similarity).where(
+        Task.organization_id == organization_id,
+        # <% is index-assisted by the trigram GIN index; its cutoff is pg_trgm.word_similarity_threshold
+        literal(q).op("<%")(Task.title),
+        similarity >= FUZZY_THRESHOLD
+    ).order_by(similarity.desc(), Task.id.desc())
+    if not include_archived:
+        statement = statement.where(Task.is_archived == False)
+    return statement
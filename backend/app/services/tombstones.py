@@ -0,0 +1,47 @@
+"""Task tombstone compaction for the delta-sync feed
+
+Deleted tasks leave a row in task_tombstones so GET /tasks/changes can report
+them. Tombstones older than the retention window are removed in batches;
+each organization's tombstones_compacted_txid records the newest
+transaction removed, and a client whose cursor is not past it is told to
+resync.
+"""
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+COMPACT_BATCH_SIZE = 10000
+
+
+def compact_tombstones(engine: Engine, cutoff: datetime, batch_size: int = COMPACT_BATCH_SIZE) -> int:
+    """Delete tombstones older than cutoff; returns how many were removed"""
+    removed = 0
+    while True:
+        # One short transaction per batch keeps the counter rows locked only briefly
+        with engine.begin() as conn:
+            count = conn.execute(text("""
+                WITH removed AS (
+                    DELETE FROM task_tombstones
+                    WHERE task_id IN (
+                        SELECT task_id FROM task_tombstones
+                        WHERE deleted_at < :cutoff
+                        LIMIT :batch_size
+                    )
+                    RETURNING organization_id, change_txid
+                ), per_org AS (
+                    SELECT organization_id, max(change_txid) AS max_txid, count(*) AS n
+                    FROM removed GROUP BY organization_id
+                ), bumped AS (
+                    INSERT INTO org_change_counters AS c (organization_id, tombstones_compacted_txid)
+                    SELECT organization_id, max_txid FROM per_org
+                    WHERE EXISTS (SELECT 1 FROM organizations o WHERE o.id = per_org.organization_id)
+                    ORDER BY organization_id
+                    ON CONFLICT (organization_id) DO UPDATE
+                    SET tombstones_compacted_txid = GREATEST(c.tombstones_compacted_txid, EXCLUDED.tombstones_compacted_txid)
+                )
+                SELECT coalesce(sum(n), 0) FROM per_org
+            """), {"cutoff": cutoff, "batch_size": batch_size}).scalar()
+        removed += count
+        if count < batch_size:
+            return removed
@@ -0,0 +1,91 @@
+"""Subscription usage counters
+
+projects.task_count, organizations.project_count and organizations.user_count
+are maintained by database triggers (migration 0010), so a quota check or
+the subscription endpoint reads one row instead of counting a tenant's rows.
+
+Quota checks lock the parent row (FOR NO KEY UPDATE, which does not block
+foreign-key checks) before reading its counter. Concurrent creates against
+the same project or organization queue on that lock; the trigger's increment
+lands on the same row before commit, so the next creator sees the count
+including the previous insert and two requests can never both take the last
+slot.
+
+reconcile_usage_counters() corrects drift the triggers cannot see, such as a
+task moved between projects or rows written with triggers disabled.
+"""
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Organization, Project
+
+RECONCILE_BATCH_SIZE = 1000
+
+# (parent table, counter column, child table, foreign key)
+COUNTERS = (
+    ("projects", "task_count", "tasks", "project_id"),
+    ("organizations", "project_count", "projects", "organization_id"),
+    ("organizations", "user_count", "users", "organization_id"),
+)
+
+
+async def lock_project_quotas(db: AsyncSession, project_ids: Iterable[int]) -> Dict[int, tuple]:
+    """Lock projects for task creation
+
+    Returns project id -> (organization_id, task_count, max_tasks_per_project).
+    Rows are locked in id order so concurrent batches cannot deadlock.
+    """
+    result = await db.execute(
+        select(Project.id, Project.organization_id, Project.task_count, Organization.max_tasks_per_project)
+        .join(Organization, Organization.id == Project.organization_id)
+        .where(Project.id.in_(set(project_ids)))
+        .order_by(Project.id)
+        .with_for_update(of=Project, key_share=True)
+    )
+    return {row.id: tuple(row)[1:] for row in result}
+
+
+async def lock_organization_quota(db: AsyncSession, organization_id: int) -> Optional[Organization]:
+    """Lock an organization for project or user creation; counters are current once locked"""
+    result = await db.execute(
+        select(Organization)
+        .where(Organization.id == organization_id)
+        .with_for_update(key_share=True)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
+
+
+def reconcile_usage_counters(engine: Engine, batch_size: int = RECONCILE_BATCH_SIZE) -> Dict[str, int]:
+    """Recount every counter in id batches; returns how many rows were corrected per counter"""
+    corrected = {}
+    for parent, column, child, fk in COUNTERS:
+        fixed = 0
+        last_id = 0
+        while True:
+            # Locking the batch first means any in-flight insert or delete has
+            # either committed (and is counted) or will apply its delta after us
+            with engine.begin() as conn:
+                ids = conn.execute(text(f"""
+                    SELECT id FROM {parent} WHERE id > :last_id
+                    ORDER BY id LIMIT :batch_size
+                    FOR NO KEY UPDATE
+                """), {"last_id": last_id, "batch_size": batch_size}).scalars().all()
+                if not ids:
+                    break
+                fixed += conn.execute(text(f"""
+                    UPDATE {parent} p SET {column} = actual.n
+                    FROM (
+                        SELECT p2.id, count(c.{fk}) AS n
+                        FROM {parent} p2 LEFT JOIN {child} c ON c.{fk} = p2.id
+                        WHERE p2.id BETWEEN :first_id AND :last_id
+                        GROUP BY p2.id
+                    ) actual
+                    WHERE p.id = actual.id AND p.{column} <> actual.n
+                """), {"first_id": ids[0], "last_id": ids[-1]}).rowcount
+            last_id = ids[-1]
+        corrected[column] = fixed
+    return corrected
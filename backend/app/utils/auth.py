@@ -5,10 +5,12 @@ from jose import JWTError, jwt
 import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.config import settings
-from app.database import get_db
+from app.database import get_async_db
 from app.models import User
+from app.services.principal_cache import Principal, principal_cache
+from app.services.password_hashing import hashing_pool, HashingPoolOverloaded
 
 security = HTTPBearer()
 
@@ -43,6 +45,33 @@ def get_password_hash(password: str) -> str:
         raise
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password in the hashing process pool"""
+    try:
+        return await hashing_pool.check_password(plain_password, hashed_password)
+    except HashingPoolOverloaded:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent authentication requests",
+            headers={"Retry-After": "1"},
+        )
+    except Exception as e:
+        print(f"Password verification error: {e}")
+        return False
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password in the hashing process pool"""
+    try:
+        return await hashing_pool.hash_password(password)
+    except HashingPoolOverloaded:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent authentication requests",
+            headers={"Retry-After": "1"},
+        )
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -55,11 +84,28 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
-def get_current_user(
+async def load_principal(db: AsyncSession, user_id: int) -> Optional[Principal]:
+    """Resolve a user id to a principal, from the cache when possible"""
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        user = await db.get(User, user_id)
+        if user is None:
+            return None
+        principal = Principal(
+            id=user.id,
+            organization_id=user.organization_id,
+            is_active=bool(user.is_active),
+            is_admin=bool(user.is_admin),
+        )
+        principal_cache.put(principal)
+    return principal
+
+
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get the current authenticated user"""
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """Get the current authenticated user as a cached principal snapshot"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -69,24 +115,40 @@ def get_current_user(
     try:
         token = credentials.credentials
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: int = payload.get("sub")
+        user_id = payload.get("sub")
         if user_id is None:
             raise credentials_exception
-    except JWTError:
+        user_id = int(user_id)
+    except (JWTError, ValueError):
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
+    principal = await load_principal(db, user_id)
+    if principal is None:
         raise credentials_exception
     
-    if not user.is_active:
+    if not principal.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     
-    return user
+    return principal
 
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_active_user(current_user: Principal = Depends(get_current_user)) -> Principal:
     """Get current active user"""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
+
+
+async def get_current_user_record(
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """Load the full User row for endpoints that read or modify profile fields"""
+    user = await db.get(User, current_user.id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
@@ -0,0 +1,102 @@
+"""Keyset (cursor) pagination
+
+Pages are ordered on (sort column, id) and resumed with a row-value comparison
+against the last row of the previous page, so every page is an index seek no
+matter how deep it is and rows inserted concurrently never shift a page.
+Cursors are opaque to clients: URL-safe base64 of the ordering name and the
+last row's key.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import Select, tuple_
+from sqlalchemy.orm import InstrumentedAttribute
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(name: str, values: Sequence[Any]) -> str:
+    payload = [name, [v.isoformat() if isinstance(v, datetime) else v for v in values]]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, List[Any]]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        name, values = json.loads(raw)
+        return name, list(values)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+class Keyset:
+    """An ordering on (column, id) that can be resumed from a cursor"""
+
+    def __init__(
+        self,
+        name: str,
+        column: InstrumentedAttribute,
+        id_column: InstrumentedAttribute,
+        descending: bool = False,
+    ):
+        self.name = name
+        self.column = column
+        self.id_column = id_column
+        self.descending = descending
+
+    def _key_from_cursor(self, cursor: str) -> Tuple[Any, int]:
+        name, values = decode_cursor(cursor)
+        if name != self.name or len(values) != 2:
+            raise HTTPException(status_code=400, detail="Cursor does not match the requested sort")
+        value, row_id = values
+        try:
+            if self.column.type.python_type is datetime:
+                value = datetime.fromisoformat(value)
+            return value, int(row_id)
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    def apply(self, query: Select, cursor: Optional[str], limit: Optional[int]) -> Select:
+        """Order the query, seek past the cursor and fetch one row beyond the page"""
+        key = tuple_(self.column, self.id_column)
+        if cursor:
+            after = tuple_(*self._key_from_cursor(cursor))
+            query = query.where(key < after if self.descending else key > after)
+
+        if self.descending:
+            query = query.order_by(self.column.desc(), self.id_column.desc())
+        else:
+            query = query.order_by(self.column.asc(), self.id_column.asc())
+
+        if limit is not None:
+            query = query.limit(limit + 1)
+        return query
+
+    def page(self, rows: Sequence[Any], limit: Optional[int]) -> Tuple[List[Any], Optional[str]]:
+        """Trim the look-ahead row and build the cursor for the next page
+
+        Rows may be ORM objects or result rows; either way the sort and id
+        columns are read by attribute name.
+        """
+        rows = list(rows)
+        if limit is None or len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        last = rows[-1]
+        values = (getattr(last, self.column.key), getattr(last, self.id_column.key))
+        return rows, encode_cursor(self.name, values)
+
+
+def next_cursor_headers(next_cursor: Optional[str]) -> Dict[str, str]:
+    """Headers for a Response built directly by the endpoint"""
+    return {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    """Expose the next page's cursor without changing the list response body"""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
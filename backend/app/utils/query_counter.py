@@ -0,0 +1,102 @@
+"""SQL statement counting - catches N+1 regressions
+
+Every statement sent by any engine (sync, async, replicas) passes through a
+single `before_cursor_execute` listener which increments the counter active in
+the current context, if any. Two ways to use it:
+
+    # in a test or script: fail when an endpoint exceeds its budget
+    with query_budget(3, label="GET /tasks"):
+        client.get("/api/v1/tasks", headers=headers)
+
+    # with QUERY_COUNT_MIDDLEWARE=true: every response carries an X-Query-Count header
+    app.add_middleware(QueryCountMiddleware)
+
+Counters nest: a statement counts toward every active counter, so a test
+budget still sees the statements of a request the middleware is counting.
+"""
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.middleware.base import BaseHTTPMiddleware
+
+logger = logging.getLogger(__name__)
+
+# Per-endpoint statement budgets; tests and the middleware share these
+ENDPOINT_BUDGETS = {
+    "GET /api/v1/tasks": 3,
+    "GET /api/v1/tasks/{task_id}": 3,
+    "GET /api/v1/projects": 3,
+}
+
+
+class StatementCounter:
+    """Counts statements executed while it is active"""
+
+    def __init__(self, keep_statements: bool = False, parent: Optional["StatementCounter"] = None):
+        self.count = 0
+        self.statements: List[str] = []
+        self._keep_statements = keep_statements
+        self._parent = parent
+
+    def record(self, statement: str) -> None:
+        self.count += 1
+        if self._keep_statements:
+            self.statements.append(statement)
+        if self._parent is not None:
+            self._parent.record(statement)
+
+
+_current_counter: ContextVar[Optional[StatementCounter]] = ContextVar("query_counter", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany) -> None:
+    # SQLAlchemy runs async-driver calls in a greenlet that shares the caller's context
+    counter = _current_counter.get()
+    if counter is not None:
+        counter.record(statement)
+
+
+@contextmanager
+def count_queries(keep_statements: bool = False) -> Iterator[StatementCounter]:
+    """Count statements executed in this context (including awaited async work)"""
+    counter = StatementCounter(keep_statements=keep_statements, parent=_current_counter.get())
+    token = _current_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _current_counter.reset(token)
+
+
+@contextmanager
+def query_budget(max_statements: int, label: str = "block") -> Iterator[StatementCounter]:
+    """Assert that no more than max_statements are executed in this context"""
+    with count_queries(keep_statements=True) as counter:
+        yield counter
+    if counter.count > max_statements:
+        executed = "\n".join(f"  {i + 1}. {s}" for i, s in enumerate(counter.statements))
+        raise AssertionError(
+            f"{label} executed {counter.count} statements (budget {max_statements}):\n{executed}"
+        )
+
+
+class QueryCountMiddleware(BaseHTTPMiddleware):
+    """Adds X-Query-Count to responses and logs requests over their budget"""
+
+    async def dispatch(self, request, call_next):
+        with count_queries() as counter:
+            response = await call_next(request)
+        response.headers["X-Query-Count"] = str(counter.count)
+
+        route = request.scope.get("route")
+        key = f"{request.method} {route.path}" if route is not None else None
+        budget = ENDPOINT_BUDGETS.get(key)
+        if budget is not None and counter.count > budget:
+            logger.warning(
+                f"{key} executed {counter.count} statements (budget {budget})"
+            )
+        return response
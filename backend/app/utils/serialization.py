@@ -0,0 +1,41 @@
+"""Task response serialization
+
+One converter from task rows to response dicts, shared by every endpoint that
+returns tasks. Queries select exactly TASK_COLUMNS (in TaskResponse field
+order) so a row maps to a payload with a zip; Numeric columns already arrive
+as floats (asdecimal=False) and enums/datetimes are left for orjson, which
+serializes both natively. List endpoints hand the dicts straight to
+ORJSONResponse, skipping per-item model validation.
+"""
+from typing import Any, Dict, Sequence
+
+from app.models import Task
+from app.schemas.task import TaskResponse
+
+TASK_FIELDS = tuple(TaskResponse.model_fields)
+TASK_COLUMNS = tuple(getattr(Task, field) for field in TASK_FIELDS)
+
+
+def task_row_to_dict(row: Sequence[Any]) -> Dict[str, Any]:
+    """Payload for a row whose first columns are TASK_COLUMNS"""
+    data = dict(zip(TASK_FIELDS, row))
+    if data["tags"] is None:
+        data["tags"] = []
+    if data["is_archived"] is None:
+        data["is_archived"] = False
+    return data
+
+
+def task_to_dict(task: Task) -> Dict[str, Any]:
+    """Payload for a loaded Task instance"""
+    return task_row_to_dict([getattr(task, field) for field in TASK_FIELDS])
+
+
+def task_details_row_to_dict(row: Sequence[Any]) -> Dict[str, Any]:
+    """Payload for TASK_COLUMNS followed by assignee, creator and project names"""
+    data = task_row_to_dict(row)
+    assignee_name, creator_name, project_name = row[len(TASK_FIELDS):len(TASK_FIELDS) + 3]
+    data["assignee_name"] = assignee_name
+    data["creator_name"] = creator_name
+    data["project_name"] = project_name or ""
+    return data
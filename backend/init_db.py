@@ -1,14 +1,15 @@
 """
 Initialize database with schema
+
+Applies the Alembic migration chain (migrations/) up to head.
 """
-from app.database import engine, Base
-from app.models import (
-    Organization, User, Project, Task, TaskComment, 
-    TaskActivityLog, AnalyticsEvent
-)
+import os
 
-if __name__ == "__main__":
-    print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
-    print("Database tables created successfully!")
+from alembic import command
+from alembic.config import Config
 
+if __name__ == "__main__":
+    print("Applying database migrations...")
+    config = Config(os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini"))
+    command.upgrade(config, "head")
+    print("Database schema is up to date!")
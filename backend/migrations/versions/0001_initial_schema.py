@@ -0,0 +1,154 @@
+"""Initial schema (as previously created by Base.metadata.create_all)
+
+Databases that were created by create_all before migrations existed should
+be marked with `alembic stamp 0001` instead of running this revision.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+subscription_tier = sa.Enum("FREE", "PRO", "ENTERPRISE", name="subscriptiontier")
+task_status = sa.Enum("TODO", "IN_PROGRESS", "IN_REVIEW", "DONE", "BLOCKED", name="taskstatus")
+task_priority = sa.Enum("LOW", "MEDIUM", "HIGH", "URGENT", name="taskpriority")
+
+
+def upgrade():
+    op.create_table(
+        "organizations",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("slug", sa.String(255), nullable=False),
+        sa.Column("subscription_tier", subscription_tier, nullable=True),
+        sa.Column("stripe_customer_id", sa.String(255), nullable=True),
+        sa.Column("stripe_subscription_id", sa.String(255), nullable=True),
+        sa.Column("subscription_status", sa.String(50), nullable=True),
+        sa.Column("max_users", sa.Integer(), nullable=True),
+        sa.Column("max_projects", sa.Integer(), nullable=True),
+        sa.Column("max_tasks_per_project", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_organizations_id", "organizations", ["id"])
+    op.create_index("ix_organizations_slug", "organizations", ["slug"], unique=True)
+
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(255), nullable=False),
+        sa.Column("hashed_password", sa.String(255), nullable=False),
+        sa.Column("full_name", sa.String(255), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("is_admin", sa.Boolean(), nullable=True),
+        sa.Column("organization_id", sa.Integer(), sa.ForeignKey("organizations.id"), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "projects",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("organization_id", sa.Integer(), sa.ForeignKey("organizations.id"), nullable=False),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("color", sa.String(7), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_projects_id", "projects", ["id"])
+
+    op.create_table(
+        "tasks",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("title", sa.String(500), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("status", task_status, nullable=True),
+        sa.Column("priority", task_priority, nullable=True),
+        sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id"), nullable=False),
+        sa.Column("assignee_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("created_by_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("due_date", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("estimated_hours", sa.Numeric(10, 2), nullable=True),
+        sa.Column("actual_hours", sa.Numeric(10, 2), nullable=True),
+        sa.Column("price", sa.Numeric(10, 2), nullable=True),
+        sa.Column("tags", sa.JSON(), nullable=True),
+        sa.Column("extra_data", sa.JSON(), nullable=True),
+        sa.Column("position_x", sa.Numeric(10, 2), nullable=True),
+        sa.Column("position_y", sa.Numeric(10, 2), nullable=True),
+        sa.Column("box_width", sa.Numeric(10, 2), nullable=True),
+        sa.Column("box_height", sa.Numeric(10, 2), nullable=True),
+        sa.Column("is_archived", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_tasks_id", "tasks", ["id"])
+    op.create_index("ix_tasks_status", "tasks", ["status"])
+    op.create_index("ix_tasks_project_id", "tasks", ["project_id"])
+    op.create_index("ix_tasks_assignee_id", "tasks", ["assignee_id"])
+    op.create_index("ix_tasks_is_archived", "tasks", ["is_archived"])
+    op.create_index("ix_tasks_created_at", "tasks", ["created_at"])
+
+    op.create_table(
+        "task_comments",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("task_id", sa.Integer(), sa.ForeignKey("tasks.id"), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_task_comments_id", "task_comments", ["id"])
+
+    op.create_table(
+        "task_activity_logs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("task_id", sa.Integer(), sa.ForeignKey("tasks.id"), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("action", sa.String(100), nullable=False),
+        sa.Column("old_value", sa.JSON(), nullable=True),
+        sa.Column("new_value", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_task_activity_logs_id", "task_activity_logs", ["id"])
+    op.create_index("ix_task_activity_logs_task_id", "task_activity_logs", ["task_id"])
+    op.create_index("ix_task_activity_logs_created_at", "task_activity_logs", ["created_at"])
+
+    op.create_table(
+        "analytics_events",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("organization_id", sa.Integer(), sa.ForeignKey("organizations.id"), nullable=False),
+        sa.Column("event_type", sa.String(100), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id"), nullable=True),
+        sa.Column("task_id", sa.Integer(), sa.ForeignKey("tasks.id"), nullable=True),
+        sa.Column("extra_data", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_analytics_events_id", "analytics_events", ["id"])
+    op.create_index("ix_analytics_events_organization_id", "analytics_events", ["organization_id"])
+    op.create_index("ix_analytics_events_event_type", "analytics_events", ["event_type"])
+    op.create_index("ix_analytics_events_created_at", "analytics_events", ["created_at"])
+
+
+def downgrade():
+    op.drop_table("analytics_events")
+    op.drop_table("task_activity_logs")
+    op.drop_table("task_comments")
+    op.drop_table("tasks")
+    op.drop_table("projects")
+    op.drop_table("users")
+    op.drop_table("organizations")
+    task_priority.drop(op.get_bind(), checkfirst=True)
+    task_status.drop(op.get_bind(), checkfirst=True)
+    subscription_tier.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,79 @@
+"""Denormalize organization_id onto tasks
+
+Adds tasks.organization_id, backfills it from projects in id-range batches,
+and keeps it consistent with a trigger that re-derives it whenever a task is
+inserted or moved to another project. Tenant-scoped queries then filter on
+tasks directly instead of joining projects.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 50000
+
+
+def upgrade():
+    op.add_column("tasks", sa.Column("organization_id", sa.Integer(), nullable=True))
+
+    # Keep organization_id in step with project_id for every writer (API, pipeline, COPY)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION tasks_set_organization_id() RETURNS trigger AS $$
+        BEGIN
+            SELECT organization_id INTO NEW.organization_id
+            FROM projects WHERE id = NEW.project_id;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER tasks_set_organization_id
+        BEFORE INSERT OR UPDATE OF project_id ON tasks
+        FOR EACH ROW EXECUTE FUNCTION tasks_set_organization_id()
+    """)
+
+    # Backfill in batches so no single statement rewrites the whole table
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        max_id = bind.execute(sa.text("SELECT coalesce(max(id), 0) FROM tasks")).scalar()
+        for start in range(0, max_id + 1, BACKFILL_BATCH_SIZE):
+            bind.execute(
+                sa.text("""
+                    UPDATE tasks t SET organization_id = p.organization_id
+                    FROM projects p
+                    WHERE p.id = t.project_id
+                      AND t.id >= :start AND t.id < :end
+                      AND t.organization_id IS NULL
+                """),
+                {"start": start, "end": start + BACKFILL_BATCH_SIZE},
+            )
+
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_org_archived_status "
+            "ON tasks (organization_id, is_archived, status)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_org_created_at "
+            "ON tasks (organization_id, created_at)"
+        )
+
+    op.alter_column("tasks", "organization_id", nullable=False)
+    op.create_foreign_key(
+        "tasks_organization_id_fkey", "tasks", "organizations", ["organization_id"], ["id"]
+    )
+
+
+def downgrade():
+    op.drop_constraint("tasks_organization_id_fkey", "tasks", type_="foreignkey")
+    op.drop_index("ix_tasks_org_created_at", table_name="tasks")
+    op.drop_index("ix_tasks_org_archived_status", table_name="tasks")
+    op.execute("DROP TRIGGER IF EXISTS tasks_set_organization_id ON tasks")
+    op.execute("DROP FUNCTION IF EXISTS tasks_set_organization_id()")
+    op.drop_column("tasks", "organization_id")
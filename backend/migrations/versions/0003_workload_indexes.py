@@ -0,0 +1,58 @@
+"""Composite and partial indexes derived from the router and pipeline query shapes
+
+- tasks (organization_id, created_at) WHERE NOT is_archived: GET /tasks default listing
+- tasks (project_id, status): project filter on GET /tasks and the per-project quota count
+- tasks (organization_id, status, completed_at): completed today/this week, completion times
+- tasks (organization_id, due_date) WHERE status <> 'DONE': overdue counts
+- task_comments (task_id): FK lookups, including cascades on task delete
+- task_activity_logs (task_id, created_at): per-task history in order
+- analytics_events (organization_id, created_at): per-org event windows
+- projects (organization_id, is_active), users (organization_id): tenant listings and usage counts
+
+ix_tasks_status and ix_tasks_is_archived are dropped: both are low-cardinality
+and every query using them is now covered by a tenant-prefixed index.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_tasks_org_active_created_at", "tasks", "(organization_id, created_at) WHERE is_archived = false"),
+    ("ix_tasks_project_status", "tasks", "(project_id, status)"),
+    ("ix_tasks_org_status_completed_at", "tasks", "(organization_id, status, completed_at)"),
+    ("ix_tasks_org_open_due_date", "tasks", "(organization_id, due_date) WHERE status <> 'DONE'"),
+    ("ix_task_comments_task_id", "task_comments", "(task_id)"),
+    ("ix_task_activity_logs_task_created_at", "task_activity_logs", "(task_id, created_at)"),
+    ("ix_analytics_events_org_created_at", "analytics_events", "(organization_id, created_at)"),
+    ("ix_projects_org_active", "projects", "(organization_id, is_active)"),
+    ("ix_users_organization_id", "users", "(organization_id)"),
+]
+
+SUPERSEDED = [
+    ("ix_tasks_status", "tasks", "(status)"),
+    ("ix_tasks_is_archived", "tasks", "(is_archived)"),
+    ("ix_task_activity_logs_task_id", "task_activity_logs", "(task_id)"),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, definition in INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} {definition}")
+        for name, _, _ in SUPERSEDED:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, definition in SUPERSEDED:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} {definition}")
+        for name, _, _ in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
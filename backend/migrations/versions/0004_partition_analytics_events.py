@@ -0,0 +1,107 @@
+"""Range-partition analytics_events by month on created_at
+
+The existing table is renamed, a partitioned table with a (id, created_at)
+primary key takes its place, monthly partitions are created from the oldest
+event through three months ahead, rows are copied over and the old table is
+dropped. The FK to tasks is not recreated: events are history and must
+survive task deletion.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from datetime import date, datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+
+def _add_months(value, months):
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    op.execute("ALTER TABLE analytics_events RENAME TO analytics_events_legacy")
+    op.execute("ALTER TABLE analytics_events_legacy RENAME CONSTRAINT analytics_events_pkey TO analytics_events_legacy_pkey")
+    for index in ("id", "organization_id", "event_type", "created_at", "org_created_at"):
+        op.execute(f"DROP INDEX IF EXISTS ix_analytics_events_{index}")
+
+    op.execute("""
+        CREATE TABLE analytics_events (
+            id BIGINT NOT NULL DEFAULT nextval('analytics_events_id_seq'),
+            organization_id INTEGER NOT NULL REFERENCES organizations (id),
+            event_type VARCHAR(100) NOT NULL,
+            user_id INTEGER REFERENCES users (id),
+            project_id INTEGER REFERENCES projects (id),
+            task_id INTEGER,
+            extra_data JSON,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("ALTER SEQUENCE analytics_events_id_seq AS BIGINT OWNED BY analytics_events.id")
+    op.execute("CREATE INDEX ix_analytics_events_event_type ON analytics_events (event_type)")
+    op.execute("CREATE INDEX ix_analytics_events_created_at ON analytics_events (created_at)")
+    op.execute("CREATE INDEX ix_analytics_events_org_created_at ON analytics_events (organization_id, created_at)")
+
+    oldest = bind.execute(sa.text("SELECT min(created_at) FROM analytics_events_legacy")).scalar()
+    this_month = datetime.now(timezone.utc).date().replace(day=1)
+    month = (oldest.date().replace(day=1) if oldest else this_month)
+    while month <= _add_months(this_month, MONTHS_AHEAD):
+        upper = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE analytics_events_y{month.year:04d}m{month.month:02d} "
+            f"PARTITION OF analytics_events FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+        month = upper
+
+    op.execute("""
+        INSERT INTO analytics_events (id, organization_id, event_type, user_id, project_id,
+                                      task_id, extra_data, created_at)
+        SELECT id, organization_id, event_type, user_id, project_id,
+               task_id, extra_data, coalesce(created_at, now())
+        FROM analytics_events_legacy
+    """)
+    op.execute("DROP TABLE analytics_events_legacy")
+
+
+def downgrade():
+    op.execute("ALTER TABLE analytics_events RENAME TO analytics_events_partitioned")
+    op.execute("ALTER SEQUENCE analytics_events_id_seq OWNED BY NONE")
+    op.execute("""
+        CREATE TABLE analytics_events (
+            id INTEGER PRIMARY KEY DEFAULT nextval('analytics_events_id_seq'),
+            organization_id INTEGER NOT NULL REFERENCES organizations (id),
+            event_type VARCHAR(100) NOT NULL,
+            user_id INTEGER REFERENCES users (id),
+            project_id INTEGER REFERENCES projects (id),
+            task_id INTEGER REFERENCES tasks (id),
+            extra_data JSON,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+        )
+    """)
+    op.execute("""
+        INSERT INTO analytics_events (id, organization_id, event_type, user_id, project_id,
+                                      task_id, extra_data, created_at)
+        SELECT id, organization_id, event_type, user_id, project_id,
+               CASE WHEN EXISTS (SELECT 1 FROM tasks WHERE tasks.id = p.task_id) THEN task_id END,
+               extra_data, created_at
+        FROM analytics_events_partitioned p
+    """)
+    op.execute("DROP TABLE analytics_events_partitioned")
+    op.execute("ALTER SEQUENCE analytics_events_id_seq AS INTEGER OWNED BY analytics_events.id")
+    op.execute("CREATE INDEX ix_analytics_events_id ON analytics_events (id)")
+    op.execute("CREATE INDEX ix_analytics_events_organization_id ON analytics_events (organization_id)")
+    op.execute("CREATE INDEX ix_analytics_events_event_type ON analytics_events (event_type)")
+    op.execute("CREATE INDEX ix_analytics_events_created_at ON analytics_events (created_at)")
+    op.execute("CREATE INDEX ix_analytics_events_org_created_at ON analytics_events (organization_id, created_at)")
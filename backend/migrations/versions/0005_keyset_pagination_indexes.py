@@ -0,0 +1,49 @@
+"""Indexes for keyset pagination on (created_at, id)
+
+Cursor pages seek with (created_at, id) < (:created_at, :id), so the listing
+indexes gain id as a trailing column; the ordering and the seek are then
+answered from the index alone without a sort.
+
+- tasks (organization_id, created_at, id) WHERE NOT is_archived: GET /tasks
+- tasks (project_id, created_at, id) WHERE NOT is_archived: GET /tasks?project_id=
+- projects (organization_id, created_at, id) WHERE is_active: GET /projects
+- task_activity_logs (task_id, created_at, id): GET /tasks/{id}/activity
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_tasks_org_active_created_at_id", "tasks", "(organization_id, created_at, id) WHERE is_archived = false"),
+    ("ix_tasks_project_active_created_at_id", "tasks", "(project_id, created_at, id) WHERE is_archived = false"),
+    ("ix_projects_org_active_created_at_id", "projects", "(organization_id, created_at, id) WHERE is_active = true"),
+    ("ix_task_activity_logs_task_created_at_id", "task_activity_logs", "(task_id, created_at, id)"),
+]
+
+SUPERSEDED = [
+    ("ix_tasks_org_active_created_at", "tasks", "(organization_id, created_at) WHERE is_archived = false"),
+    ("ix_task_activity_logs_task_created_at", "task_activity_logs", "(task_id, created_at)"),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, definition in INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} {definition}")
+        for name, _, _ in SUPERSEDED:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, definition in SUPERSEDED:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} {definition}")
+        for name, _, _ in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
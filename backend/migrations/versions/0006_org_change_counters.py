@@ -0,0 +1,91 @@
+"""Per-organization change counters for conditional GETs
+
+org_change_counters holds one row per organization with a version per table.
+Statement-level AFTER triggers with transition tables bump the version once
+per statement for every organization the statement touched, so a 300-row
+batch update costs one counter update per org rather than one per row.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+# table -> counter column bumped when it changes
+COUNTED_TABLES = {
+    "tasks": "tasks_version",
+    "projects": "projects_version",
+    "users": "users_version",
+}
+
+
+def upgrade():
+    op.create_table(
+        "org_change_counters",
+        sa.Column(
+            "organization_id", sa.Integer(),
+            sa.ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True
+        ),
+        sa.Column("tasks_version", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("projects_version", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("users_version", sa.BigInteger(), nullable=False, server_default="0"),
+    )
+    op.execute("INSERT INTO org_change_counters (organization_id) SELECT id FROM organizations")
+
+    for table, column in COUNTED_TABLES.items():
+        # Transition tables only exist for the event that fired, so branch on TG_OP
+        op.execute(f"""
+            CREATE OR REPLACE FUNCTION bump_{column}() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP = 'INSERT' THEN
+                    INSERT INTO org_change_counters (organization_id, {column})
+                    SELECT DISTINCT organization_id, 1 FROM new_rows
+                    ON CONFLICT (organization_id)
+                    DO UPDATE SET {column} = org_change_counters.{column} + 1;
+                ELSIF TG_OP = 'UPDATE' THEN
+                    INSERT INTO org_change_counters (organization_id, {column})
+                    SELECT organization_id, 1 FROM new_rows
+                    UNION SELECT organization_id, 1 FROM old_rows
+                    ON CONFLICT (organization_id)
+                    DO UPDATE SET {column} = org_change_counters.{column} + 1;
+                ELSE
+                    INSERT INTO org_change_counters (organization_id, {column})
+                    SELECT DISTINCT organization_id, 1 FROM old_rows
+                    WHERE EXISTS (SELECT 1 FROM organizations o WHERE o.id = old_rows.organization_id)
+                    ON CONFLICT (organization_id)
+                    DO UPDATE SET {column} = org_change_counters.{column} + 1;
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+        # PostgreSQL allows transition tables only on single-event triggers
+        op.execute(f"""
+            CREATE TRIGGER {table}_bump_version_ins AFTER INSERT ON {table}
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_{column}()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_bump_version_upd AFTER UPDATE ON {table}
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_{column}()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_bump_version_del AFTER DELETE ON {table}
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_{column}()
+        """)
+
+
+def downgrade():
+    for table, column in COUNTED_TABLES.items():
+        for suffix in ("ins", "upd", "del"):
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_bump_version_{suffix} ON {table}")
+        op.execute(f"DROP FUNCTION IF EXISTS bump_{column}()")
+    op.drop_table("org_change_counters")
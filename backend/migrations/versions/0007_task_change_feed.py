@@ -0,0 +1,117 @@
+"""Delta sync: per-organization task change sequence and deletion tombstones
+
+- tasks.change_seq is stamped from org_change_counters.change_seq by a BEFORE
+  INSERT OR UPDATE row trigger. The counter row stays locked until commit, so
+  sequences in an organization are handed out in commit order and a reader
+  never skips a change that commits later with a lower number.
+- An AFTER DELETE row trigger writes a task_tombstones row with its own
+  sequence number from the same counter.
+- Existing tasks are backfilled in id batches by a no-op UPDATE that the
+  trigger stamps, so every task has a unique sequence within its org.
+
+The trigger is named so it sorts after tasks_set_organization_id and sees
+the derived organization_id.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 50000
+
+
+def upgrade():
+    op.add_column("org_change_counters", sa.Column("change_seq", sa.BigInteger(), nullable=False, server_default="0"))
+    op.add_column(
+        "org_change_counters",
+        sa.Column("tombstones_compacted_seq", sa.BigInteger(), nullable=False, server_default="0"),
+    )
+    # Constant default: metadata-only on PostgreSQL 11+, no table rewrite
+    op.add_column("tasks", sa.Column("change_seq", sa.BigInteger(), nullable=False, server_default="0"))
+
+    op.create_table(
+        "task_tombstones",
+        sa.Column("task_id", sa.Integer(), primary_key=True),
+        sa.Column("organization_id", sa.Integer(), nullable=False),
+        sa.Column("project_id", sa.Integer(), nullable=True),
+        sa.Column("change_seq", sa.BigInteger(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_task_tombstones_org_change_seq", "task_tombstones", ["organization_id", "change_seq"])
+    op.create_index("ix_task_tombstones_deleted_at", "task_tombstones", ["deleted_at"])
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION next_org_change_seq(org_id integer) RETURNS bigint AS $$
+            INSERT INTO org_change_counters (organization_id, change_seq) VALUES (org_id, 1)
+            ON CONFLICT (organization_id)
+            DO UPDATE SET change_seq = org_change_counters.change_seq + 1
+            RETURNING change_seq
+        $$ LANGUAGE sql
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION tasks_stamp_change_seq() RETURNS trigger AS $$
+        BEGIN
+            NEW.change_seq := next_org_change_seq(NEW.organization_id);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER tasks_stamp_change_seq
+        BEFORE INSERT OR UPDATE ON tasks
+        FOR EACH ROW EXECUTE FUNCTION tasks_stamp_change_seq()
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION tasks_write_tombstone() RETURNS trigger AS $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM organizations WHERE id = OLD.organization_id) THEN
+                INSERT INTO task_tombstones (task_id, organization_id, project_id, change_seq)
+                VALUES (OLD.id, OLD.organization_id, OLD.project_id, next_org_change_seq(OLD.organization_id))
+                ON CONFLICT (task_id) DO NOTHING;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER tasks_write_tombstone
+        AFTER DELETE ON tasks
+        FOR EACH ROW EXECUTE FUNCTION tasks_write_tombstone()
+    """)
+
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        max_id = bind.execute(sa.text("SELECT coalesce(max(id), 0) FROM tasks")).scalar()
+        for start in range(0, max_id + 1, BACKFILL_BATCH_SIZE):
+            bind.execute(
+                sa.text("""
+                    UPDATE tasks SET change_seq = 0
+                    WHERE id >= :start AND id < :end AND change_seq = 0
+                """),
+                {"start": start, "end": start + BACKFILL_BATCH_SIZE},
+            )
+
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_org_change_seq "
+            "ON tasks (organization_id, change_seq)"
+        )
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS tasks_write_tombstone ON tasks")
+    op.execute("DROP FUNCTION IF EXISTS tasks_write_tombstone()")
+    op.execute("DROP TRIGGER IF EXISTS tasks_stamp_change_seq ON tasks")
+    op.execute("DROP FUNCTION IF EXISTS tasks_stamp_change_seq()")
+    op.execute("DROP FUNCTION IF EXISTS next_org_change_seq(integer)")
+    op.drop_index("ix_tasks_org_change_seq", table_name="tasks")
+    op.drop_table("task_tombstones")
+    op.drop_column("tasks", "change_seq")
+    op.drop_column("org_change_counters", "tombstones_compacted_seq")
+    op.drop_column("org_change_counters", "change_seq")
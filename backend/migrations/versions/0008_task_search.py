@@ -0,0 +1,50 @@
+"""Full-text and trigram search on tasks
+
+- tasks.search_vector: STORED generated tsvector over title (A), tags (A) and
+  description (B). Adding a stored generated column rewrites the table under
+  an ACCESS EXCLUSIVE lock; on large installations run this migration in a
+  maintenance window.
+- GIN (organization_id, search_vector) and GIN (organization_id, title
+  gin_trgm_ops), tenant-prefixed through btree_gin, built CONCURRENTLY.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+SEARCH_VECTOR_EXPRESSION = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B') || "
+    "setweight(json_to_tsvector('simple', coalesce(tags, '[]'::json), '[\"string\"]'), 'A')"
+)
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+    op.execute(
+        f"ALTER TABLE tasks ADD COLUMN search_vector tsvector "
+        f"GENERATED ALWAYS AS ({SEARCH_VECTOR_EXPRESSION}) STORED"
+    )
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_org_search_vector "
+            "ON tasks USING gin (organization_id, search_vector)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_org_title_trgm "
+            "ON tasks USING gin (organization_id, title gin_trgm_ops)"
+        )
+
+
+def downgrade():
+    op.drop_index("ix_tasks_org_title_trgm", table_name="tasks")
+    op.drop_index("ix_tasks_org_search_vector", table_name="tasks")
+    op.drop_column("tasks", "search_vector")
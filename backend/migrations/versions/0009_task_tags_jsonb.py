@@ -0,0 +1,59 @@
+"""Store task tags as JSONB with a tenant-prefixed GIN index
+
+tags becomes JSONB so tag filters are containment tests (tags @> '["x"]')
+answered by GIN (organization_id, tags jsonb_path_ops). search_vector is
+generated from tags, and PostgreSQL will not change the type of a column a
+generated column depends on, so it is dropped and re-created around the type
+change. Both steps rewrite the table under an ACCESS EXCLUSIVE lock.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def search_vector_expression(tags_type):
+    return (
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'B') || "
+        f"setweight({tags_type}_to_tsvector('simple', coalesce(tags, '[]'::{tags_type}), '[\"string\"]'), 'A')"
+    )
+
+
+def _retype_tags(tags_type):
+    op.execute("DROP INDEX IF EXISTS ix_tasks_org_search_vector")
+    op.execute("ALTER TABLE tasks DROP COLUMN search_vector")
+    op.execute(f"ALTER TABLE tasks ALTER COLUMN tags TYPE {tags_type} USING tags::{tags_type}")
+    op.execute(
+        f"ALTER TABLE tasks ADD COLUMN search_vector tsvector "
+        f"GENERATED ALWAYS AS ({search_vector_expression(tags_type)}) STORED"
+    )
+
+
+def upgrade():
+    _retype_tags("jsonb")
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_org_search_vector "
+            "ON tasks USING gin (organization_id, search_vector)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_org_tags "
+            "ON tasks USING gin (organization_id, tags jsonb_path_ops)"
+        )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_tasks_org_tags")
+    _retype_tags("json")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_tasks_org_search_vector "
+        "ON tasks USING gin (organization_id, search_vector)"
+    )
@@ -0,0 +1,79 @@
+"""Maintained usage counters for subscription quotas
+
+projects.task_count, organizations.project_count and organizations.user_count
+are kept current by statement-level AFTER INSERT / AFTER DELETE triggers with
+transition tables: one counter update per parent row per statement, in the
+same transaction as the rows themselves, whichever code path wrote them.
+
+Archiving is an UPDATE and deliberately leaves the counts alone: quotas have
+always counted archived tasks and inactive projects.
+
+The counts are backfilled after the triggers exist and before commit; the
+trigger DDL holds off writers to the child tables until then, so no insert
+or delete can fall between the backfill and the triggers.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+# (child table, foreign key, parent table, counter column on the parent)
+COUNTERS = (
+    ("tasks", "project_id", "projects", "task_count"),
+    ("projects", "organization_id", "organizations", "project_count"),
+    ("users", "organization_id", "organizations", "user_count"),
+)
+
+
+def upgrade():
+    for child, fk, parent, column in COUNTERS:
+        # Constant default: metadata-only on PostgreSQL 11+, no table rewrite
+        op.add_column(parent, sa.Column(column, sa.Integer(), nullable=False, server_default="0"))
+
+        op.execute(f"""
+            CREATE OR REPLACE FUNCTION maintain_{column}() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP = 'INSERT' THEN
+                    UPDATE {parent} p SET {column} = p.{column} + d.n
+                    FROM (SELECT {fk}, count(*) AS n FROM new_rows GROUP BY {fk}) d
+                    WHERE p.id = d.{fk};
+                ELSE
+                    UPDATE {parent} p SET {column} = GREATEST(p.{column} - d.n, 0)
+                    FROM (SELECT {fk}, count(*) AS n FROM old_rows GROUP BY {fk}) d
+                    WHERE p.id = d.{fk};
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {child}_{column}_ins AFTER INSERT ON {child}
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION maintain_{column}()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {child}_{column}_del AFTER DELETE ON {child}
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION maintain_{column}()
+        """)
+
+        op.execute(f"""
+            UPDATE {parent} p SET {column} = c.n
+            FROM (SELECT {fk}, count(*) AS n FROM {child} GROUP BY {fk}) c
+            WHERE p.id = c.{fk}
+        """)
+
+
+def downgrade():
+    for child, fk, parent, column in COUNTERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {child}_{column}_ins ON {child}")
+        op.execute(f"DROP TRIGGER IF EXISTS {child}_{column}_del ON {child}")
+        op.execute(f"DROP FUNCTION IF EXISTS maintain_{column}()")
+        op.drop_column(parent, column)
@@ -0,0 +1,60 @@
+"""Optimistic concurrency: tasks.version
+
+A BEFORE UPDATE row trigger increments tasks.version whenever a content
+column changes, whatever the writer (single update, batch, archive, import).
+Board geometry (position_x/y, box_width/height) is left out: drags are
+coalesced and written continuously, and counting them would turn every
+drag into a conflict for anyone editing the card's content.
+
+Writers that want a safe update add `WHERE version = :expected` and treat
+zero affected rows as a conflict.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+# Columns whose change makes a new version; json has no equality operator, so extra_data compares as text
+VERSIONED_COLUMNS = (
+    "title", "description", "status", "priority", "project_id", "assignee_id",
+    "due_date", "completed_at", "estimated_hours", "actual_hours", "price",
+    "tags", "extra_data::text", "is_archived",
+)
+
+
+def upgrade():
+    # Constant default: metadata-only on PostgreSQL 11+, no table rewrite
+    op.add_column("tasks", sa.Column("version", sa.Integer(), nullable=False, server_default="1"))
+
+    new_row = ", ".join(f"NEW.{column}" for column in VERSIONED_COLUMNS)
+    old_row = ", ".join(f"OLD.{column}" for column in VERSIONED_COLUMNS)
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION tasks_bump_version() RETURNS trigger AS $$
+        BEGIN
+            IF ROW({new_row}) IS DISTINCT FROM ROW({old_row}) THEN
+                NEW.version := OLD.version + 1;
+            ELSE
+                NEW.version := OLD.version;
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER tasks_bump_version
+        BEFORE UPDATE ON tasks
+        FOR EACH ROW EXECUTE FUNCTION tasks_bump_version()
+    """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS tasks_bump_version ON tasks")
+    op.execute("DROP FUNCTION IF EXISTS tasks_bump_version()")
+    op.drop_column("tasks", "version")
@@ -0,0 +1,156 @@
+"""Transactional outbox for task changes and pipeline consumer watermarks
+
+- task_outbox gets one row per task change, written by statement-level
+  AFTER triggers on tasks, so the event commits (or rolls back) with the
+  change itself whatever the writer: API, batch endpoint, import, raw SQL.
+  Updates are recorded only when tasks.version moved, so coalesced board
+  drags do not flood the outbox.
+- Each row carries the id of the writing transaction (txid, xid8). Ids are
+  allocated at insert time, not at commit, so a transaction that commits
+  late can leave rows below an id a consumer has already passed. Consumers
+  therefore advance by transaction horizon: every transaction with
+  txid < pg_snapshot_xmin(pg_current_snapshot()) has finished, and within
+  that window rows are read in id order.
+- outbox_consumers holds each consumer's watermark (the horizon consumed so
+  far); outbox_claims splits a window into disjoint id ranges that Celery
+  workers process independently. A claim is marked done in the same
+  transaction as the consumer's writes, so a retried claim is a no-op.
+- analytics_event_counts is the first consumer's output: events per
+  organization, day and type.
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+# Task fields copied into every event, so consumers never re-read tasks
+PAYLOAD_COLUMNS = (
+    "status", "priority", "assignee_id", "price", "is_archived", "created_at", "completed_at",
+)
+
+
+def payload(alias: str) -> str:
+    return "jsonb_build_object(" + ", ".join(f"'{column}', {alias}.{column}" for column in PAYLOAD_COLUMNS) + ")"
+
+
+def upgrade():
+    # xid8 has no SQLAlchemy type; the outbox and consumer tables are plain DDL
+    op.execute("""
+        CREATE TABLE task_outbox (
+            id bigserial PRIMARY KEY,
+            txid xid8 NOT NULL DEFAULT pg_current_xact_id(),
+            organization_id integer NOT NULL,
+            project_id integer,
+            task_id integer NOT NULL,
+            event_type varchar(50) NOT NULL,
+            payload jsonb NOT NULL,
+            created_at timestamptz NOT NULL DEFAULT now()
+        )
+    """)
+    op.execute("CREATE INDEX ix_task_outbox_txid ON task_outbox (txid)")
+    op.execute("CREATE INDEX ix_task_outbox_created_at ON task_outbox (created_at)")
+
+    op.execute("""
+        CREATE TABLE outbox_consumers (
+            name varchar(100) PRIMARY KEY,
+            watermark xid8 NOT NULL DEFAULT '0',
+            updated_at timestamptz NOT NULL DEFAULT now()
+        )
+    """)
+    op.execute("""
+        CREATE TABLE outbox_claims (
+            id bigserial PRIMARY KEY,
+            consumer varchar(100) NOT NULL REFERENCES outbox_consumers (name) ON DELETE CASCADE,
+            low_txid xid8 NOT NULL,
+            high_txid xid8 NOT NULL,
+            first_id bigint NOT NULL,
+            last_id bigint NOT NULL,
+            status varchar(20) NOT NULL DEFAULT 'pending',
+            events integer,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            processed_at timestamptz
+        )
+    """)
+    op.execute("CREATE INDEX ix_outbox_claims_consumer_status ON outbox_claims (consumer, status, created_at)")
+
+    op.create_table(
+        "analytics_event_counts",
+        sa.Column("organization_id", sa.Integer(), sa.ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("event_type", sa.String(50), primary_key=True),
+        sa.Column("count", sa.BigInteger(), nullable=False, server_default="0"),
+    )
+
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION tasks_write_outbox() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO task_outbox (organization_id, project_id, task_id, event_type, payload)
+                SELECT n.organization_id, n.project_id, n.id, 'task_created', {payload("n")}
+                FROM new_rows n
+                ORDER BY n.id;
+            ELSIF TG_OP = 'UPDATE' THEN
+                INSERT INTO task_outbox (organization_id, project_id, task_id, event_type, payload)
+                SELECT
+                    n.organization_id, n.project_id, n.id,
+                    CASE
+                        WHEN n.status = 'DONE' AND o.status <> 'DONE' THEN 'task_completed'
+                        WHEN n.is_archived AND NOT coalesce(o.is_archived, false) THEN 'task_archived'
+                        ELSE 'task_updated'
+                    END,
+                    {payload("n")} || jsonb_build_object('old', {payload("o")})
+                FROM new_rows n
+                JOIN old_rows o ON o.id = n.id
+                WHERE n.version <> o.version
+                ORDER BY n.id;
+            ELSE
+                -- Organization deletes cascade to tasks; nobody is left to report them to
+                INSERT INTO task_outbox (organization_id, project_id, task_id, event_type, payload)
+                SELECT o.organization_id, o.project_id, o.id, 'task_deleted', {payload("o")}
+                FROM old_rows o
+                WHERE EXISTS (SELECT 1 FROM organizations WHERE id = o.organization_id)
+                ORDER BY o.id;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER tasks_outbox_ins AFTER INSERT ON tasks
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION tasks_write_outbox()
+    """)
+    op.execute("""
+        CREATE TRIGGER tasks_outbox_upd AFTER UPDATE ON tasks
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION tasks_write_outbox()
+    """)
+    op.execute("""
+        CREATE TRIGGER tasks_outbox_del AFTER DELETE ON tasks
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION tasks_write_outbox()
+    """)
+
+    # Start at the current horizon: history before the outbox existed is not replayed
+    op.execute("""
+        INSERT INTO outbox_consumers (name, watermark)
+        VALUES ('analytics', pg_snapshot_xmin(pg_current_snapshot()))
+    """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS tasks_outbox_del ON tasks")
+    op.execute("DROP TRIGGER IF EXISTS tasks_outbox_upd ON tasks")
+    op.execute("DROP TRIGGER IF EXISTS tasks_outbox_ins ON tasks")
+    op.execute("DROP FUNCTION IF EXISTS tasks_write_outbox()")
+    op.drop_table("analytics_event_counts")
+    op.execute("DROP TABLE IF EXISTS outbox_claims")
+    op.execute("DROP TABLE IF EXISTS outbox_consumers")
+    op.execute("DROP TABLE IF EXISTS task_outbox")
@@ -0,0 +1,40 @@
+"""Periodic task state snapshots for history reconstruction
+
+task_activity_logs now stores only the fields a change touched (see
+app.services.task_history). A task's state at a point in time is rebuilt
+from its latest snapshot at or before that point plus the diffs logged
+after it; a snapshot is written every SNAPSHOT_EVERY diffs, so a rebuild
+reads one snapshot and a bounded number of log rows.
+
+A snapshot is positioned in the log by (taken_at, activity_id): the
+created_at and id of the last activity row folded into it.
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0013"
+down_revision = "0012"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "task_snapshots",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("task_id", sa.Integer(), sa.ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("activity_id", sa.Integer(), nullable=False),
+        sa.Column("taken_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("state", postgresql.JSONB(), nullable=False),
+    )
+    op.create_index("ix_task_snapshots_task_taken_at_activity", "task_snapshots", ["task_id", "taken_at", "activity_id"])
+
+
+def downgrade():
+    op.drop_index("ix_task_snapshots_task_taken_at_activity", table_name="task_snapshots")
+    op.drop_table("task_snapshots")
@@ -0,0 +1,132 @@
+"""Daily task rollups for the analytics endpoints
+
+- daily_org_rollups / daily_project_rollups: per organization (or project)
+  and UTC day. The day is the task's created day for created counts, the
+  status/priority distribution, price sums and completion-time sums, and
+  the completed day for completed counts.
+- org_rollup_totals: the same measures summed over all days, so all-time
+  dashboard figures read one row.
+
+Price sums are numeric(14, 2): tasks.price has two decimals, so the sums
+are exact, and both dashboard paths report prices rounded to cents.
+
+All three are maintained by the pipeline's "rollups" outbox consumer
+(app.services.rollups): each task event adds the difference between the
+task's contribution after and before the change. The outbox payload now
+also carries organization_id and project_id, so a task moved between
+projects is taken out of the old one.
+
+The tables start empty; run the rebuild_daily_rollups pipeline task once
+after migrating to backfill them and register the consumer. Until then the
+beat's dispatch for "rollups" is skipped with a warning.
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0014"
+down_revision = "0013"
+branch_labels = None
+depends_on = None
+
+STATUSES = ("todo", "in_progress", "in_review", "done", "blocked")
+PRIORITIES = ("low", "medium", "high", "urgent")
+
+PAYLOAD_COLUMNS_0012 = (
+    "status", "priority", "assignee_id", "price", "is_archived", "created_at", "completed_at",
+)
+PAYLOAD_COLUMNS = PAYLOAD_COLUMNS_0012 + ("organization_id", "project_id")
+
+
+def measure_columns():
+    columns = [
+        sa.Column("tasks_created", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("tasks_completed", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("completion_seconds_sum", sa.Numeric(20, 6), nullable=False, server_default="0"),
+        sa.Column("completion_count", sa.BigInteger(), nullable=False, server_default="0"),
+    ]
+    for dimension, values in (("status", STATUSES), ("priority", PRIORITIES)):
+        for value in values:
+            columns += [
+                sa.Column(f"tasks_{dimension}_{value}", sa.BigInteger(), nullable=False, server_default="0"),
+                sa.Column(f"priced_{dimension}_{value}", sa.BigInteger(), nullable=False, server_default="0"),
+                sa.Column(f"price_{dimension}_{value}", sa.Numeric(14, 2), nullable=False, server_default="0"),
+            ]
+    return columns
+
+
+def outbox_function(payload_columns) -> str:
+    def payload(alias):
+        return "jsonb_build_object(" + ", ".join(f"'{c}', {alias}.{c}" for c in payload_columns) + ")"
+
+    return f"""
+        CREATE OR REPLACE FUNCTION tasks_write_outbox() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO task_outbox (organization_id, project_id, task_id, event_type, payload)
+                SELECT n.organization_id, n.project_id, n.id, 'task_created', {payload("n")}
+                FROM new_rows n
+                ORDER BY n.id;
+            ELSIF TG_OP = 'UPDATE' THEN
+                INSERT INTO task_outbox (organization_id, project_id, task_id, event_type, payload)
+                SELECT
+                    n.organization_id, n.project_id, n.id,
+                    CASE
+                        WHEN n.status = 'DONE' AND o.status <> 'DONE' THEN 'task_completed'
+                        WHEN n.is_archived AND NOT coalesce(o.is_archived, false) THEN 'task_archived'
+                        ELSE 'task_updated'
+                    END,
+                    {payload("n")} || jsonb_build_object('old', {payload("o")})
+                FROM new_rows n
+                JOIN old_rows o ON o.id = n.id
+                WHERE n.version <> o.version
+                ORDER BY n.id;
+            ELSE
+                -- Organization deletes cascade to tasks; nobody is left to report them to
+                INSERT INTO task_outbox (organization_id, project_id, task_id, event_type, payload)
+                SELECT o.organization_id, o.project_id, o.id, 'task_deleted', {payload("o")}
+                FROM old_rows o
+                WHERE EXISTS (SELECT 1 FROM organizations WHERE id = o.organization_id)
+                ORDER BY o.id;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """
+
+
+def upgrade():
+    op.create_table(
+        "daily_org_rollups",
+        sa.Column("organization_id", sa.Integer(), sa.ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        *measure_columns(),
+    )
+    op.create_table(
+        "daily_project_rollups",
+        sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("organization_id", sa.Integer(), nullable=False),
+        *measure_columns(),
+    )
+    op.create_table(
+        "org_rollup_totals",
+        sa.Column("organization_id", sa.Integer(), sa.ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True),
+        *measure_columns(),
+    )
+    # Unconsumed events are looked up per organization for the live delta
+    op.create_index("ix_task_outbox_org_txid", "task_outbox", ["organization_id", "txid"])
+    op.execute(outbox_function(PAYLOAD_COLUMNS))
+
+
+def downgrade():
+    op.execute(outbox_function(PAYLOAD_COLUMNS_0012))
+    op.execute("DELETE FROM outbox_claims WHERE consumer = 'rollups'")
+    op.execute("DELETE FROM outbox_consumers WHERE name = 'rollups'")
+    op.drop_index("ix_task_outbox_org_txid", table_name="task_outbox")
+    op.drop_table("org_rollup_totals")
+    op.drop_table("daily_project_rollups")
+    op.drop_table("daily_org_rollups")
@@ -0,0 +1,216 @@
+"""Lock-free task change stamps: global sequence plus transaction horizon
+
+Until now every task insert, update and delete upserted its organization's
+org_change_counters row twice: the change_seq row trigger (0007) and the
+tasks_version statement trigger (0006). Both held that row lock until
+commit, so all task writes in an organization ran one at a time, and a
+long import held up every board edit in the tenant.
+
+Task writes now leave org_change_counters alone (with 0017, which stops
+the task_count updates below from bumping projects_version):
+
+- tasks.change_seq and task_tombstones.change_seq come from the global
+  task_change_seq sequence, and change_txid records the writing
+  transaction (xid8). A sequence is not handed out in commit order, so
+  readers bound everything by the transaction horizon, like the outbox
+  consumers (0012): a row is only read once its change_txid is below
+  pg_snapshot_xmin(pg_current_snapshot()), when every older transaction
+  has finished. Changes are ordered by (change_txid, change_seq).
+- The tasks ETag version is the highest change_txid below the horizon among
+  the organization's tasks and tombstones (one index probe each), plus a
+  digest of the rows committed above it (see app.services.etags), so a
+  commit changes the version at once even while an older transaction holds
+  the horizon back.
+- Tombstone compaction records tombstones_compacted_txid (replacing
+  tombstones_compacted_seq). Cursors are now "<txid>.<seq>.<floor>",
+  floor being the transaction from which the client needs deletions (where
+  its full sync started, or txid); a cursor whose floor is not past the
+  compacted transaction must resync. The old integer cursors are answered
+  with 410 once, forcing a full sync.
+
+projects_version and users_version keep their statement triggers (0006):
+project and user writes are rare and already take organization quota locks.
+
+Task inserts and deletes still update their project's task_count (0010),
+so they queue on the project row; quota checks already lock it
+(app.services.usage). Writes to different projects no longer wait on each
+other.
+
+Existing rows keep their per-organization sequences with change_txid 0, so
+they sort before everything written from now on.
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0015"
+down_revision = "0014"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Above every per-organization value, so versions keep increasing
+    op.execute("CREATE SEQUENCE task_change_seq")
+    op.execute("""
+        SELECT setval('task_change_seq', greatest(
+            (SELECT coalesce(max(change_seq), 0) FROM tasks),
+            (SELECT coalesce(max(change_seq), 0) FROM task_tombstones),
+            1
+        ))
+    """)
+
+    # xid8 has no SQLAlchemy type; constant defaults keep these metadata-only
+    op.execute("ALTER TABLE tasks ADD COLUMN change_txid xid8 NOT NULL DEFAULT '0'")
+    op.execute("ALTER TABLE task_tombstones ADD COLUMN change_txid xid8 NOT NULL DEFAULT '0'")
+    # NULL until the organization's first compaction
+    op.execute("ALTER TABLE org_change_counters ADD COLUMN tombstones_compacted_txid xid8")
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION tasks_stamp_change_seq() RETURNS trigger AS $$
+        BEGIN
+            NEW.change_seq := nextval('task_change_seq');
+            NEW.change_txid := pg_current_xact_id();
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION tasks_write_tombstone() RETURNS trigger AS $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM organizations WHERE id = OLD.organization_id) THEN
+                INSERT INTO task_tombstones (task_id, organization_id, project_id, change_seq, change_txid)
+                VALUES (OLD.id, OLD.organization_id, OLD.project_id, nextval('task_change_seq'), pg_current_xact_id())
+                ON CONFLICT (task_id) DO NOTHING;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("DROP FUNCTION next_org_change_seq(integer)")
+
+    for suffix in ("ins", "upd", "del"):
+        op.execute(f"DROP TRIGGER tasks_bump_version_{suffix} ON tasks")
+    op.execute("DROP FUNCTION bump_tasks_version()")
+    op.drop_column("org_change_counters", "tasks_version")
+    op.drop_column("org_change_counters", "change_seq")
+    op.drop_column("org_change_counters", "tombstones_compacted_seq")
+
+    op.execute(
+        "CREATE INDEX ix_task_tombstones_org_change_txid "
+        "ON task_tombstones (organization_id, change_txid, change_seq)"
+    )
+    op.drop_index("ix_task_tombstones_org_change_seq", table_name="task_tombstones")
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_org_change_txid "
+            "ON tasks (organization_id, change_txid, change_seq)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_tasks_org_change_seq")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_org_change_seq "
+            "ON tasks (organization_id, change_seq)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_tasks_org_change_txid")
+
+    op.create_index("ix_task_tombstones_org_change_seq", "task_tombstones", ["organization_id", "change_seq"])
+    op.execute("DROP INDEX ix_task_tombstones_org_change_txid")
+
+    # Counters resume above every sequence handed out so far
+    op.add_column("org_change_counters", sa.Column("change_seq", sa.BigInteger(), nullable=False, server_default="0"))
+    op.add_column("org_change_counters", sa.Column("tasks_version", sa.BigInteger(), nullable=False, server_default="0"))
+    op.add_column(
+        "org_change_counters",
+        sa.Column("tombstones_compacted_seq", sa.BigInteger(), nullable=False, server_default="0"),
+    )
+    op.execute("""
+        UPDATE org_change_counters
+        SET change_seq = (SELECT last_value FROM task_change_seq),
+            tasks_version = (SELECT last_value FROM task_change_seq),
+            tombstones_compacted_seq = CASE
+                WHEN tombstones_compacted_txid IS NULL THEN 0
+                ELSE (SELECT last_value FROM task_change_seq)
+            END
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION next_org_change_seq(org_id integer) RETURNS bigint AS $$
+            INSERT INTO org_change_counters (organization_id, change_seq) VALUES (org_id, 1)
+            ON CONFLICT (organization_id)
+            DO UPDATE SET change_seq = org_change_counters.change_seq + 1
+            RETURNING change_seq
+        $$ LANGUAGE sql
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION tasks_stamp_change_seq() RETURNS trigger AS $$
+        BEGIN
+            NEW.change_seq := next_org_change_seq(NEW.organization_id);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION tasks_write_tombstone() RETURNS trigger AS $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM organizations WHERE id = OLD.organization_id) THEN
+                INSERT INTO task_tombstones (task_id, organization_id, project_id, change_seq)
+                VALUES (OLD.id, OLD.organization_id, OLD.project_id, next_org_change_seq(OLD.organization_id))
+                ON CONFLICT (task_id) DO NOTHING;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_tasks_version() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO org_change_counters (organization_id, tasks_version)
+                SELECT DISTINCT organization_id, 1 FROM new_rows
+                ON CONFLICT (organization_id)
+                DO UPDATE SET tasks_version = org_change_counters.tasks_version + 1;
+            ELSIF TG_OP = 'UPDATE' THEN
+                INSERT INTO org_change_counters (organization_id, tasks_version)
+                SELECT organization_id, 1 FROM new_rows
+                UNION SELECT organization_id, 1 FROM old_rows
+                ON CONFLICT (organization_id)
+                DO UPDATE SET tasks_version = org_change_counters.tasks_version + 1;
+            ELSE
+                INSERT INTO org_change_counters (organization_id, tasks_version)
+                SELECT DISTINCT organization_id, 1 FROM old_rows
+                WHERE EXISTS (SELECT 1 FROM organizations o WHERE o.id = old_rows.organization_id)
+                ON CONFLICT (organization_id)
+                DO UPDATE SET tasks_version = org_change_counters.tasks_version + 1;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER tasks_bump_version_ins AFTER INSERT ON tasks
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_tasks_version()
+    """)
+    op.execute("""
+        CREATE TRIGGER tasks_bump_version_upd AFTER UPDATE ON tasks
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_tasks_version()
+    """)
+    op.execute("""
+        CREATE TRIGGER tasks_bump_version_del AFTER DELETE ON tasks
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_tasks_version()
+    """)
+
+    op.execute("ALTER TABLE org_change_counters DROP COLUMN tombstones_compacted_txid")
+    op.execute("ALTER TABLE task_tombstones DROP COLUMN change_txid")
+    op.execute("ALTER TABLE tasks DROP COLUMN change_txid")
+    op.execute("DROP SEQUENCE task_change_seq")
@@ -0,0 +1,65 @@
+"""Order task history by task version, not by created_at
+
+Activity entries from the write-behind buffer (app.services.activity_buffer)
+can land after entries for later changes that were logged directly, such as
+a batch written in its own transaction. History was replayed in
+(created_at, id) order from the latest snapshot, so a late entry older than
+a snapshot was never applied again and its change vanished from every
+rebuilt state.
+
+task_activity_logs.task_version now records the task's version right after
+the change. Row locks and the version trigger (0011) make versions follow
+commit order whenever the entry lands, so history is ordered by
+(task_version, id) and snapshots are positioned by the (task_version,
+activity_id) of the last entry folded in. A snapshot is only taken up to the
+first recent gap in the version sequence (see app.services.task_history).
+
+Existing entries get task_version 0 and keep their id order ahead of
+everything logged from now on. Existing snapshots were positioned by the
+old order and may skip late entries, so they are dropped and taken again as
+tasks receive new diffs.
+
+Revision ID: 0016
+Revises: 0015
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0016"
+down_revision = "0015"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "task_activity_logs",
+        sa.Column("task_version", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+    op.execute("DELETE FROM task_snapshots")
+    op.add_column("task_snapshots", sa.Column("task_version", sa.Integer(), nullable=False))
+    op.drop_index("ix_task_snapshots_task_taken_at_activity", table_name="task_snapshots")
+    op.create_index(
+        "ix_task_snapshots_task_version_activity", "task_snapshots", ["task_id", "task_version", "activity_id"]
+    )
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_task_activity_logs_task_version_id "
+            "ON task_activity_logs (task_id, task_version, id)"
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_task_activity_logs_task_version_id")
+
+    op.execute("DELETE FROM task_snapshots")
+    op.drop_index("ix_task_snapshots_task_version_activity", table_name="task_snapshots")
+    op.create_index(
+        "ix_task_snapshots_task_taken_at_activity", "task_snapshots", ["task_id", "taken_at", "activity_id"]
+    )
+    op.drop_column("task_snapshots", "task_version")
+    op.drop_column("task_activity_logs", "task_version")
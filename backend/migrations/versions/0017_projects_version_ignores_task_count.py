@@ -0,0 +1,83 @@
+"""projects_version ignores task_count updates
+
+Every task insert or delete updates its project's task_count (0010), and
+that UPDATE fired the projects statement trigger (0006), which upserted the
+organization's org_change_counters row. Task creates and deletes therefore
+still held the per-organization counter row lock until commit, and every one
+invalidated the projects ETag, though task_count is in no project payload.
+
+bump_projects_version() now bumps only for organizations with a project row
+that changed in some column other than task_count, and touches nothing when
+there is none. The usage reconciliation (app.services.usage) no longer
+invalidates the projects ETag either.
+
+Revision ID: 0017
+Revises: 0016
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0017"
+down_revision = "0016"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_projects_version() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO org_change_counters (organization_id, projects_version)
+                SELECT DISTINCT organization_id, 1 FROM new_rows
+                ON CONFLICT (organization_id)
+                DO UPDATE SET projects_version = org_change_counters.projects_version + 1;
+            ELSIF TG_OP = 'UPDATE' THEN
+                -- task_count is maintained by task inserts and deletes and is in no project payload
+                INSERT INTO org_change_counters (organization_id, projects_version)
+                SELECT DISTINCT org.id, 1
+                FROM new_rows n
+                JOIN old_rows o ON o.id = n.id
+                CROSS JOIN LATERAL (VALUES (n.organization_id), (o.organization_id)) AS org (id)
+                WHERE to_jsonb(n) - 'task_count' IS DISTINCT FROM to_jsonb(o) - 'task_count'
+                ON CONFLICT (organization_id)
+                DO UPDATE SET projects_version = org_change_counters.projects_version + 1;
+            ELSE
+                INSERT INTO org_change_counters (organization_id, projects_version)
+                SELECT DISTINCT organization_id, 1 FROM old_rows
+                WHERE EXISTS (SELECT 1 FROM organizations o WHERE o.id = old_rows.organization_id)
+                ON CONFLICT (organization_id)
+                DO UPDATE SET projects_version = org_change_counters.projects_version + 1;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+
+def downgrade():
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_projects_version() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO org_change_counters (organization_id, projects_version)
+                SELECT DISTINCT organization_id, 1 FROM new_rows
+                ON CONFLICT (organization_id)
+                DO UPDATE SET projects_version = org_change_counters.projects_version + 1;
+            ELSIF TG_OP = 'UPDATE' THEN
+                INSERT INTO org_change_counters (organization_id, projects_version)
+                SELECT organization_id, 1 FROM new_rows
+                UNION SELECT organization_id, 1 FROM old_rows
+                ON CONFLICT (organization_id)
+                DO UPDATE SET projects_version = org_change_counters.projects_version + 1;
+            ELSE
+                INSERT INTO org_change_counters (organization_id, projects_version)
+                SELECT DISTINCT organization_id, 1 FROM old_rows
+                WHERE EXISTS (SELECT 1 FROM organizations o WHERE o.id = old_rows.organization_id)
+                ON CONFLICT (organization_id)
+                DO UPDATE SET projects_version = org_change_counters.projects_version + 1;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
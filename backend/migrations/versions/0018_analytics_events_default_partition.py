@@ -0,0 +1,47 @@
+"""DEFAULT partition for analytics_events
+
+Monthly partitions are created MONTHS_AHEAD ahead by the pipeline
+(app.services.partitions). If the beat stopped for longer than that, every
+analytics_events insert failed with "no partition of relation found for
+row", and with it every request that logs activity directly. Such rows now
+land in analytics_events_default; the daily ensure_analytics_partitions run
+creates their months and moves them out.
+
+Revision ID: 0018
+Revises: 0017
+Create Date: 2026-10-17
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0018"
+down_revision = "0017"
+branch_labels = None
+depends_on = None
+
+
+def _add_months(value, months):
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade():
+    op.execute("CREATE TABLE analytics_events_default PARTITION OF analytics_events DEFAULT")
+
+
+def downgrade():
+    bind = op.get_bind()
+    op.execute("ALTER TABLE analytics_events DETACH PARTITION analytics_events_default")
+    # Rows that were waiting for their month get one now
+    months = bind.execute(sa.text(
+        "SELECT DISTINCT date_trunc('month', created_at)::date FROM analytics_events_default"
+    )).scalars().all()
+    for month in months:
+        op.execute(
+            f"CREATE TABLE IF NOT EXISTS analytics_events_y{month.year:04d}m{month.month:02d} "
+            f"PARTITION OF analytics_events FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+    op.execute("INSERT INTO analytics_events SELECT * FROM analytics_events_default")
+    op.execute("DROP TABLE analytics_events_default")
@@ -0,0 +1,182 @@
+"""
+Benchmark GET /api/v1/analytics/dashboard: per-figure queries vs grouping sets
+
+Runs the previous implementation (one query per figure, completed tasks
+loaded into Python for the average) and app.services.dashboard (two
+statements) against the same organization, checks that both return the
+same figures, and reports latency. The rollup-backed dashboard is timed
+too once the rollups have been built (rebuild_daily_rollups); it works at
+day granularity, so it is not part of the comparison. Seed a 1M-task
+organization first:
+
+    python scripts/seed_synthetic_data.py --organizations 1 --projects-per-org 20 --tasks 1000000
+    python scripts/bench_dashboard.py --organization-id <id> --runs 20
+"""
+import argparse
+import asyncio
+import math
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, func
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.database import AsyncSessionLocal, async_engine
+from app.models import Task, TaskStatus
+from app.services.dashboard import (
+    contributor_dicts, dashboard_figures, rollup_dashboard_figures, top_contributors_query
+)
+
+
+async def per_figure_dashboard(db, org_id, start_date, now):
+    """The dashboard as it was computed before: one query per figure"""
+    total_tasks = await db.scalar(select(func.count(Task.id)).where(Task.organization_id == org_id))
+
+    status_dict = {status.value: 0 for status in TaskStatus}
+    for status, count in (await db.execute(
+        select(Task.status, func.count(Task.id)).where(Task.organization_id == org_id).group_by(Task.status)
+    )).all():
+        status_dict[status.value] = count
+
+    priority_dict = {}
+    for priority, count in (await db.execute(
+        select(Task.priority, func.count(Task.id)).where(Task.organization_id == org_id).group_by(Task.priority)
+    )).all():
+        priority_dict[priority.value] = count
+
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    completed_today = await db.scalar(select(func.count(Task.id)).where(
+        Task.organization_id == org_id, Task.status == TaskStatus.DONE, Task.completed_at >= today_start
+    ))
+    week_start = today_start - timedelta(days=today_start.weekday())
+    completed_week = await db.scalar(select(func.count(Task.id)).where(
+        Task.organization_id == org_id, Task.status == TaskStatus.DONE, Task.completed_at >= week_start
+    ))
+
+    completed_tasks = (await db.execute(select(Task).where(
+        Task.organization_id == org_id, Task.status == TaskStatus.DONE,
+        Task.completed_at.isnot(None), Task.created_at >= start_date
+    ))).scalars().all()
+    times = [(t.completed_at - t.created_at).total_seconds() / 3600 for t in completed_tasks]
+    avg_completion = sum(times) / len(times) if times else None
+
+    overdue = await db.scalar(select(func.count(Task.id)).where(
+        Task.organization_id == org_id, Task.due_date.isnot(None), Task.due_date < now,
+        Task.status != TaskStatus.DONE
+    ))
+    productivity = (status_dict.get("done", 0) / total_tasks) * 100 if total_tasks > 0 else 0.0
+
+    contributors = (await db.execute(top_contributors_query(org_id, start_date))).all()
+
+    total_price = await db.scalar(select(func.sum(Task.price)).where(
+        Task.organization_id == org_id, Task.price.isnot(None)
+    ))
+    price_by_status = {status.value: 0.0 for status in TaskStatus}
+    for status, price in (await db.execute(
+        select(Task.status, func.sum(Task.price))
+        .where(Task.organization_id == org_id, Task.price.isnot(None)).group_by(Task.status)
+    )).all():
+        price_by_status[status.value] = float(price) if price else 0.0
+    price_by_priority = {}
+    for priority, price in (await db.execute(
+        select(Task.priority, func.sum(Task.price))
+        .where(Task.organization_id == org_id, Task.price.isnot(None)).group_by(Task.priority)
+    )).all():
+        price_by_priority[priority.value] = float(price) if price else 0.0
+
+    return {
+        "total_tasks": total_tasks,
+        "tasks_by_status": status_dict,
+        "tasks_by_priority": priority_dict,
+        "tasks_completed_today": completed_today,
+        "tasks_completed_this_week": completed_week,
+        "average_completion_time_hours": avg_completion,
+        "tasks_overdue": overdue,
+        "productivity_score": round(productivity, 2),
+        "top_contributors": contributor_dicts(contributors),
+        "total_price": round(float(total_price) if total_price else 0.0, 2),
+        "price_by_status": price_by_status,
+        "price_by_priority": price_by_priority,
+    }
+
+
+def differences(before, after):
+    """Figures that differ; the average may differ in the last float digits only"""
+    diff = []
+    for key, value in before.items():
+        other = after[key]
+        if key == "average_completion_time_hours" and value is not None and other is not None:
+            if not math.isclose(value, other, rel_tol=1e-9):
+                diff.append((key, value, other))
+        elif value != other:
+            diff.append((key, value, other))
+    return diff
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def timed(call, runs):
+    latencies = []
+    for _ in range(runs):
+        async with AsyncSessionLocal() as db:
+            started = time.perf_counter()
+            result = await call(db)
+            latencies.append(time.perf_counter() - started)
+    return result, latencies
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--organization-id", type=int, required=True)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    now = datetime.now(timezone.utc)
+    start_date = now - timedelta(days=args.days)
+
+    async with AsyncSessionLocal() as db:
+        tasks = await db.scalar(select(func.count(Task.id)).where(Task.organization_id == args.organization_id))
+    print(f"organization {args.organization_id}: {tasks} tasks, window {args.days} days, {args.runs} runs each")
+
+    results = {}
+    for name, call in (
+        ("per-figure", lambda db: per_figure_dashboard(db, args.organization_id, start_date, now)),
+        ("grouping-sets", lambda db: dashboard_figures(db, args.organization_id, start_date, now)),
+    ):
+        results[name], latencies = await timed(call, args.runs)
+        print(
+            f"{name:<14} p50={percentile(latencies, 50) * 1000:9.1f}ms "
+            f"p99={percentile(latencies, 99) * 1000:9.1f}ms "
+            f"min={min(latencies) * 1000:9.1f}ms"
+        )
+
+    rollups, latencies = await timed(
+        lambda db: rollup_dashboard_figures(db, args.organization_id, start_date, now), args.runs
+    )
+    if rollups is None:
+        print("rollups        not built; run the rebuild_daily_rollups pipeline task")
+    else:
+        print(
+            f"{'rollups':<14} p50={percentile(latencies, 50) * 1000:9.1f}ms "
+            f"p99={percentile(latencies, 99) * 1000:9.1f}ms "
+            f"min={min(latencies) * 1000:9.1f}ms"
+        )
+
+    diff = differences(results["per-figure"], results["grouping-sets"])
+    for key, before, after in diff:
+        print(f"MISMATCH {key}: {before!r} != {after!r}")
+    print("results identical" if not diff else f"{len(diff)} figures differ")
+
+    await async_engine.dispose()
+    sys.exit(1 if diff else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+"""
+Login burst benchmark
+
+Fires a burst of concurrent logins at a running API while a second client
+keeps polling an unrelated authenticated endpoint, then reports p50/p99 for
+both. Run against a server before and after a change to compare.
+
+    python scripts/bench_login_burst.py --base-url http://localhost:8000 --logins 500
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+
+
+def percentile(samples, pct):
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(name, samples, errors):
+    print(
+        f"{name:<22} n={len(samples):<5} errors={errors:<4} "
+        f"p50={percentile(samples, 50) * 1000:8.1f}ms "
+        f"p99={percentile(samples, 99) * 1000:8.1f}ms "
+        f"mean={(statistics.mean(samples) if samples else float('nan')) * 1000:8.1f}ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--logins", type=int, default=500)
+    parser.add_argument("--probe-endpoint", default="/api/v1/projects")
+    args = parser.parse_args()
+
+    email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+    password = "bench-password"
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=120) as client:
+        response = await client.post("/api/v1/auth/register", json={"email": email, "password": password})
+        response.raise_for_status()
+        response = await client.post("/api/v1/auth/login", json={"email": email, "password": password})
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        login_times, probe_times = [], []
+        login_errors, probe_errors = 0, 0
+        burst_done = asyncio.Event()
+
+        async def one_login():
+            nonlocal login_errors
+            started = time.perf_counter()
+            r = await client.post("/api/v1/auth/login", json={"email": email, "password": password})
+            if r.status_code == 200:
+                login_times.append(time.perf_counter() - started)
+            else:
+                login_errors += 1
+
+        async def probe():
+            nonlocal probe_errors
+            while not burst_done.is_set():
+                started = time.perf_counter()
+                r = await client.get(args.probe_endpoint, headers=headers)
+                if r.status_code == 200:
+                    probe_times.append(time.perf_counter() - started)
+                else:
+                    probe_errors += 1
+                await asyncio.sleep(0.01)
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(one_login() for _ in range(args.logins)))
+        elapsed = time.perf_counter() - started
+        burst_done.set()
+        await probe_task
+
+    print(f"burst of {args.logins} logins finished in {elapsed:.2f}s")
+    report("login", login_times, login_errors)
+    report(f"GET {args.probe_endpoint}", probe_times, probe_errors)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
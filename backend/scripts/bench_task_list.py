@@ -0,0 +1,103 @@
+"""
+Side-by-side benchmark of the GET /api/v1/tasks query: sync vs async
+
+The sync variant runs the query on SessionLocal inside the AnyIO threadpool
+(40 threads, as FastAPI does for `def` endpoints); the async variant runs it
+on AsyncSessionLocal directly on the event loop. Both use the same statement,
+so the difference is how many requests can wait on Postgres at once.
+
+    python scripts/bench_task_list.py --organization-id 1 --requests 2000 --concurrency 500
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import anyio
+from anyio import to_thread
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.database import SessionLocal, AsyncSessionLocal, engine, async_engine
+from app.models import Task, Project
+
+
+def task_list_query(organization_id: int, limit: int):
+    return select(Task).join(Project).where(
+        Project.organization_id == organization_id,
+        Task.is_archived == False
+    ).options(
+        selectinload(Task.assignee),
+        selectinload(Task.creator),
+        selectinload(Task.project)
+    ).limit(limit)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def report(name, samples, elapsed):
+    print(
+        f"{name:<6} requests={len(samples):<6} "
+        f"throughput={len(samples) / elapsed:8.1f}/s "
+        f"p50={percentile(samples, 50) * 1000:8.1f}ms "
+        f"p99={percentile(samples, 99) * 1000:8.1f}ms"
+    )
+
+
+async def run(name, call, requests, concurrency):
+    latencies = []
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with gate:
+            started = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    report(name, latencies, time.perf_counter() - started)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--organization-id", type=int, required=True)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    query = task_list_query(args.organization_id, args.limit)
+
+    def sync_call():
+        db = SessionLocal()
+        try:
+            return db.execute(query).scalars().all()
+        finally:
+            db.close()
+
+    async def sync_via_threadpool():
+        return await to_thread.run_sync(sync_call)
+
+    async def async_call():
+        async with AsyncSessionLocal() as db:
+            return (await db.execute(query)).scalars().all()
+
+    # Match FastAPI's default threadpool size
+    anyio.to_thread.current_default_thread_limiter().total_tokens = 40
+
+    await run("sync", sync_via_threadpool, args.requests, args.concurrency)
+    await run("async", async_call, args.requests, args.concurrency)
+
+    engine.dispose()
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
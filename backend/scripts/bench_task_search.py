@@ -0,0 +1,103 @@
+"""
+Task search benchmark with p95 targets
+
+Runs a mix of queries through the same statements GET /api/v1/tasks/search
+uses - single words, prefixes, multi-term queries, and typos that take the
+trigram fallback - and reports p50/p95/p99 per kind. Exits non-zero when a
+p95 target is missed, so it can gate a deploy.
+
+Seed the corpus first (5M tasks across 500 orgs is ~10k tasks per org):
+
+    python scripts/seed_synthetic_data.py --organizations 500 --tasks 5000000
+    python scripts/bench_task_search.py --organization-id 1 --requests 2000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.database import AsyncSessionLocal, async_engine
+from app.services.task_search import prefix_tsquery, full_text_query, fuzzy_query
+from seed_synthetic_data import VERBS, NOUNS, TAGS
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def typo(word: str) -> str:
+    if len(word) < 4:
+        return word
+    i = random.randrange(1, len(word) - 2)
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+def query_mix():
+    words = [w.lower() for w in VERBS] + [w for noun in NOUNS for w in noun.lower().split()] + TAGS
+    words = [w for w in words if len(w) >= 4]
+    return {
+        "word": lambda: random.choice(words),
+        "prefix": lambda: random.choice(words)[:4],
+        "multi_term": lambda: f"{random.choice(VERBS).lower()} {random.choice(NOUNS).split()[0].lower()}",
+        "typo": lambda: typo(random.choice(words)),
+    }
+
+
+async def search(organization_id: int, q: str, limit: int):
+    async with AsyncSessionLocal() as db:
+        tsquery = prefix_tsquery(q)
+        if tsquery:
+            rows = (await db.execute(full_text_query(organization_id, tsquery).limit(limit))).all()
+            if rows:
+                return rows
+        return (await db.execute(fuzzy_query(organization_id, q).limit(limit))).all()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--organization-id", type=int, required=True)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--p95-target-ms", type=float, default=50.0)
+    parser.add_argument("--typo-p95-target-ms", type=float, default=150.0)
+    args = parser.parse_args()
+
+    random.seed(7)
+    mix = query_mix()
+    latencies = {kind: [] for kind in mix}
+    gate = asyncio.Semaphore(args.concurrency)
+
+    async def one(kind):
+        q = mix[kind]()
+        async with gate:
+            started = time.perf_counter()
+            await search(args.organization_id, q, args.limit)
+            latencies[kind].append((time.perf_counter() - started) * 1000)
+
+    await asyncio.gather(*(one(random.choice(list(mix))) for _ in range(args.requests)))
+    await async_engine.dispose()
+
+    failed = False
+    for kind, samples in latencies.items():
+        if not samples:
+            continue
+        target = args.typo_p95_target_ms if kind == "typo" else args.p95_target_ms
+        p95 = percentile(samples, 95)
+        ok = p95 <= target
+        failed = failed or not ok
+        print(
+            f"{kind:<10} n={len(samples):<5} p50={percentile(samples, 50):7.1f}ms "
+            f"p95={p95:7.1f}ms p99={percentile(samples, 99):7.1f}ms "
+            f"target={target:.0f}ms {'ok' if ok else 'MISSED'}"
+        )
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,127 @@
+"""
+Microbenchmark: serializing a 500-task GET /api/v1/tasks page, before and after
+
+before: Decimal columns, a hand-built dict per task with float(...) per
+        Numeric field, TaskWithDetails(**dict), then FastAPI's default
+        response path (validate against the response_model, jsonable_encoder,
+        json.dumps).
+after:  float columns (asdecimal=False), task_details_row_to_dict() on row
+        tuples, orjson.dumps as ORJSONResponse does.
+
+No database is needed; rows are synthetic.
+
+    python scripts/bench_task_serialization.py --tasks 500 --iterations 200
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import List
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.models import TaskStatus, TaskPriority
+from app.schemas.task import TaskWithDetails
+from app.utils.serialization import TASK_FIELDS, task_details_row_to_dict
+
+NUMERIC_FIELDS = (
+    "estimated_hours", "actual_hours", "price",
+    "position_x", "position_y", "box_width", "box_height",
+)
+
+
+def synthetic_row(i: int, as_decimal: bool):
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=i)
+    number = Decimal if as_decimal else float
+    values = {
+        "id": i,
+        "title": f"Task {i}",
+        "description": "Lorem ipsum dolor sit amet " * 4,
+        "status": TaskStatus.IN_PROGRESS,
+        "priority": TaskPriority.MEDIUM,
+        "project_id": 1,
+        "assignee_id": 2,
+        "created_by_id": 3,
+        "due_date": now + timedelta(days=7),
+        "completed_at": None,
+        "estimated_hours": number("4.50"),
+        "actual_hours": number("2.25"),
+        "price": number("120.00"),
+        "tags": ["backend", "perf"],
+        "position_x": number("310.00"),
+        "position_y": number("95.50"),
+        "box_width": number("250.00"),
+        "box_height": number("140.00"),
+        "is_archived": False,
+        "created_at": now,
+        "updated_at": now,
+        "change_seq": i + 1,
+        "version": 1,
+    }
+    return values, ("Assignee Name", "Creator Name", "Project")
+
+
+def before(rows) -> bytes:
+    result = []
+    for values, (assignee_name, creator_name, project_name) in rows:
+        task = SimpleNamespace(**values)
+        task_dict = {field: getattr(task, field) for field in TASK_FIELDS}
+        for field in NUMERIC_FIELDS:
+            value = getattr(task, field)
+            task_dict[field] = float(value) if value else None
+        task_dict["tags"] = task.tags if task.tags else []
+        task_dict.update(assignee_name=assignee_name, creator_name=creator_name, project_name=project_name)
+        result.append(TaskWithDetails(**task_dict))
+    # What FastAPI does with a response_model and the default JSONResponse
+    validated = LIST_ADAPTER.validate_python([item.model_dump() for item in result])
+    return json.dumps(jsonable_encoder(validated)).encode("utf-8")
+
+
+def after(rows) -> bytes:
+    return orjson.dumps([task_details_row_to_dict(row) for row in rows])
+
+
+LIST_ADAPTER = TypeAdapter(List[TaskWithDetails])
+
+
+def measure(name, fn, rows, iterations):
+    fn(rows)  # warm up
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn(rows)
+        samples.append(time.perf_counter() - started)
+    median = statistics.median(samples) * 1000
+    print(f"{name:<7} median={median:8.2f}ms  min={min(samples) * 1000:8.2f}ms")
+    return median
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--tasks", type=int, default=500)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    before_rows = [synthetic_row(i, as_decimal=True) for i in range(args.tasks)]
+    after_rows = []
+    for i in range(args.tasks):
+        values, names = synthetic_row(i, as_decimal=False)
+        after_rows.append(tuple(values[field] for field in TASK_FIELDS) + names)
+
+    print(f"serializing {args.tasks} tasks x {args.iterations} iterations")
+    slow = measure("before", before, before_rows, args.iterations)
+    fast = measure("after", after, after_rows, args.iterations)
+    print(f"speedup {slow / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
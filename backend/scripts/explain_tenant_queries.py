@@ -0,0 +1,61 @@
+"""
+Print EXPLAIN (ANALYZE, BUFFERS) for the hot tenant-scoped task queries
+
+Each query is shown in its old form (join through projects) and its
+denormalized form (tasks.organization_id), so plans can be compared
+before/after on a large dataset (see seed_synthetic_data.py).
+
+    python scripts/explain_tenant_queries.py --organization-id 42
+"""
+import argparse
+import os
+import sys
+
+from sqlalchemy import text
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.database import engine
+
+QUERIES = {
+    "list active tasks": (
+        """SELECT t.* FROM tasks t JOIN projects p ON p.id = t.project_id
+           WHERE p.organization_id = :org AND t.is_archived = false LIMIT 100""",
+        """SELECT t.* FROM tasks t
+           WHERE t.organization_id = :org AND t.is_archived = false LIMIT 100""",
+    ),
+    "count by status": (
+        """SELECT t.status, count(*) FROM tasks t JOIN projects p ON p.id = t.project_id
+           WHERE p.organization_id = :org GROUP BY t.status""",
+        """SELECT t.status, count(*) FROM tasks t
+           WHERE t.organization_id = :org GROUP BY t.status""",
+    ),
+    "created in last 30 days": (
+        """SELECT date(t.created_at), count(*) FROM tasks t JOIN projects p ON p.id = t.project_id
+           WHERE p.organization_id = :org AND t.created_at >= now() - interval '30 days'
+           GROUP BY date(t.created_at)""",
+        """SELECT date(t.created_at), count(*) FROM tasks t
+           WHERE t.organization_id = :org AND t.created_at >= now() - interval '30 days'
+           GROUP BY date(t.created_at)""",
+    ),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--organization-id", type=int, required=True)
+    args = parser.parse_args()
+
+    with engine.connect() as conn:
+        for name, variants in QUERIES.items():
+            for label, sql in zip(("join projects", "denormalized"), variants):
+                print(f"=== {name} ({label}) ===")
+                plan = conn.execute(
+                    text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"), {"org": args.organization_id}
+                ).scalars()
+                print("\n".join(plan))
+                print()
+
+
+if __name__ == "__main__":
+    main()
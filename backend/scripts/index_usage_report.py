@@ -0,0 +1,66 @@
+"""
+Report index usage from pg_stat_user_indexes
+
+Lists every index with its size and scan counters, and flags indexes that
+have never been scanned since the last stats reset (excluding primary keys
+and unique constraints, which are needed regardless).
+
+    python scripts/index_usage_report.py [--unused-only] [--table tasks]
+"""
+import argparse
+import os
+import sys
+
+from sqlalchemy import text
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.database import engine
+
+INDEX_USAGE_SQL = """
+    SELECT s.relname AS table_name,
+           s.indexrelname AS index_name,
+           s.idx_scan,
+           s.idx_tup_read,
+           s.idx_tup_fetch,
+           pg_relation_size(s.indexrelid) AS size_bytes,
+           pg_size_pretty(pg_relation_size(s.indexrelid)) AS size,
+           i.indisunique OR i.indisprimary AS is_unique
+    FROM pg_stat_user_indexes s
+    JOIN pg_index i ON i.indexrelid = s.indexrelid
+    WHERE (CAST(:table AS text) IS NULL OR s.relname = :table)
+    ORDER BY s.relname, s.idx_scan, pg_relation_size(s.indexrelid) DESC
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--table", default=None)
+    parser.add_argument("--unused-only", action="store_true")
+    args = parser.parse_args()
+
+    with engine.connect() as conn:
+        stats_reset = conn.execute(text(
+            "SELECT stats_reset FROM pg_stat_database WHERE datname = current_database()"
+        )).scalar()
+        rows = conn.execute(text(INDEX_USAGE_SQL), {"table": args.table}).all()
+
+    print(f"stats since: {stats_reset or 'cluster start'}")
+    print(f"{'table':<22} {'index':<42} {'scans':>12} {'tuples read':>14} {'size':>10}")
+    unused_bytes = 0
+    for row in rows:
+        unused = row.idx_scan == 0 and not row.is_unique
+        if args.unused_only and not unused:
+            continue
+        if unused:
+            unused_bytes += row.size_bytes
+        flag = "  UNUSED" if unused else ""
+        print(
+            f"{row.table_name:<22} {row.index_name:<42} {row.idx_scan:>12} "
+            f"{row.idx_tup_read:>14} {row.size:>10}{flag}"
+        )
+    print(f"unused non-unique indexes: {unused_bytes / (1024 * 1024):.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
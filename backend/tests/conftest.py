@@ -0,0 +1,112 @@
+"""Shared fixtures
+
+Tests that use `seeded` or `client` need the services from docker-compose:
+DATABASE_URL must point at a throwaway database (it is migrated to head
+and an organization is seeded once per session) and REDIS_URL at Redis.
+"""
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from alembic import command
+from alembic.config import Config
+
+from app.database import SessionLocal, async_engine
+from app.main import app
+from app.models import Organization, Project, Task, TaskPriority, TaskStatus, User
+from app.utils.auth import create_access_token
+from app.utils.query_counter import ENDPOINT_BUDGETS, query_budget
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+def seeded():
+    """An organization with 3 users, 3 projects and 30 tasks spread across them"""
+    command.upgrade(Config(str(BACKEND_DIR / "alembic.ini")), "head")
+
+    db = SessionLocal()
+    try:
+        slug = f"test-{uuid.uuid4().hex[:12]}"
+        organization = Organization(name="Test organization", slug=slug)
+        db.add(organization)
+        db.flush()
+
+        users = [
+            User(
+                email=f"{slug}-{i}@example.com",
+                hashed_password="!",
+                full_name=f"User {i}",
+                organization_id=organization.id,
+            )
+            for i in range(3)
+        ]
+        db.add_all(users)
+        db.flush()
+
+        projects = [
+            Project(name=f"Project {i}", organization_id=organization.id, owner_id=users[0].id)
+            for i in range(3)
+        ]
+        db.add_all(projects)
+        db.flush()
+
+        # Different projects, assignees and creators, so a per-row lookup shows up as extra statements
+        tasks = [
+            Task(
+                title=f"Task {i}",
+                status=list(TaskStatus)[i % len(TaskStatus)],
+                priority=list(TaskPriority)[i % len(TaskPriority)],
+                tags=[f"tag-{i % 4}"],
+                project_id=projects[i % 3].id,
+                organization_id=organization.id,
+                assignee_id=users[i % 3].id,
+                created_by_id=users[(i + 1) % 3].id,
+            )
+            for i in range(30)
+        ]
+        db.add_all(tasks)
+        db.commit()
+
+        return SimpleNamespace(
+            organization_id=organization.id,
+            user_id=users[0].id,
+            task_id=tasks[0].id,
+            token=create_access_token({"sub": str(users[0].id)}),
+        )
+    finally:
+        db.close()
+
+
+@pytest.fixture
+async def client(seeded):
+    """HTTP client for the app, authenticated as the seeded organization's first user"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://test",
+        headers={"Authorization": f"Bearer {seeded.token}"},
+    ) as client:
+        yield client
+    # Pooled connections belong to this test's event loop
+    await async_engine.dispose()
+
+
+@pytest.fixture
+def endpoint_budget():
+    """query_budget() with the endpoint's ENDPOINT_BUDGETS entry
+
+        with endpoint_budget("GET /api/v1/tasks") as counter:
+            await client.get("/api/v1/tasks")
+    """
+    def check(endpoint: str):
+        return query_budget(ENDPOINT_BUDGETS[endpoint], label=endpoint)
+
+    return check
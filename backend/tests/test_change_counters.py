@@ -0,0 +1,54 @@
+"""Task writes leave org_change_counters alone (migrations 0015 and 0017)"""
+from sqlalchemy import text
+
+from app.database import SessionLocal
+from app.models import Project, Task
+
+COUNTER_ROW_SQL = text(
+    "SELECT xmin::text AS xmin, projects_version FROM org_change_counters WHERE organization_id = :organization_id"
+)
+
+
+def counter_row(db, organization_id):
+    return db.execute(COUNTER_ROW_SQL, {"organization_id": organization_id}).one()
+
+
+def test_task_insert_and_delete_leave_counters_alone(seeded):
+    db = SessionLocal()
+    try:
+        before = counter_row(db, seeded.organization_id)
+        project = db.query(Project).filter(Project.organization_id == seeded.organization_id).first()
+        task_count = project.task_count
+
+        task = Task(
+            title="Counter check",
+            project_id=project.id,
+            organization_id=seeded.organization_id,
+            created_by_id=seeded.user_id,
+        )
+        db.add(task)
+        db.commit()
+        db.refresh(project)
+        # The project's task_count moved, but no new version of the counter row was written
+        assert project.task_count == task_count + 1
+        assert counter_row(db, seeded.organization_id) == before
+
+        db.delete(task)
+        db.commit()
+        db.refresh(project)
+        assert project.task_count == task_count
+        assert counter_row(db, seeded.organization_id) == before
+    finally:
+        db.close()
+
+
+def test_project_change_still_bumps_projects_version(seeded):
+    db = SessionLocal()
+    try:
+        before = counter_row(db, seeded.organization_id)
+        project = db.query(Project).filter(Project.organization_id == seeded.organization_id).first()
+        project.color = "#10B981" if project.color != "#10B981" else "#3B82F6"
+        db.commit()
+        assert counter_row(db, seeded.organization_id).projects_version == before.projects_version + 1
+    finally:
+        db.close()
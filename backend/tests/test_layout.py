@@ -0,0 +1,26 @@
+"""Layout geometry validation: every value must fit the Numeric(10, 2) columns"""
+import math
+
+import pytest
+from pydantic import ValidationError
+
+from app.models import GEOMETRY_LIMIT
+from app.schemas.task import TaskLayoutChange, TaskUpdate
+
+
+@pytest.mark.parametrize("value", [math.nan, math.inf, -math.inf, GEOMETRY_LIMIT * 10, -1e9])
+@pytest.mark.parametrize("field", ["position_x", "box_height", "dx", "dh"])
+def test_layout_change_rejects_values_the_columns_cannot_hold(field, value):
+    with pytest.raises(ValidationError):
+        TaskLayoutChange(task_id=1, **{field: value})
+
+
+def test_task_update_rejects_non_finite_geometry():
+    with pytest.raises(ValidationError):
+        TaskUpdate(position_y=math.nan)
+
+
+def test_layout_change_accepts_values_up_to_the_limit():
+    change = TaskLayoutChange(task_id=1, position_x=GEOMETRY_LIMIT, position_y=-GEOMETRY_LIMIT, dw=-12.5)
+    assert change.position_x == GEOMETRY_LIMIT
+    assert change.dw == -12.5
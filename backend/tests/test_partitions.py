@@ -0,0 +1,32 @@
+"""analytics_events rows without a monthly partition wait in the default one"""
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+from app.database import engine
+from app.services.partitions import DEFAULT_PARTITION, add_months, ensure_monthly_partitions, month_start, partition_name
+
+
+def test_rows_in_default_partition_get_their_month(seeded):
+    # Far enough ahead that no partition exists for it yet
+    month = add_months(month_start(datetime.now(timezone.utc).date()), 40)
+    name = partition_name(month)
+    created_at = datetime(month.year, month.month, 15, tzinfo=timezone.utc)
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("""
+                INSERT INTO analytics_events (organization_id, event_type, created_at)
+                VALUES (:organization_id, 'partition_check', :created_at)
+            """), {"organization_id": seeded.organization_id, "created_at": created_at})
+            assert conn.execute(text(f"SELECT count(*) FROM {DEFAULT_PARTITION}")).scalar() == 1
+
+        with engine.begin() as conn:
+            assert name in ensure_monthly_partitions(conn)
+
+        with engine.connect() as conn:
+            assert conn.execute(text(f"SELECT count(*) FROM {DEFAULT_PARTITION}")).scalar() == 0
+            assert conn.execute(text(f"SELECT count(*) FROM {name} WHERE event_type = 'partition_check'")).scalar() == 1
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            conn.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE event_type = 'partition_check'"))
@@ -0,0 +1,46 @@
+"""Statement budgets (ENDPOINT_BUDGETS) for the hot read endpoints"""
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def warm_up(client):
+    # Loads the principal into its cache and opens a pooled connection, as on a live worker
+    response = await client.get("/api/v1/auth/me")
+    response.raise_for_status()
+
+
+@pytest.mark.parametrize("query", ["", "?limit=10", "?status=todo", "?tags_any=tag-1,tag-2"])
+async def test_list_tasks_within_budget(client, endpoint_budget, query):
+    await warm_up(client)
+    with endpoint_budget("GET /api/v1/tasks") as counter:
+        response = await client.get(f"/api/v1/tasks{query}")
+    assert response.status_code == 200
+    assert counter.count > 0
+
+
+async def test_get_task_within_budget(client, seeded, endpoint_budget):
+    await warm_up(client)
+    with endpoint_budget("GET /api/v1/tasks/{task_id}") as counter:
+        response = await client.get(f"/api/v1/tasks/{seeded.task_id}")
+    assert response.status_code == 200
+    assert response.json()["assignee_name"]
+    assert counter.count > 0
+
+
+@pytest.mark.parametrize("query", ["", "?limit=2"])
+async def test_list_projects_within_budget(client, endpoint_budget, query):
+    await warm_up(client)
+    with endpoint_budget("GET /api/v1/projects") as counter:
+        response = await client.get(f"/api/v1/projects{query}")
+    assert response.status_code == 200
+    assert counter.count > 0
+
+
+async def test_not_modified_within_budget(client, endpoint_budget):
+    await warm_up(client)
+    etag = (await client.get("/api/v1/tasks")).headers["ETag"]
+    with endpoint_budget("GET /api/v1/tasks") as counter:
+        response = await client.get("/api/v1/tasks", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert counter.count == 1
@@ -0,0 +1,80 @@
+"""History replay when buffered entries land behind a snapshotting batch"""
+from datetime import datetime, timedelta, timezone
+from itertools import count
+from types import SimpleNamespace
+
+from app.services.task_history import DEFAULT_STATE, SNAPSHOT_GAP_GRACE, replay_entries
+
+NOW = datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc)
+
+
+class Log:
+    """task_activity_logs for one task: ids are handed out in landing order"""
+
+    def __init__(self):
+        self.rows = []
+        self._ids = count(1)
+
+    def land(self, task_version, action, new_value, created_at=NOW):
+        self.rows.append(SimpleNamespace(
+            id=next(self._ids), task_version=task_version, action=action,
+            new_value=new_value, created_at=created_at,
+        ))
+
+    def after(self, position):
+        rows = sorted(self.rows, key=lambda row: (row.task_version, row.id))
+        return [row for row in rows if position is None or (row.task_version, row.id) > position]
+
+
+def snapshot(log, base=(None, None)):
+    """What take_due_snapshots() stores: the settled state after base"""
+    state, position = base
+    return replay_entries(state, position, log.after(position), settled_before=NOW - SNAPSHOT_GAP_GRACE)
+
+
+def rebuild(log, base=(None, None)):
+    state, position = base
+    return replay_entries(state, position, log.after(position))
+
+
+def test_buffered_update_landing_after_snapshotting_batch_is_replayed():
+    log = Log()
+    log.land(1, "created", {"title": "Draft"})
+    # Version 2 (a single update) is still in the activity buffer when a
+    # batch logs versions 3..60 directly and the task becomes due
+    for version in range(3, 61):
+        log.land(version, "updated", {"estimated_hours": float(version)})
+
+    base = snapshot(log)
+    assert base[1] == (1, 1)
+
+    log.land(2, "updated", {"title": "Final", "priority": "high"})
+    state, position = rebuild(log, base)
+    assert state == {**DEFAULT_STATE, "title": "Final", "priority": "high", "estimated_hours": 60.0}
+    assert position[0] == 60
+
+    # With the gap filled the next snapshot covers everything
+    assert snapshot(log, base) == (state, position)
+
+
+def test_old_gap_is_not_waited_for():
+    log = Log()
+    old = NOW - SNAPSHOT_GAP_GRACE - timedelta(minutes=1)
+    log.land(1, "created", {"title": "Draft"}, created_at=old)
+    # Version 2 was never logged (its assignee was deleted, say)
+    log.land(3, "updated", {"title": "Renamed"}, created_at=old)
+
+    state, position = snapshot(log)
+    assert state["title"] == "Renamed"
+    assert position == (3, 2)
+
+
+def test_entries_logged_before_versions_sort_first():
+    log = Log()
+    log.land(0, "created", {"title": "Draft"})
+    log.land(0, "updated", {"title": "Renamed"})
+    log.land(7, "updated", {"priority": "urgent"})
+
+    state, position = snapshot(log)
+    assert state == {**DEFAULT_STATE, "title": "Renamed", "priority": "urgent"}
+    assert position == (7, 3)
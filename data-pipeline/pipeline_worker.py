@@ -8,6 +8,7 @@ from sqlalchemy.orm import sessionmaker
 import pandas as pd
 from datetime import datetime, timedelta
 import json
+import logging
 import sys
 import os
 
@@ -15,7 +16,13 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
 
 from app.config import settings
-from app.models import AnalyticsEvent, Task, Project, Organization
+from app.models import AnalyticsEvent, Task, Organization
+from app.services.partitions import ensure_monthly_partitions, drop_partitions_before
+from app.services.tombstones import compact_tombstones
+from app.services.usage import reconcile_usage_counters
+from app.services.export import export_filename, iter_export
+from app.services.outbox import UnknownConsumer, compact_outbox, plan_claims, process_claim, stale_claims
+from app.services.rollups import rebuild_rollups
 
 # Celery app
 celery_app = Celery(
@@ -28,19 +35,30 @@ celery_app = Celery(
 engine = create_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(bind=engine)
 
+logger = logging.getLogger(__name__)
+
 
 @celery_app.task(name="process_analytics_batch")
-def process_analytics_batch(batch_id: str, start_time: str, end_time: str):
+def process_analytics_batch(batch_id: str = None, start_time: str = None, end_time: str = None):
     """
     Process a batch of analytics events
     Demonstrates: Data pipeline, batch processing, ETL operations
+    
+    Without a window (as beat runs it) this reports on the last full hour.
+    It is a report over analytics_events only; incremental task metrics come
+    from the task outbox (dispatch_outbox), which does not miss rows that
+    commit after their created_at window has been read.
     """
     db = SessionLocal()
     try:
-        start = datetime.fromisoformat(start_time)
-        end = datetime.fromisoformat(end_time)
+        if end_time:
+            end = datetime.fromisoformat(end_time)
+        else:
+            end = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+        start = datetime.fromisoformat(start_time) if start_time else end - timedelta(hours=1)
+        batch_id = batch_id or f"hourly-{start.strftime('%Y%m%dT%H')}"
         
-        # Extract: Get events from database
+        # Extract: Get events from database (the created_at range prunes to the covering partitions)
         events = db.query(AnalyticsEvent).filter(
             AnalyticsEvent.created_at >= start,
             AnalyticsEvent.created_at < end
@@ -60,7 +78,7 @@ def process_analytics_batch(batch_id: str, start_time: str, end_time: str):
                 "project_id": event.project_id,
                 "task_id": event.task_id,
                 "created_at": event.created_at,
-                **event.metadata
+                **(event.extra_data or {})
             })
         
         df = pd.DataFrame(data)
@@ -101,6 +119,103 @@ def process_analytics_batch(batch_id: str, start_time: str, end_time: str):
         db.close()
 
 
+@celery_app.task(name="dispatch_outbox")
+def dispatch_outbox(consumer: str = "analytics"):
+    """
+    Claim new task outbox events for a consumer and fan them out to workers
+    Demonstrates: Incremental watermark consumption, parallel idempotent ETL
+    
+    Each claim is a disjoint id range processed by process_outbox_claim on
+    any worker; claims whose worker was lost are sent again. A consumer that
+    is not registered yet (rollups, until rebuild_daily_rollups first runs)
+    is skipped.
+    """
+    try:
+        try:
+            claims = plan_claims(engine, consumer)
+        except UnknownConsumer:
+            logger.warning(f"Outbox consumer {consumer!r} is not registered yet, skipped")
+            return {"status": "skipped", "consumer": consumer, "reason": "not registered"}
+        retried = stale_claims(engine, consumer)
+        for claim_id in claims + retried:
+            process_outbox_claim.delay(claim_id)
+        
+        return {
+            "status": "success",
+            "consumer": consumer,
+            "claims": len(claims),
+            "retried": len(retried)
+        }
+    
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+
+
+@celery_app.task(name="process_outbox_claim")
+def process_outbox_claim(claim_id: int):
+    """
+    Apply one claimed range of outbox events to its consumer
+    Demonstrates: Exactly-once effects over at-least-once delivery
+    
+    The claim is marked done in the consumer's own transaction, so a
+    duplicate delivery or retry of a finished claim does nothing.
+    """
+    try:
+        events = process_claim(engine, claim_id)
+        
+        return {
+            "status": "success",
+            "claim_id": claim_id,
+            "processed": events,
+            "skipped": events is None
+        }
+    
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+
+
+@celery_app.task(name="compact_task_outbox")
+def compact_task_outbox(days_to_keep: int = 7):
+    """
+    Remove consumed task outbox events and finished claims past retention
+    Demonstrates: Change-feed lifecycle management
+    """
+    try:
+        cutoff_date = datetime.utcnow() - timedelta(days=days_to_keep)
+        
+        removed = compact_outbox(engine, cutoff_date)
+        
+        return {
+            "status": "success",
+            "removed": removed,
+            "cutoff_date": cutoff_date.isoformat()
+        }
+    
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+
+
+@celery_app.task(name="rebuild_daily_rollups")
+def rebuild_daily_rollups():
+    """
+    Recompute the daily task rollups from tasks and restart their outbox consumer
+    Demonstrates: Backfilling an incrementally maintained aggregate
+    
+    Run once after migrating, or to repair drift; from then on the
+    "rollups" outbox consumer keeps the tables current.
+    """
+    try:
+        rebuilt = rebuild_rollups(engine)
+        
+        return {
+            "status": "success",
+            "rebuilt": rebuilt
+        }
+    
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+
+
 @celery_app.task(name="generate_daily_report")
 def generate_daily_report(organization_id: int, date: str = None):
     """
@@ -118,8 +233,8 @@ def generate_daily_report(organization_id: int, date: str = None):
         end = datetime.combine(target_date, datetime.max.time())
         
         # Extract task data
-        tasks = db.query(Task).join(Project).filter(
-            Project.organization_id == organization_id,
+        tasks = db.query(Task).filter(
+            Task.organization_id == organization_id,
             Task.created_at >= start,
             Task.created_at < end
         ).all()
@@ -157,34 +272,130 @@ def generate_daily_report(organization_id: int, date: str = None):
         db.close()
 
 
+@celery_app.task(name="ensure_analytics_partitions")
+def ensure_analytics_partitions(months_ahead: int = 3):
+    """
+    Create monthly analytics_events partitions ahead of time
+    Demonstrates: Partition lifecycle management
+    
+    Months whose events fell into the default partition (this task did not
+    run for a while) get their partition too, and the rows are moved in.
+    """
+    try:
+        with engine.begin() as conn:
+            created = ensure_monthly_partitions(conn, months_ahead=months_ahead)
+        
+        return {
+            "status": "success",
+            "created": created
+        }
+    
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+
+
 @celery_app.task(name="cleanup_old_analytics")
 def cleanup_old_analytics(days_to_keep: int = 90):
     """
     Cleanup old analytics events to maintain database performance
     Demonstrates: Data lifecycle management in pipelines
+    
+    Retention works on whole monthly partitions: a month is detached and
+    dropped once all of it is older than the cutoff, so cleanup is constant
+    time and produces no row-level WAL or dead tuples.
     """
-    db = SessionLocal()
     try:
         cutoff_date = datetime.utcnow() - timedelta(days=days_to_keep)
         
-        # Archive or delete old events
-        deleted_count = db.query(AnalyticsEvent).filter(
-            AnalyticsEvent.created_at < cutoff_date
-        ).delete()
+        dropped = drop_partitions_before(engine, cutoff_date)
         
-        db.commit()
+        return {
+            "status": "success",
+            "dropped_partitions": dropped,
+            "cutoff_date": cutoff_date.isoformat()
+        }
+    
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+
+
+@celery_app.task(name="compact_task_tombstones")
+def compact_task_tombstones(days_to_keep: int = 30):
+    """
+    Remove task deletion tombstones older than the sync retention window
+    Demonstrates: Change-feed lifecycle management
+    
+    Clients whose sync cursor predates the compacted range get 410 from
+    GET /tasks/changes and fall back to a full sync.
+    """
+    try:
+        cutoff_date = datetime.utcnow() - timedelta(days=days_to_keep)
+        
+        removed = compact_tombstones(engine, cutoff_date)
         
         return {
             "status": "success",
-            "deleted_count": deleted_count,
+            "removed_tombstones": removed,
             "cutoff_date": cutoff_date.isoformat()
         }
     
     except Exception as e:
-        db.rollback()
         return {"status": "error", "error": str(e)}
-    finally:
-        db.close()
+
+
+@celery_app.task(name="reconcile_usage_counters")
+def reconcile_usage_counters_task():
+    """
+    Recount the subscription usage counters and correct any drift
+    Demonstrates: Data quality checks on denormalized counters
+    
+    Triggers keep the counters exact for inserts and deletes; this catches
+    anything they cannot see. A non-zero correction is worth investigating.
+    """
+    try:
+        corrected = reconcile_usage_counters(engine)
+        
+        return {
+            "status": "success",
+            "corrected": corrected
+        }
+    
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+
+
+@celery_app.task(name="export_organization_data")
+def export_organization_data(organization_id: int, dataset: str = "tasks", fmt: str = "parquet", gzip: bool = False):
+    """
+    Export an organization's tasks or activity history to a file for BI
+    Demonstrates: Streaming ETL with bounded memory
+    
+    Rows are read through a server-side cursor and written a chunk at a
+    time, so a multi-million-row tenant needs no more memory than a small one.
+    """
+    try:
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+        directory = os.path.join(settings.EXPORT_DIR, str(organization_id))
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, export_filename(dataset, organization_id, fmt, gzip, stamp))
+        
+        size = 0
+        with open(path + ".partial", "wb") as f:
+            for chunk in iter_export(engine, organization_id, dataset, fmt, gzip=gzip):
+                f.write(chunk)
+                size += len(chunk)
+        os.replace(path + ".partial", path)
+        
+        return {
+            "status": "success",
+            "organization_id": organization_id,
+            "dataset": dataset,
+            "path": path,
+            "bytes": size
+        }
+    
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
 
 
 @celery_app.task(name="calculate_productivity_metrics")
@@ -198,8 +409,8 @@ def calculate_productivity_metrics(organization_id: int):
         # Get tasks from last 30 days
         start_date = datetime.utcnow() - timedelta(days=30)
         
-        tasks = db.query(Task).join(Project).filter(
-            Project.organization_id == organization_id,
+        tasks = db.query(Task).filter(
+            Task.organization_id == organization_id,
             Task.created_at >= start_date
         ).all()
         
@@ -252,6 +463,19 @@ celery_app.conf.beat_schedule = {
         "task": "process_analytics_batch",
         "schedule": 3600.0,  # Every hour
     },
+    "dispatch-analytics-outbox": {
+        "task": "dispatch_outbox",
+        "schedule": 60.0,  # Every minute
+    },
+    "dispatch-rollups-outbox": {
+        "task": "dispatch_outbox",
+        "schedule": 60.0,  # Every minute
+        "args": ("rollups",),
+    },
+    "compact-task-outbox": {
+        "task": "compact_task_outbox",
+        "schedule": 86400.0,  # Daily
+    },
     "generate-daily-reports": {
         "task": "generate_daily_report",
         "schedule": 86400.0,  # Daily at midnight
@@ -260,6 +484,18 @@ celery_app.conf.beat_schedule = {
         "task": "cleanup_old_analytics",
         "schedule": 604800.0,  # Weekly
     },
+    "ensure-analytics-partitions": {
+        "task": "ensure_analytics_partitions",
+        "schedule": 86400.0,  # Daily
+    },
+    "compact-task-tombstones": {
+        "task": "compact_task_tombstones",
+        "schedule": 86400.0,  # Daily
+    },
+    "reconcile-usage-counters": {
+        "task": "reconcile_usage_counters",
+        "schedule": 86400.0,  # Daily
+    },
 }
 
 if __name__ == "__main__":